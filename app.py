@@ -1,10 +1,13 @@
 import streamlit as st
 import os
-import tempfile
+import io
+import hashlib
 import pandas as pd
-import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from src.extractor import PassportExtractor
+from src.cache import ResultCache
 from src.validators import validate_passport_data
+from config.settings import CACHE_ENABLED, APP_MAX_WORKERS
 
 # Set page configuration
 st.set_page_config(
@@ -13,23 +16,52 @@ st.set_page_config(
     layout="wide"
 )
 
+# Columns shown first, in this order; any others follow
+DISPLAY_COLUMNS = ['surname', 'name', 'passport_number', 'nationality', 'date_of_birth', 'sex',
+                   'expiration_date', 'validation_errors', 'original_filename']
+
 # Initialize Extractor (cached to avoid reloading model)
 @st.cache_resource
 def get_extractor():
-    return PassportExtractor(use_gpu=False)
+    # Re-uploads of the same file are answered from the on-disk result cache
+    cache = ResultCache() if CACHE_ENABLED else None
+    # One OCR reader per worker thread, so uploads from several sessions are read side by side
+    return PassportExtractor(use_gpu=False, cache=cache, reader_pool_size=APP_MAX_WORKERS)
+
+# One worker pool for all sessions, so uploads never run in the page script
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=APP_MAX_WORKERS, thread_name_prefix="app-extract")
 
 extractor = get_extractor()
 
-def save_uploaded_file(uploaded_file):
-    """Save uploaded file to a temporary location and return the path."""
-    try:
-        suffix = os.path.splitext(uploaded_file.name)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            return tmp_file.name
-    except Exception as e:
-        st.error(f"Error saving file: {e}")
-        return None
+def extract_file(file_bytes, filename):
+    """Runs on the worker pool: returns the records of one uploaded image or PDF."""
+    if os.path.splitext(filename)[1].lower() == '.pdf':
+        return extractor.process_pdf(file_bytes, source_name=filename)
+    data = extractor.get_data(file_bytes, source_name=filename)
+    return [data] if data else []
+
+def build_table(uploads, done, enable_validation):
+    """DataFrame of the records of the uploads that are done, in upload order."""
+    rows = []
+    for digest, filename in uploads:
+        for record in done.get(digest, []):
+            row = dict(record, source_file=record.get('source_file') or filename, original_filename=filename)
+            if enable_validation:
+                errors = validate_passport_data(row)
+                row['validation_errors'] = "; ".join(errors) if errors else "Valid"
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    return df[[c for c in DISPLAY_COLUMNS if c in df.columns] + [c for c in df.columns if c not in DISPLAY_COLUMNS]]
+
+def to_excel(df):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Sheet1')
+    return buffer.getvalue()
 
 def main():
     st.title("🛂 Passport OCR Extractor")
@@ -41,110 +73,92 @@ def main():
     # Sidebar for configuration
     st.sidebar.header("Configuration")
     enable_validation = st.sidebar.checkbox("Enable Data Validation", value=True)
-    
+
+    # Per-session results by SHA-256 of the file content, so reruns never extract a file twice.
+    # Failures are kept apart from the results, so processing the files again retries them
+    done = st.session_state.setdefault('results', {})
+    jobs = st.session_state.setdefault('jobs', {})
+    failed = st.session_state.setdefault('failed', {})
+
     # File Uploader
     uploaded_files = st.file_uploader(
-        "Choose passport files", 
-        type=['png', 'jpg', 'jpeg', 'pdf'], 
+        "Choose passport files",
+        type=['png', 'jpg', 'jpeg', 'pdf'],
         accept_multiple_files=True
     )
+    if not uploaded_files:
+        return
 
-    if uploaded_files:
+    uploads = [(hashlib.sha256(f.getvalue()).hexdigest(), f.name) for f in uploaded_files]
+    todo = [(digest, f) for (digest, _), f in zip(uploads, uploaded_files)
+            if digest not in done and digest not in jobs]
+    if todo:
         st.info(f"Loaded {len(uploaded_files)} files. Click 'Process Files' to start.")
-        
-        if st.button("Process Files"):
-            results = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, uploaded_file in enumerate(uploaded_files):
-                status_text.text(f"Processing {uploaded_file.name}...")
-                
-                # Save to temp file because extractor needs a path
-                temp_path = save_uploaded_file(uploaded_file)
-                
-                if temp_path:
-                    try:
-                        ext = os.path.splitext(temp_path)[1].lower()
-                        file_results = []
-                        
-                        if ext == '.pdf':
-                            file_results = extractor.process_pdf(temp_path)
-                        else:
-                            data = extractor.get_data(temp_path)
-                            if data:
-                                file_results = [data]
-                        
-                        # Add validation if enabled
-                        if enable_validation:
-                            for res in file_results:
-                                errors = validate_passport_data(res)
-                                res['validation_errors'] = "; ".join(errors) if errors else "Valid"
-                        
-                        # Add original filename for reference (since we used a temp file)
-                        for res in file_results:
-                            res['original_filename'] = uploaded_file.name
-                            
-                        results.extend(file_results)
-                        
-                    except Exception as e:
-                        st.error(f"Failed to process {uploaded_file.name}: {e}")
-                    finally:
-                        # Cleanup temp file
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
-                
-                # Update progress
-                progress_bar.progress((idx + 1) / len(uploaded_files))
-            
-            status_text.text("Processing complete!")
-            
-            if results:
-                st.success(f"Successfully extracted {len(results)} records.")
-                
-                # Create DataFrame
-                df = pd.DataFrame(results)
-                
-                # Reorder columns for better readability if possible
-                cols = ['surname', 'name', 'passport_number', 'nationality', 'date_of_birth', 'sex', 'expiration_date', 'validation_errors', 'original_filename']
-                # Add missing cols to list if they exist in df
-                all_cols = cols + [c for c in df.columns if c not in cols]
-                # Filter valid columns only
-                final_cols = [c for c in all_cols if c in df.columns]
-                
-                df = df[final_cols]
-                
-                # Display Data
-                st.dataframe(df)
-                
-                # Download Buttons
-                col1, col2 = st.columns(2)
-                
-                # CSV Download
-                csv = df.to_csv(index=False).encode('utf-8')
-                col1.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name="passport_data.csv",
-                    mime="text/csv",
-                )
-                
-                # Excel Download (requires openpyxl)
-                # Streamlit might need a BytesIO buffer for Excel
-                import io
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Sheet1')
-                
-                col2.download_button(
-                    label="Download Excel",
-                    data=buffer.getvalue(),
-                    file_name="passport_data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
-                
-            else:
-                st.warning("No data extracted from the provided files.")
+
+    if todo and st.button("Process Files"):
+        executor = get_executor()
+        for digest, uploaded_file in todo:
+            failed.pop(digest, None)
+            # The extractor works on the uploaded bytes directly, no temp file needed
+            jobs[digest] = (uploaded_file.name, executor.submit(extract_file, uploaded_file.getvalue(), uploaded_file.name))
+
+    # Jobs keep running in the pool across reruns; this run picks up whichever are still pending
+    pending = {jobs[digest][1]: digest for digest, _ in uploads if digest in jobs}
+    progress_bar = st.progress(0) if pending else None
+    status_text = st.empty()
+    table = st.empty()
+    total = len(uploads)
+
+    def show():
+        df = build_table(uploads, done, enable_validation)
+        if not df.empty:
+            table.dataframe(df)
+        return df
+
+    show()
+    while pending:
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            digest = pending.pop(future)
+            filename, _ = jobs.pop(digest)
+            try:
+                done[digest] = future.result()
+            except Exception as e:
+                failed[digest] = f"Failed to process {filename}: {e}"
+        processed = sum(digest in done or digest in failed for digest, _ in uploads)
+        progress_bar.progress(processed / total)
+        status_text.text(f"Processed {processed} of {total} files...")
+        show()
+
+    for digest, _ in uploads:
+        if digest in failed:
+            st.error(failed[digest])
+
+    if not all(digest in done or digest in failed for digest, _ in uploads):
+        return
+
+    status_text.text("Processing complete!")
+    df = show()
+    if df.empty:
+        st.warning("No data extracted from the provided files.")
+        return
+
+    st.success(f"Successfully extracted {len(df)} records.")
+
+    # Download Buttons; the files are only built when a button is clicked
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        label="Download CSV",
+        data=lambda: df.to_csv(index=False).encode('utf-8'),
+        file_name="passport_data.csv",
+        mime="text/csv",
+    )
+    col2.download_button(
+        label="Download Excel",
+        data=lambda: to_excel(df),
+        file_name="passport_data.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,318 @@
+"""
+Benchmarks the extraction pipeline on synthetic passports with known ground truth.
+
+    python -m benchmarks.run_benchmark --count 50 --noise 8 --blur 1 --rotations 0 90 180 270
+    python -m benchmarks.run_benchmark --baseline benchmarks/results/previous.json
+    python -m benchmarks.run_benchmark --roi-backend tesseract easyocr
+    python -m benchmarks.run_benchmark --detect-lines
+    python -m benchmarks.run_benchmark --compare-quantization
+
+Writes a JSON report with per-stage latency, throughput, peak RSS and field accuracy.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import functools
+import subprocess
+import threading
+from collections import defaultdict, Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_samples, generate_pdf
+from src.extractor import PassportExtractor
+from src.utils import setup_logger
+from src.ocr_backends import BACKENDS, EasyOCRBackend
+from config.settings import CACHE_PIPELINE_VERSION, OCR_BACKENDS, OCR_QUANTIZED
+
+logger = setup_logger("benchmark")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+COMPARED_FIELDS = ['surname', 'name', 'sex', 'date_of_birth', 'passport_number', 'expiration_date', 'personal_number']
+
+
+class StageTimer:
+    """
+    Records wall time of pipeline stages by wrapping extractor methods.
+    Times are inclusive: rotation_retries contains the read_mrz calls it makes.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def wrap(self, obj, attr, stage, skip_inside=()):
+        """Replaces obj.attr with a timed version; calls made while inside a `skip_inside` stage are not recorded."""
+        original = getattr(obj, attr)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            stack = self._stack()
+            if any(s in stack for s in skip_inside):
+                return original(*args, **kwargs)
+            stack.append(stage)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+                stack.pop()
+
+        setattr(obj, attr, timed)
+
+    def instrument(self, extractor):
+        self.wrap(extractor, '_read_mrz', 'read_mrz')
+        self.wrap(extractor, '_retry_with_rotation', 'rotation_retries')
+        self.wrap(extractor, '_fallback_direct_easyocr', 'full_image_fallback')
+        # OCR reads outside the full-image fallback are the MRZ region reads
+        for backend in {id(b): b for b in extractor.ocr['roi']}.values():
+            for attr in ('read_lines', 'read_lines_batch'):
+                self.wrap(backend, attr, f'{backend.name}_roi', skip_inside=('full_image_fallback',))
+        if any(b.name == 'easyocr' for backends in extractor.ocr.values() for b in backends):
+            extractor.reader
+
+    def summary(self):
+        return {stage: _latency_stats(times) for stage, times in sorted(self.samples.items())}
+
+    def reset(self):
+        self.samples.clear()
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _latency_stats(times):
+    values = sorted(times)
+    return {
+        'calls': len(values),
+        'total_s': round(sum(values), 4),
+        'mean_ms': round(1000 * sum(values) / len(values), 2),
+        'p50_ms': round(1000 * _percentile(values, 0.5), 2),
+        'p95_ms': round(1000 * _percentile(values, 0.95), 2),
+        'max_ms': round(1000 * values[-1], 2),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where `resource` is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def score(records, truths):
+    """Field accuracy of extracted records against ground truth (a missing record counts as wrong)."""
+    field_hits = Counter()
+    exact = 0
+    detected = 0
+    stages = Counter()
+    for record, truth in zip(records, truths):
+        if not record:
+            stages['none'] += 1
+            continue
+        detected += 1
+        stages[record.get('mrz_stage') or 'unknown'] += 1
+        hits = [str(record.get(field, '')) == str(truth[field]) for field in COMPARED_FIELDS]
+        field_hits.update(field for field, hit in zip(COMPARED_FIELDS, hits) if hit)
+        exact += all(hits)
+    total = len(truths) or 1
+    return {
+        'documents': len(truths),
+        'detection_rate': round(detected / total, 4),
+        'exact_match_rate': round(exact / total, 4),
+        'field_accuracy': {field: round(field_hits[field] / total, 4) for field in COMPARED_FIELDS},
+        'stages': dict(stages),
+    }
+
+
+def bench_images(extractor, timer, samples):
+    """Runs get_data on each (png_bytes, truth) sample."""
+    timer.reset()
+    records, latencies = [], []
+    start = time.perf_counter()
+    for i, (data, _) in enumerate(samples):
+        t0 = time.perf_counter()
+        records.append(extractor.get_data(data, source_name=f"synthetic_{i}.png"))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(samples) / elapsed, 3) if elapsed else None,
+        'latency': _latency_stats(latencies) if latencies else None,
+        'stages': timer.summary(),
+        'accuracy': score(records, [truth for _, truth in samples]),
+    }
+
+
+def bench_pdf(extractor, timer, pdf_bytes, truths):
+    """Runs process_pdf on one multi-page PDF."""
+    timer.reset()
+    start = time.perf_counter()
+    results = extractor.process_pdf(pdf_bytes, source_name="synthetic.pdf")
+    elapsed = time.perf_counter() - start
+    by_page = {r.get('page_number'): r for r in results}
+    records = [by_page.get(n) for n in range(1, len(truths) + 1)]
+    return {
+        'pages': len(truths),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(truths) / elapsed, 3) if elapsed else None,
+        'stages': timer.summary(),
+        'accuracy': score(records, truths),
+    }
+
+
+def quantization_delta(quantized, full):
+    """Accuracy and speed of the int8 run relative to the float32 run, per benchmark section."""
+    delta = {}
+    for section in ('images', 'pdf'):
+        new, old = quantized.get(section), full.get(section)
+        if not new or not old:
+            continue
+        delta[section] = {
+            'exact_match_rate': round(new['accuracy']['exact_match_rate'] - old['accuracy']['exact_match_rate'], 4),
+            'field_accuracy': {field: round(new['accuracy']['field_accuracy'][field]
+                                            - old['accuracy']['field_accuracy'][field], 4)
+                               for field in COMPARED_FIELDS},
+            'speedup': round(new['throughput_per_s'] / old['throughput_per_s'], 3)
+            if new['throughput_per_s'] and old['throughput_per_s'] else None,
+        }
+    return delta
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Returns a list of regressions of `report` against a `baseline` report."""
+    regressions = []
+    for section in ('images', 'pdf'):
+        new, old = report.get(section), baseline.get(section)
+        if not new or not old:
+            continue
+        if old.get('throughput_per_s') and new.get('throughput_per_s') is not None:
+            if new['throughput_per_s'] < old['throughput_per_s'] * (1 - tolerance):
+                regressions.append(f"{section}: throughput {old['throughput_per_s']} -> {new['throughput_per_s']} per s")
+        old_acc, new_acc = old['accuracy']['exact_match_rate'], new['accuracy']['exact_match_rate']
+        if new_acc < old_acc:
+            regressions.append(f"{section}: exact match rate {old_acc} -> {new_acc}")
+    return regressions
+
+
+def run(args, backends, quantized, samples, pdf):
+    """Benchmarks one extractor configuration; returns the model load time and the images/pdf sections."""
+    # No result cache: every run must do the full work
+    extractor = PassportExtractor(use_gpu=args.gpu, ocr_backends=backends, quantized=quantized)
+    if args.detect_lines:
+        for backend in (b for stage in extractor.ocr.values() for b in stage if isinstance(b, EasyOCRBackend)):
+            backend.split_lines = False
+    load_start = time.perf_counter()
+    timer = StageTimer()
+    timer.instrument(extractor)  # loads the OCR models
+    result = {'quantized': quantized, 'model_load_s': round(time.perf_counter() - load_start, 3)}
+    if samples:
+        logger.info(f"Benchmarking get_data on {len(samples)} images...")
+        result['images'] = bench_images(extractor, timer, samples)
+    if pdf:
+        logger.info(f"Benchmarking process_pdf on a {args.pdf_pages}-page PDF...")
+        result['pdf'] = bench_pdf(extractor, timer, *pdf)
+    extractor.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the passport extractor on synthetic data.")
+    parser.add_argument("--count", "-n", type=int, default=20, help="Number of synthetic passport images")
+    parser.add_argument("--pdf-pages", type=int, default=5, help="Pages in the synthetic PDF (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for reproducible data")
+    parser.add_argument("--noise", type=float, default=0.0, help="Gaussian noise std-dev (0-255)")
+    parser.add_argument("--blur", type=float, default=0.0, help="Gaussian blur radius in pixels")
+    parser.add_argument("--skew", type=float, default=0.0, help="Extra tilt in degrees")
+    parser.add_argument("--scale", type=float, default=1.0, help="Resolution relative to a 1240x874 page")
+    parser.add_argument("--rotations", type=int, nargs="+", default=[0], choices=[0, 90, 180, 270],
+                        help="Page rotations to sample from")
+    parser.add_argument("--gpu", action="store_true", help="Use GPU for OCR")
+    for stage, names in OCR_BACKENDS.items():
+        parser.add_argument(f"--{stage}-backend", nargs="+", default=names, choices=sorted(BACKENDS),
+                            help=f"OCR backend(s) for the {stage} stage, tried in order (default: {' '.join(names)})")
+    parser.add_argument("--quantized", action=argparse.BooleanOptionalAction, default=OCR_QUANTIZED,
+                        help="Run the EasyOCR recognizer with int8 weights (--no-quantized: float32)")
+    parser.add_argument("--compare-quantization", action="store_true",
+                        help="Also run with the other --quantized setting and report the int8 accuracy delta")
+    parser.add_argument("--detect-lines", action="store_true",
+                        help="Run EasyOCR's text detector on MRZ regions and bands instead of splitting their lines")
+    parser.add_argument("--output", "-o", help="Report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier report to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop vs. baseline")
+    args = parser.parse_args(argv)
+
+    degradation = dict(noise=args.noise, blur=args.blur, skew=args.skew, scale=args.scale)
+    logger.info("Generating synthetic data...")
+    samples = list(generate_samples(args.count, seed=args.seed, rotations=args.rotations, **degradation))
+    pdf = generate_pdf(args.pdf_pages, seed=args.seed + 1, rotations=args.rotations, **degradation) \
+        if args.pdf_pages else None
+
+    backends = {stage: getattr(args, f"{stage}_backend") for stage in OCR_BACKENDS}
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': _git_commit(),
+        'pipeline_version': CACHE_PIPELINE_VERSION,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count(), 'gpu': args.gpu},
+        'config': dict(vars(args), output=None, baseline=None),
+    }
+    report.update(run(args, backends, args.quantized, samples, pdf))
+    if args.compare_quantization:
+        logger.info(f"Benchmarking again with quantized={not args.quantized}...")
+        other = run(args, backends, not args.quantized, samples, pdf)
+        quantized, full = (report, other) if args.quantized else (other, report)
+        report['quantization'] = {
+            'other_run': other,
+            'int8_minus_float32': quantization_delta(quantized, full),
+        }
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {output}")
+
+    for section in ('images', 'pdf'):
+        if section in report:
+            r = report[section]
+            logger.info(f"{section}: {r['throughput_per_s']}/s, exact match {r['accuracy']['exact_match_rate']}, "
+                        f"stages {r['accuracy']['stages']}")
+    for section, delta in report.get('quantization', {}).get('int8_minus_float32', {}).items():
+        logger.info(f"{section}: int8 vs float32 exact match {delta['exact_match_rate']:+}, speedup {delta['speedup']}x")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
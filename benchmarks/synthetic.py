@@ -0,0 +1,164 @@
+import io
+import random
+import string as st
+from datetime import date, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from src.fonts import find_monospace_font
+from src.utils import mrz_check_digit, parse_date
+
+SURNAMES = ["ERIKSSON", "SMITH", "GARCIA", "MUELLER", "KHAN", "OKAFOR", "NGUYEN", "ROSSI", "DUBOIS", "TANAKA"]
+GIVEN_NAMES = ["ANNA", "MARIA", "JOHN", "AHMED", "FATIMA", "LUCAS", "CHLOE", "KENJI", "AMARA", "OMAR"]
+COUNTRIES = ["GBR", "USA", "DEU", "FRA", "PAK", "NGA", "VNM", "ITA", "JPN", "CAN"]
+
+# Page size of a TD3 data page (125 x 88 mm) at roughly 250 dpi
+PAGE_SIZE = (1240, 874)
+
+
+def _field(value, length):
+    return (value + "<" * length)[:length]
+
+
+def _yymmdd(d):
+    return d.strftime("%y%m%d")
+
+
+def random_identity(rng):
+    """Returns a random passport holder with MRZ-ready fields."""
+    today = date(2024, 1, 1)
+    birth = today - timedelta(days=rng.randint(18 * 365, 80 * 365))
+    expiry = today + timedelta(days=rng.randint(30, 10 * 365))
+    names = [rng.choice(GIVEN_NAMES)] + ([rng.choice(GIVEN_NAMES)] if rng.random() < 0.5 else [])
+    return {
+        'surname': rng.choice(SURNAMES),
+        'names': names,
+        'country': rng.choice(COUNTRIES),
+        'nationality': rng.choice(COUNTRIES),
+        'number': "".join(rng.choice(st.ascii_uppercase + st.digits) for _ in range(rng.randint(8, 9))),
+        'date_of_birth': _yymmdd(birth),
+        'sex': rng.choice("MF"),
+        'expiration_date': _yymmdd(expiry),
+        'personal_number': "".join(rng.choice(st.digits) for _ in range(rng.choice([0, 10, 14]))),
+    }
+
+
+def td3_lines(identity):
+    """Builds the two 44-character TD3 MRZ lines, with valid check digits, for an identity."""
+    name_field = identity['surname'] + "<<" + "<".join(identity['names'])
+    line1 = _field("P<" + identity['country'] + name_field, 44)
+
+    number = _field(identity['number'], 9)
+    personal = _field(identity['personal_number'], 14)
+    personal_check = mrz_check_digit(personal) if identity['personal_number'] else "<"
+    line2 = (number + mrz_check_digit(number) + identity['nationality']
+             + identity['date_of_birth'] + mrz_check_digit(identity['date_of_birth'])
+             + identity['sex']
+             + identity['expiration_date'] + mrz_check_digit(identity['expiration_date'])
+             + personal + personal_check)
+    composite = line2[0:10] + line2[13:20] + line2[21:43]
+    return line1, line2 + mrz_check_digit(composite)
+
+
+def ground_truth(identity):
+    """The fields PassportExtractor.get_data should return for an identity (as far as they are compared)."""
+    return {
+        'surname': identity['surname'],
+        'name': " ".join(identity['names']),
+        'sex': identity['sex'],
+        'date_of_birth': parse_date(identity['date_of_birth']),
+        'passport_number': identity['number'],
+        'expiration_date': parse_date(identity['expiration_date']),
+        'personal_number': identity['personal_number'],
+    }
+
+
+def render_page(identity, noise=0.0, blur=0.0, rotation=0, skew=0.0, scale=1.0, rng=None):
+    """
+    Renders a synthetic passport data page as a PIL RGB image.
+    `noise` is the std-dev of Gaussian pixel noise (0-255 scale), `blur` a Gaussian blur radius,
+    `rotation` a multiple of 90 degrees (counter-clockwise), `skew` a small extra tilt in degrees
+    and `scale` resizes the page relative to PAGE_SIZE.
+    """
+    rng = rng or random.Random(0)
+    width, height = PAGE_SIZE
+    page = Image.new("RGB", PAGE_SIZE, (236, 232, 222))
+    draw = ImageDraw.Draw(page)
+
+    # Photo placeholder and visual inspection zone
+    draw.rectangle([60, 130, 360, 520], fill=(190, 190, 195), outline=(90, 90, 90), width=3)
+    label_font = find_monospace_font(22)
+    value_font = find_monospace_font(30)
+    draw.text((60, 50), "PASSPORT / PASSEPORT", font=value_font, fill=(40, 40, 90))
+    fields = [
+        ("Surname", identity['surname']),
+        ("Given names", " ".join(identity['names'])),
+        ("Nationality", identity['nationality']),
+        ("Date of birth", identity['date_of_birth']),
+        ("Sex", identity['sex']),
+        ("Date of expiry", identity['expiration_date']),
+        ("Passport No.", identity['number']),
+    ]
+    for i, (label, value) in enumerate(fields):
+        y = 130 + i * 60
+        draw.text((400, y), label, font=label_font, fill=(90, 90, 120))
+        draw.text((400, y + 22), value, font=value_font, fill=(20, 20, 20))
+
+    # MRZ: two lines of 44 characters along the bottom edge
+    line1, line2 = td3_lines(identity)
+    mrz_font = find_monospace_font(40)
+    char_width = mrz_font.getlength("<")
+    left = max(10, int((width - 44 * char_width) / 2))
+    draw.text((left, height - 170), line1, font=mrz_font, fill=(0, 0, 0))
+    draw.text((left, height - 100), line2, font=mrz_font, fill=(0, 0, 0))
+
+    if skew:
+        page = page.rotate(skew, resample=Image.BICUBIC, expand=True, fillcolor=(255, 255, 255))
+    if rotation:
+        page = page.rotate(rotation, expand=True)
+    if scale != 1.0:
+        page = page.resize((max(1, int(page.width * scale)), max(1, int(page.height * scale))), Image.LANCZOS)
+    if blur:
+        page = page.filter(ImageFilter.GaussianBlur(blur))
+    if noise:
+        pixels = np.asarray(page, dtype=np.float32)
+        noisy = pixels + np.random.default_rng(rng.randint(0, 2 ** 32 - 1)).normal(0, noise, pixels.shape)
+        page = Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+    return page
+
+
+def encode_png(page):
+    buffer = io.BytesIO()
+    page.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def encode_pdf(pages):
+    """Writes PIL pages into one multi-page PDF and returns its bytes."""
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=200)
+    return buffer.getvalue()
+
+
+def generate_samples(count, seed=0, rotations=(0,), **degradation):
+    """
+    Yields (png_bytes, ground_truth) for `count` random passports.
+    `rotations` is the set of page rotations sampled from; `degradation` is passed to render_page.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        identity = random_identity(rng)
+        page = render_page(identity, rotation=rng.choice(rotations), rng=rng, **degradation)
+        yield encode_png(page), ground_truth(identity)
+
+
+def generate_pdf(page_count, seed=0, rotations=(0,), **degradation):
+    """Returns (pdf_bytes, [ground_truth per page]) for a multi-page PDF of random passports."""
+    rng = random.Random(seed)
+    pages, truths = [], []
+    for _ in range(page_count):
+        identity = random_identity(rng)
+        pages.append(render_page(identity, rotation=rng.choice(rotations), rng=rng, **degradation))
+        truths.append(ground_truth(identity))
+    return encode_pdf(pages), truths
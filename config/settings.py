@@ -6,11 +6,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Input/Output directories
 INPUT_DIR = os.path.join(BASE_DIR, 'data', 'input')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'data', 'output')
-TEMP_DIR = os.path.join(BASE_DIR, 'temp_processing')
-
-# Ensure directories exist
-os.makedirs(INPUT_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+MODEL_DIR = os.path.join(BASE_DIR, 'data', 'models')
+# Directories are created where they are written to, not at import time
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf'}
@@ -18,6 +15,92 @@ ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf'}
 # OCR Settings
 OCR_LANGUAGES = ['en']
 USE_GPU = False  # Set to True if you have CUDA installed
+# Run the EasyOCR recognizer with dynamic int8 quantization on the CPU (EasyOCR's own CPU default);
+# False runs it in float32. The quantized recognizer is cached in MODEL_DIR.
+OCR_QUANTIZED = True
+OCR_BATCH_SIZE = 16  # MRZ regions recognized per batched EasyOCR call (get_data_batch)
+
+# Result cache (SQLite, keyed by content hash + pipeline version)
+CACHE_PATH = os.path.join(BASE_DIR, 'data', 'cache', 'results.sqlite')
+CACHE_ENABLED = True        # Default for the CLI and web app; disable with --no-cache
+CACHE_MAX_ENTRIES = 100000  # Least recently used entries beyond this are evicted
+CACHE_MAX_AGE_DAYS = 30     # Entries older than this are evicted
+CACHE_PIPELINE_VERSION = 7  # Bump whenever extraction logic changes to invalidate old results
+
+# PDF rendering: pages rendered ahead of the one being OCR'd (bounds memory use)
+PDF_PREFETCH_PAGES = 1
+# Pages that are one embedded image (scans) are extracted as-is; others are rendered at this DPI
+PDF_RENDER_DPI = 200
+
+# Extraction service (main.py serve)
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_MAX_QUEUE = 64         # Requests waiting beyond this are rejected with 503
+SERVICE_MAX_BATCH = 16         # Requests processed together in one micro-batch
+SERVICE_BATCH_WAIT_MS = 20     # How long to wait for more requests to fill a micro-batch
+SERVICE_REQUEST_TIMEOUT = 120  # Seconds before a request gets 504
+SERVICE_MAX_BODY_MB = 50
+
+# OCR reader pool: each reader serves one thread at a time; more readers let threaded hosts
+# (the web app, the async API) run OCR concurrently, at the cost of one set of models each
+READER_POOL_SIZE = 1
+READER_TORCH_THREADS = None      # torch intra-op threads (process-wide); None: cores / pool size
+READER_CHECKOUT_TIMEOUT = None   # Seconds to wait for a free reader before TimeoutError
+
+# Async API (PassportExtractor.aget_data / aprocess_pdf / aiter_pdf_pages)
+ASYNC_MAX_WORKERS = 1  # Extractions run at once; their OCR calls share the reader pool
+ASYNC_TIMEOUT = None   # Default seconds before an async call raises asyncio.TimeoutError
+
+# Web app (app.py): uploads are extracted on this many background threads shared by all sessions
+APP_MAX_WORKERS = 2
+
+# Watch-folder mode (main.py watch)
+WATCH_SETTLE_SECONDS = 2.0  # A file is read once its size/mtime stayed unchanged this long
+WATCH_POLL_SECONDS = 0.5
+
+# Streaming export (main.py): records are flushed to disk this often
+EXPORT_FLUSH_EVERY = 50     # records
+EXPORT_FLUSH_SECONDS = 5.0  # seconds
+
+# Metrics: per-stage timings and counters (src/metrics.py)
+METRICS_RECORD_TIMINGS = False  # Add a `_timings` dict (seconds per stage) to every record
+METRICS_PROMETHEUS_PATH = None  # Prometheus text file written at the end of a CLI run (--metrics-file)
+METRICS_TRACE_PATH = None       # JSONL file with one line of stage timings per record (--trace)
+
+# Orientation detection: longest side (px) of the thumbnail used to guess page rotation
+ORIENTATION_MAX_SIDE = 400
+
+# Coarse-to-fine MRZ search: the MRZ band is located on a downscaled copy of the page and
+# only the band is cut out of the full-resolution image (longest sides / widths in px)
+MRZ_LOCATE_MAX_SIDE = 1200     # Copy PassportEye searches for the MRZ band
+MRZ_ROI_MAX_WIDTH = 1600       # MRZ band cut from the full-resolution image
+FALLBACK_DETECT_MAX_SIDE = 2560  # Copy the full-image EasyOCR fallback detects text lines on
+
+# Direct EasyOCR fallback: candidate MRZ bands found by morphology are read before the whole page
+MRZ_BAND_MAX_SIDE = 1000  # Longest side (px) of the copy bands are searched on
+MRZ_BAND_CANDIDATES = 3   # Bands read before falling back to full-page OCR
+
+# OCR backend(s) per stage of the MRZ cascade: 'easyocr', 'tesseract' or 'template' (MRZ regions
+# only). With several, a later backend only reads when the earlier ones' lines fail the MRZ
+# check digits.
+OCR_BACKENDS = {
+    'roi': ['easyocr'],   # PassportEye's MRZ region
+    'band': ['easyocr'],  # Candidate MRZ bands when PassportEye found no MRZ
+    'page': ['easyocr'],  # The whole page, as a last resort
+}
+# EasyOCR reads MRZ regions and bands that split into 2-3 text lines without its text detector
+OCR_SPLIT_LINES = True
+TESSERACT_MRZ_LANG = 'ocrb'  # Tesseract model for MRZ text (OCR-B); 'eng' is used if it is not installed
+# Template-matching MRZ reader ('template' backend): glyph templates are rendered from this
+# font, which should be the OCR-B that MRZs are printed in; None: the first monospace font found
+MRZ_TEMPLATE_FONT = None
+MRZ_TEMPLATE_MIN_CONFIDENCE = 0.75  # Reads with any character matching its template less are escalated
+
+# Multi-page PDFs: skip pages without an MRZ-like text band on a thumbnail before any OCR.
+# Off by default: a page the check misses is dropped from the output
+PDF_MRZ_PREFILTER = False
+MRZ_PRESENCE_MAX_SIDE = 1000  # Longest side (px) of the thumbnail the MRZ-presence test runs on
+PDF_STOP_AFTER_VALID = None   # Stop reading a PDF after this many records with valid check digits
 
 # Country Codes (ISO 3166-1 alpha-3)
 # This is a subset. In a real production app, consider loading this from a standard library or full JSON file.
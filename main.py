@@ -1,12 +1,36 @@
 import argparse
 import os
 import sys
+from itertools import groupby
 from tqdm import tqdm
 from src.extractor import PassportExtractor
-from src.formats import export_to_spreadsheet
+from src.batch import build_tasks, process_tasks_parallel
+from src.formats import (
+    RecordWriter,
+    RECORD_COLUMNS,
+    output_filename,
+    convert_to_excel,
+    truncate_output,
+    iter_written_records,
+)
+from src.manifest import JobManifest, manifest_path_for
 from src.validators import validate_passport_data
-from src.utils import setup_logger
-from config.settings import ALLOWED_EXTENSIONS
+from src.utils import setup_logger, td3_check_digits_valid
+from src.cache import ResultCache
+from src.metrics import registry as metrics, PrometheusFileSink, JsonlTraceSink
+from config.settings import (
+    ALLOWED_EXTENSIONS,
+    CACHE_ENABLED,
+    OCR_BATCH_SIZE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    WATCH_SETTLE_SECONDS,
+    METRICS_RECORD_TIMINGS,
+    METRICS_PROMETHEUS_PATH,
+    METRICS_TRACE_PATH,
+    PDF_MRZ_PREFILTER,
+    PDF_STOP_AFTER_VALID,
+)
 
 # Setup Logger
 logger = setup_logger()
@@ -15,14 +39,188 @@ def is_valid_file(filename):
     ext = os.path.splitext(filename)[1].lower()
     return ext in ALLOWED_EXTENSIONS
 
-def main():
-    parser = argparse.ArgumentParser(description="Passport OCR Tool - Extract data from passport images/PDFs.")
+def _is_pdf(file_path):
+    return os.path.splitext(file_path)[1].lower() == '.pdf'
+
+def _task_groups(tasks, batch_size):
+    """Splits tasks into runs of at most batch_size images and runs of tasks of one PDF."""
+    def key(task):
+        file_path, page_number = task
+        return file_path if _is_pdf(file_path) else None
+
+    for file_path, group in groupby(tasks, key):
+        group = list(group)
+        if file_path is None:
+            for start in range(0, len(group), batch_size):
+                yield 'images', group[start:start + batch_size]
+        else:
+            yield 'pdf', group
+
+def process_tasks(tasks, use_gpu=False, use_cache=False, batch_size=OCR_BATCH_SIZE,
+                  record_timings=METRICS_RECORD_TIMINGS, extractor_options=None, valid_pages=None):
+    """
+    Runs tasks (see build_tasks) sequentially in this process with a single extractor,
+    yielding (task, results, error) as soon as each task is done.
+    Consecutive images are grouped so their MRZ regions are recognized in one batched OCR call,
+    and the pages of a PDF are rendered and processed as one stream.
+    `extractor_options` are further PassportExtractor keyword arguments; `valid_pages` maps
+    PDFs to their pages with valid MRZs recorded by an earlier run (see --stop-after).
+    """
+    # Initialize Extractor
+    cache = ResultCache() if use_cache else None
+    extractor = PassportExtractor(use_gpu=use_gpu, cache=cache, record_timings=record_timings,
+                                  **(extractor_options or {}))
+    
+    # Process files
+    with tqdm(total=len(tasks), desc="Processing files") as progress:
+        for kind, group in _task_groups(tasks, batch_size):
+            if kind == 'images':
+                try:
+                    results = extractor.get_data_batch([file_path for file_path, _ in group])
+                    outcomes = [([result] if result else [], None) for result in results]
+                except Exception as e:
+                    logger.error(f"Failed to process {len(group)} images: {e}")
+                    outcomes = [([], str(e))] * len(group)
+                for task, (results, error) in zip(group, outcomes):
+                    progress.update(1)
+                    yield task, results, error
+                continue
+
+            file_path, first_page = group[0]
+            if first_page is None:
+                # Page count unknown: the PDF is a single task
+                try:
+                    results, error = list(extractor.iter_pdf(file_path)), None
+                except Exception as e:
+                    logger.error(f"Failed to process {file_path}: {e}")
+                    results, error = [], str(e)
+                progress.update(1)
+                yield group[0], results, error
+                continue
+
+            done = 0
+            try:
+                pages = extractor.iter_pdf_pages(file_path, page_numbers=[p for _, p in group], with_errors=True,
+                                                 already_valid=(valid_pages or {}).get(file_path, 0))
+                for page_number, result, error in pages:
+                    done += 1
+                    progress.update(1)
+                    yield (file_path, page_number), ([result] if result else []), error
+            except Exception as e:
+                logger.error(f"Failed to process {file_path}: {e}")
+                for task in group[done:]:
+                    progress.update(1)
+                    yield task, [], str(e)
+
+def process_files(files_to_process, use_gpu=False, use_cache=False, batch_size=OCR_BATCH_SIZE,
+                  record_timings=METRICS_RECORD_TIMINGS):
+    """
+    Processes files sequentially in this process with a single extractor, yielding
+    each record as soon as it is extracted (see process_tasks).
+    """
+    tasks = build_tasks(files_to_process)
+    for _, results, _ in process_tasks(tasks, use_gpu=use_gpu, use_cache=use_cache,
+                                       batch_size=batch_size, record_timings=record_timings):
+        yield from results
+
+def serve_command(argv):
+    """`main.py serve`: runs a long-lived extraction service with warm models."""
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="Run a local extraction service (POST /extract, GET /health).")
+    parser.add_argument('--host', default=SERVICE_HOST, help=f"Address to listen on (default: {SERVICE_HOST})")
+    parser.add_argument('--port', '-p', type=int, default=SERVICE_PORT, help=f"Port to listen on (default: {SERVICE_PORT})")
+    parser.add_argument('--socket', help="Listen on this Unix domain socket instead of TCP")
+    parser.add_argument('--gpu', action='store_true', help="Use GPU for OCR")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', default=CACHE_ENABLED,
+                        help="Do not read or write the result cache")
+    args = parser.parse_args(argv)
+
+    from src.service import serve
+
+    cache = ResultCache() if args.cache else None
+    serve(PassportExtractor(use_gpu=args.gpu, cache=cache), host=args.host, port=args.port, socket_path=args.socket)
+
+def watch_command(argv):
+    """`main.py watch`: extracts scans as they land in a folder, appending to a streaming output."""
+    parser = argparse.ArgumentParser(prog="main.py watch",
+                                     description="Watch a folder and extract new or modified scans as they arrive.")
+    parser.add_argument('--input', '-i', required=True, help="Folder to watch")
+    parser.add_argument('--output', '-o', default='passport_watch', help="Output filename (without extension)")
+    parser.add_argument('--format', '-f', choices=['csv', 'jsonl'], default='csv', help="Output format (csv or jsonl)")
+    parser.add_argument('--gpu', action='store_true', help="Use GPU for OCR")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', default=CACHE_ENABLED,
+                        help="Do not read or write the result cache")
+    parser.add_argument('--existing', action='store_true', help="Also process files already in the folder")
+    parser.add_argument('--no-recursive', dest='recursive', action='store_false', help="Do not watch subfolders")
+    parser.add_argument('--settle', type=float, default=WATCH_SETTLE_SECONDS,
+                        help=f"Seconds a file must stay unchanged before it is read (default: {WATCH_SETTLE_SECONDS})")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        parser.error(f"Not a folder: {args.input}")
+
+    from src.watcher import FolderWatcher
+
+    output_path = os.path.abspath(args.output if os.path.dirname(args.output)
+                                  else os.path.join('data', 'output', args.output))
+    output_file = output_filename(output_path, args.format)
+    cache = ResultCache() if args.cache else None
+    extractor = PassportExtractor(use_gpu=args.gpu, cache=cache)
+
+    # Appends, so a restarted watcher keeps adding to the same output; the manifest next
+    # to it remembers which files were written out, so a restart does not duplicate them
+    manifest = JobManifest(manifest_path_for(output_file))
+    with RecordWriter(output_file, args.format, append=True) as writer:
+        logger.info(f"Writing records to {output_file}")
+        watcher = FolderWatcher(extractor, args.input, writer, recursive=args.recursive, settle_seconds=args.settle,
+                                manifest=manifest)
+        watcher.start(process_existing=args.existing)
+        watcher.run_forever()
+    manifest.close()
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'serve':
+        serve_command(argv[1:])
+        return
+    if argv and argv[0] == 'watch':
+        watch_command(argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(description="Passport OCR Tool - Extract data from passport images/PDFs.",
+                                     epilog="Run 'main.py serve --help' for the long-running service mode "
+                                            "and 'main.py watch --help' to process scans as they arrive in a folder.")
     parser.add_argument('--input', '-i', required=True, help="Path to input file or directory")
     parser.add_argument('--output', '-o', default='passport_data', help="Output filename (without extension)")
-    parser.add_argument('--format', '-f', choices=['excel', 'csv'], default='excel', help="Output format (excel or csv)")
+    parser.add_argument('--format', '-f', choices=['excel', 'csv', 'jsonl'], default='excel',
+                        help="Output format (excel, csv or jsonl); csv and jsonl are written as records arrive")
     parser.add_argument('--gpu', action='store_true', help="Use GPU for OCR")
+    parser.add_argument('--workers', '-w', type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument('--batch-size', '-b', type=int, default=OCR_BATCH_SIZE,
+                        help=f"Images recognized per batched OCR call (default: {OCR_BATCH_SIZE})")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', default=CACHE_ENABLED,
+                        help="Do not read or write the result cache")
+    parser.add_argument('--timings', action='store_true', default=METRICS_RECORD_TIMINGS,
+                        help="Add a _timings column with the seconds spent in each stage")
+    parser.add_argument('--metrics-file', default=METRICS_PROMETHEUS_PATH,
+                        help="Write stage latency histograms and counters to this file (Prometheus text format)")
+    parser.add_argument('--trace', default=METRICS_TRACE_PATH,
+                        help="Append one JSON line of stage timings per record to this file")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run: skip inputs (and PDF pages) already in the output")
+    parser.add_argument('--prefilter', action=argparse.BooleanOptionalAction, default=PDF_MRZ_PREFILTER,
+                        help="Skip PDF pages without an MRZ-like band before any OCR")
+    parser.add_argument('--stop-after', type=int, default=PDF_STOP_AFTER_VALID, metavar='N',
+                        help="Stop reading a PDF after N records with valid MRZ check digits")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.stop_after is not None and args.stop_after < 1:
+        parser.error("--stop-after must be at least 1")
     
     input_path = os.path.abspath(args.input)
     output_path = os.path.abspath(os.path.join('data', 'output', args.output)) # Default to data/output if relative
@@ -54,45 +252,91 @@ def main():
 
     logger.info(f"Found {len(files_to_process)} files to process.")
 
-    # Initialize Extractor
-    extractor = PassportExtractor(use_gpu=args.gpu)
-    
-    extracted_results = []
-    
-    # Process files
-    for file_path in tqdm(files_to_process, desc="Processing files"):
-        ext = os.path.splitext(file_path)[1].lower()
-        
-        try:
-            if ext == '.pdf':
-                results = extractor.process_pdf(file_path)
-                extracted_results.extend(results)
-            else:
-                result = extractor.get_data(file_path)
-                if result:
-                    extracted_results.append(result)
-        except Exception as e:
-            logger.error(f"Failed to process {file_path}: {e}")
-
-    # Validate and Summarize
+    if args.metrics_file:
+        metrics.add_sink(PrometheusFileSink(args.metrics_file))
+    trace_sink = JsonlTraceSink(args.trace) if args.trace else None
+    if trace_sink:
+        metrics.add_sink(trace_sink)
+
+    # Records are streamed to disk as they arrive; Excel is converted from a CSV at the end
+    columns = RECORD_COLUMNS + (['_timings'] if args.timings else [])
+    final_path = output_filename(output_path, args.format)
+    stream_format = 'csv' if args.format == 'excel' else args.format
+    stream_path = output_filename(output_path, stream_format)
+
+    # The manifest next to the output checkpoints every finished file and PDF page
+    manifest = JobManifest(manifest_path_for(final_path))
+    resume_offset = manifest.committed_offset() if args.resume else 0
+    if resume_offset and not os.path.exists(stream_path):
+        logger.warning(f"No partial output at {stream_path} (the previous run finished); starting a new run.")
+        resume_offset = 0
+    if resume_offset:
+        # Drop records written after the last checkpoint; their tasks are redone
+        truncate_output(stream_path, resume_offset)
+    else:
+        manifest.reset()
+
+    extractor_options = {'mrz_prefilter': args.prefilter, 'pdf_stop_after': args.stop_after}
+    # Stopping early needs the pages of a PDF read in order by one worker
+    split_pdfs = args.workers == 1 or not args.stop_after
+    tasks = manifest.plan(build_tasks(files_to_process, split_pdfs=split_pdfs))
+
+    if args.workers > 1:
+        # Workers report their stage timings through the records' _timings
+        units = process_tasks_parallel(tasks, args.workers, use_gpu=args.gpu, use_cache=args.cache,
+                                       record_timings=args.timings or metrics.has_sinks,
+                                       extractor_options=extractor_options)
+    else:
+        # On resume, pages with valid MRZs from the interrupted run count towards --stop-after
+        valid_pages = {path: manifest.valid_pages(path) for path, page_number in tasks
+                       if args.stop_after and page_number is not None}
+        units = process_tasks(tasks, use_gpu=args.gpu, use_cache=args.cache, batch_size=args.batch_size,
+                              record_timings=args.timings, extractor_options=extractor_options,
+                              valid_pages=valid_pages)
+
+    # Documents processed in worker processes are counted here, from what the workers return
+    absorb = args.workers > 1 and metrics.has_sinks
     valid_count = 0
-    for res in extracted_results:
-        errors = validate_passport_data(res)
-        if not errors:
-            valid_count += 1
-        else:
-            res['validation_errors'] = "; ".join(errors)
-            # logger.warning(f"Validation issues for {res.get('source_file')}: {errors}")
+    with RecordWriter(stream_path, stream_format, columns, append=bool(resume_offset)) as writer:
+        for (file_path, page_number), results, error in units:
+            if absorb and not results:
+                metrics.absorb(None, outcome='error' if error else 'no_mrz', source_file=file_path)
+            for res in results:
+                if absorb:
+                    metrics.absorb(res)
+                    if not args.timings:
+                        res.pop('_timings', None)
+
+                # Validate
+                errors = validate_passport_data(res)
+                if not errors:
+                    valid_count += 1
+                else:
+                    res['validation_errors'] = "; ".join(errors)
+                writer.write(res)
 
-    logger.info(f"Processing complete. Extracted {len(extracted_results)} records ({valid_count} valid).")
+            # Checkpoint only once the task's records are on disk; failed pages are retried on resume
+            if error is None or page_number is None:
+                writer.flush()
+                # The second MRZ line (the last 44 characters) carries the check digits
+                valid = any(td3_check_digits_valid(res.get('mrz_full_string', '')[-44:]) for res in results)
+                manifest.complete(file_path, page_number, writer.offset, error, valid)
 
-    # Export
-    if extracted_results:
-        success = export_to_spreadsheet(extracted_results, output_path, format=args.format)
-        if success:
-            logger.info(f"Successfully saved data to {output_path}.{args.format if not output_path.endswith(args.format) else ''}")
+    logger.info(f"Processing complete. Extracted {writer.count} records ({valid_count} valid).")
+    manifest.close()
+
+    if next(iter_written_records(stream_path, stream_format), None) is not None:
+        if args.format == 'excel':
+            convert_to_excel(stream_path, final_path, columns=columns)
+            os.remove(stream_path)
+        logger.info(f"Successfully saved data to {final_path}")
     else:
+        os.remove(stream_path)
         logger.warning("No data extracted.")
 
+    metrics.flush()
+    if trace_sink:
+        trace_sink.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,117 @@
+import asyncio
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import hash_source
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_DONE = object()
+
+
+class AsyncRunner:
+    """
+    Runs blocking extractor calls for asyncio code on a bounded pool of `max_workers`
+    threads, so the event loop never blocks on OCR.
+
+    Calls made through `run_shared` with the same key while one is in flight share that
+    computation: each awaiter gets its own copy of the result, and the work is only
+    cancelled once every awaiter has given up (cancelled or timed out). Work that already
+    runs on a thread cannot be interrupted; multi-step work (the pages of a PDF) stops
+    between steps.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = {}  # (loop, key) -> [task, awaiter count]
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="passport-async")
+        return self._executor
+
+    async def run(self, func, *args):
+        """Runs func(*args) on the pool and returns its result."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def source_key(self, source, *parts):
+        """
+        Key identifying a source by content (hashed off the event loop), or None if it
+        cannot be hashed, in which case calls are not shared.
+        """
+        try:
+            digest = await asyncio.get_running_loop().run_in_executor(None, hash_source, source)
+        except (TypeError, OSError):
+            return None
+        return (digest,) + parts
+
+    async def run_shared(self, key, make_coro, timeout=None):
+        """
+        Awaits the coroutine make_coro() makes, or joins the one already in flight under `key`
+        (None: never shared). Raises asyncio.TimeoutError after `timeout` seconds.
+        """
+        if key is None:
+            return await asyncio.wait_for(make_coro(), timeout)
+
+        slot = (asyncio.get_running_loop(), key)
+        entry = self._in_flight.get(slot)
+        if entry is None:
+            task = asyncio.ensure_future(make_coro())
+            entry = self._in_flight[slot] = [task, 0]
+            task.add_done_callback(lambda _: self._in_flight.pop(slot, None)
+                                   if self._in_flight.get(slot) is entry else None)
+        else:
+            logger.debug("Joining in-flight extraction of an identical input.")
+        entry[1] += 1
+
+        task = entry[0]
+        try:
+            # shield: one awaiter giving up must not cancel the others' work
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+                self._in_flight.pop(slot, None)
+            raise
+        entry[1] -= 1
+        return copy.deepcopy(result)
+
+    async def iterate(self, make_iterator, timeout=None):
+        """
+        Async iterator over a blocking iterator, advanced one item at a time on the pool.
+        make_iterator() is also called on the pool. `timeout` bounds each item; the
+        blocking iterator is closed when iteration stops early.
+        """
+        iterator = await self.run(make_iterator)
+        step = None
+        try:
+            while True:
+                step = asyncio.get_running_loop().run_in_executor(self.executor, next, iterator, _DONE)
+                # shield: a step that is already running finishes before the iterator is closed
+                item = await asyncio.wait_for(asyncio.shield(step), timeout)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                # Closing a PDF page iterator stops its renderer thread, which may take a moment
+                if step is not None and not step.done():
+                    step.add_done_callback(lambda _: self.executor.submit(close))
+                else:
+                    self.executor.submit(close)
+
+    def shutdown(self, wait=True):
+        """Stops the worker threads (queued work that has not started is cancelled)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,204 @@
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from tqdm import tqdm
+
+from src.pdf_pages import count_pages
+from src.cache import hash_source
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Per-process extractor, built once by _init_worker
+_worker_extractor = None
+
+
+def _init_worker(use_gpu, threads_per_worker, use_cache, record_timings=False, extractor_options=None):
+    """
+    Process pool initializer: limits intra-op threads and loads one warm PassportExtractor.
+    `extractor_options` are further PassportExtractor keyword arguments.
+    """
+    global _worker_extractor
+
+    import cv2
+    import torch
+    from src.extractor import PassportExtractor
+    from src.cache import ResultCache
+
+    # Without this every worker would spawn one thread per core and oversubscribe the machine
+    torch.set_num_threads(threads_per_worker)
+    cv2.setNumThreads(threads_per_worker)
+
+    cache = ResultCache() if use_cache else None
+    _worker_extractor = PassportExtractor(use_gpu=use_gpu, cache=cache, record_timings=record_timings,
+                                          **(extractor_options or {}))
+
+
+def _run_task(task):
+    """
+    Runs one task inside a worker. A task is (file_path, page_number, pdf_digest);
+    page_number is None for images and for PDFs processed as a whole, and pdf_digest is
+    the PDF's content hash for page tasks when the result cache is on.
+    Returns (results, error) so a failing file never takes down the batch.
+    """
+    file_path, page_number, pdf_digest = task
+    try:
+        if page_number is not None:
+            return _worker_extractor.process_pdf_page(file_path, page_number, raise_errors=True,
+                                                      pdf_digest=pdf_digest), None
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            return _worker_extractor.process_pdf(file_path), None
+        result = _worker_extractor.get_data(file_path)
+        return ([result] if result else []), None
+    except Exception as e:
+        return [], str(e)
+
+
+def build_tasks(files, split_pdfs=True):
+    """
+    Expands a list of files into schedulable tasks, one per image and one per PDF page.
+    PDFs whose page count cannot be read, and all PDFs with split_pdfs=False (e.g. so one
+    worker can stop reading a PDF early), are scheduled as a single task.
+    """
+    tasks = []
+    for file_path in files:
+        if split_pdfs and os.path.splitext(file_path)[1].lower() == '.pdf':
+            page_count = count_pages(file_path)
+            if page_count:
+                tasks.extend((file_path, page) for page in range(1, page_count + 1))
+                continue
+        tasks.append((file_path, None))
+    return tasks
+
+
+def _with_digests(tasks):
+    """
+    Adds each PDF page task's PDF content hash, for the workers' cache keys: (file_path,
+    page_number, pdf_digest). Each PDF is hashed once here instead of once per page in the
+    workers; a PDF that cannot be read here gets None, and its workers hash it themselves.
+    """
+    current, digest = None, None
+    for file_path, page_number in tasks:
+        if page_number is None:
+            yield file_path, page_number, None
+            continue
+        if file_path != current:
+            current = file_path
+            try:
+                digest = hash_source(file_path)
+            except OSError as e:
+                logger.warning(f"Could not hash {file_path}: {e}")
+                digest = None
+        yield file_path, page_number, digest
+
+
+def _run_pool(tasks, workers, run_task, initializer=None, initargs=(), total=None):
+    """
+    Runs `run_task` on each task across a pool of spawned worker processes and yields
+    (task, results, error) in task order. `tasks` may be an iterator, with `total` its length.
+    A worker that dies (out of memory, a crash in native code) breaks the whole pool. The
+    pool is then rebuilt, and each task that was in flight is retried alone in a separate
+    one-worker pool, so only the task that actually kills a worker is reported, as a
+    "worker failure".
+    """
+    # Keep a bounded number of tasks in flight so results do not pile up in memory
+    window = workers * 4
+    # spawn avoids forking a parent that may already hold torch/OpenMP state
+    ctx = multiprocessing.get_context('spawn')
+
+    def new_pool(max_workers):
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                   initializer=initializer, initargs=initargs)
+
+    executor = new_pool(workers)
+    isolated = None
+    pending = deque()
+    task_iter = iter(tasks)
+
+    def restart(broken):
+        nonlocal executor
+        if broken is executor:
+            logger.warning("A worker process died; restarting the worker pool.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = new_pool(workers)
+
+    def submit_next():
+        task = next(task_iter, None)
+        if task is None:
+            return
+        try:
+            future = executor.submit(run_task, task)
+        except BrokenProcessPool:
+            restart(executor)
+            future = executor.submit(run_task, task)
+        future.add_done_callback(lambda _: progress.update(1))
+        pending.append((task, future, executor))
+
+    def retry_alone(task):
+        nonlocal isolated
+        if isolated is None:
+            isolated = new_pool(1)
+        try:
+            return isolated.submit(run_task, task).result()
+        except BrokenProcessPool as e:
+            isolated.shutdown(wait=False, cancel_futures=True)
+            isolated = None
+            return [], f"worker failure: {e}"
+
+    try:
+        with tqdm(total=len(tasks) if total is None else total, desc="Processing files") as progress:
+            for _ in range(window):
+                submit_next()
+
+            while pending:
+                task, future, pool = pending.popleft()
+                try:
+                    results, error = future.result()
+                except BrokenProcessPool:
+                    # Any task in flight may have killed the worker: find out by running it alone
+                    restart(pool)
+                    results, error = retry_alone(task)
+                except Exception as e:
+                    results, error = [], f"worker failure: {e}"
+                submit_next()
+                yield task, results, error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if isolated is not None:
+            isolated.shutdown(wait=False, cancel_futures=True)
+
+
+def process_tasks_parallel(tasks, workers, use_gpu=False, use_cache=False, record_timings=False,
+                           extractor_options=None):
+    """
+    Runs tasks (see build_tasks) across a pool of worker processes, each holding its own
+    PassportExtractor. Yields (task, results, error) in task order while a progress bar
+    tracks completed tasks across all workers.
+    With `record_timings`, results carry `_timings`, which is how stage metrics
+    from the workers reach this process (see MetricsRegistry.absorb).
+    `extractor_options` are further PassportExtractor keyword arguments for the workers.
+    """
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    logger.info(f"Scheduling {len(tasks)} tasks on {workers} workers ({threads_per_worker} threads each).")
+
+    initargs = (use_gpu, threads_per_worker, use_cache, record_timings, extractor_options)
+    work = _with_digests(tasks) if use_cache else ((file_path, page_number, None) for file_path, page_number in tasks)
+    for (file_path, page_number, _), results, error in _run_pool(work, workers, _run_task, _init_worker, initargs,
+                                                                  total=len(tasks)):
+        if error:
+            where = f" (page {page_number})" if page_number is not None else ""
+            logger.error(f"Failed to process {file_path}{where}: {error}")
+        yield (file_path, page_number), results, error
+
+
+def process_files_parallel(files, workers, use_gpu=False, use_cache=False, record_timings=False):
+    """
+    Processes files across a pool of worker processes (see process_tasks_parallel).
+    Yields result dictionaries in input order (files, then PDF pages in page order).
+    """
+    for _, results, _ in process_tasks_parallel(build_tasks(files), workers, use_gpu=use_gpu,
+                                                use_cache=use_cache, record_timings=record_timings):
+        yield from results
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from PIL import Image
+
+from src.utils import setup_logger
+from config.settings import CACHE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_AGE_DAYS, CACHE_PIPELINE_VERSION
+
+logger = setup_logger(__name__)
+
+# Run eviction after this many writes
+_EVICT_EVERY = 100
+
+
+def hash_source(source):
+    """
+    Returns a SHA-256 hex digest of an image/PDF source's content.
+    Files and encoded bytes are hashed as stored; arrays and PIL images by their pixels.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, np.ndarray):
+        digest.update(f"{source.shape}{source.dtype}".encode())
+        digest.update(np.ascontiguousarray(source).data)
+    elif isinstance(source, Image.Image):
+        digest.update(f"{source.size}{source.mode}".encode())
+        digest.update(source.tobytes())
+    else:
+        raise TypeError(f"Cannot hash source of type {type(source).__name__}")
+    return digest.hexdigest()
+
+
+def options_fingerprint(options):
+    """
+    Returns a short, stable digest of a JSON-serializable dictionary of the options that
+    change extraction results, for use as a cache key part.
+    """
+    encoded = json.dumps(options, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache of get_data results backed by SQLite.
+    Keys combine the content hash with the pipeline version, so results from an
+    older extraction pipeline are never served. Entries older than max_age_days
+    are dropped and the least recently used ones go once max_entries is exceeded.
+    Safe to share between threads, and between processes through SQLite's locking.
+    """
+    # Returned by get() on a miss, so a cached None ("no MRZ found") can be told apart
+    MISS = object()
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_age_days=CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, result TEXT, created REAL, last_used REAL)"
+            )
+        self.evict()
+
+    @staticmethod
+    def make_key(digest, *parts):
+        """
+        Builds a cache key from a content digest, extra qualifiers (e.g. page number and
+        an options_fingerprint) and the pipeline version.
+        """
+        return ":".join([digest] + [str(p) for p in parts] + [f"v{CACHE_PIPELINE_VERSION}"])
+
+    def get(self, key):
+        """Returns the cached result for key, or ResultCache.MISS."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return self.MISS
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """Stores a result dictionary (or None for 'no MRZ found') under key."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            self._writes += 1
+            evict_now = self._writes % _EVICT_EVERY == 0
+        if evict_now:
+            self.evict()
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones beyond max_entries."""
+        with self._lock, self._conn:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                self._conn.execute("DELETE FROM results WHERE created < ?", (cutoff,))
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        """Removes every cached result."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
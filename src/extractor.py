@@ -1,12 +1,8 @@
 import os
 import cv2
 import numpy as np
-import easyocr
 import warnings
 import ssl
-from passporteye import read_mrz
-from pdf2image import convert_from_path
-from PIL import Image
 import string as st
 
 # Fix for SSL certificate errors on Mac when downloading EasyOCR models
@@ -23,120 +19,277 @@ from src.utils import (
     parse_date, 
     get_country_name, 
     get_sex, 
+    td3_check_digits_valid,
     setup_logger
 )
 from src.fallback_mrz import FallbackMRZ
-from config.settings import USE_GPU, OCR_LANGUAGES, TEMP_DIR
+from src.images import load_image, downscale, describe_source
+from src.orientation import estimate_rotation_order, rotate_image, ROTATION_ANGLES
+from src.mrz_bands import find_mrz_bands, has_mrz_band
+from src.pdf_pages import render_page, count_pages, iter_pages
+from src.cache import ResultCache, hash_source, options_fingerprint
+from src.aio import AsyncRunner
+from src.reader_pool import ReaderPool
+from src.ocr_backends import create_backend
+from src.ocr_models import create_reader
+from src.metrics import registry as default_metrics, record_event
+from config.settings import (
+    USE_GPU, OCR_LANGUAGES, OCR_BATCH_SIZE, METRICS_RECORD_TIMINGS,
+    MRZ_LOCATE_MAX_SIDE, MRZ_ROI_MAX_WIDTH, MRZ_BAND_CANDIDATES,
+    PDF_MRZ_PREFILTER, PDF_STOP_AFTER_VALID, ASYNC_MAX_WORKERS, ASYNC_TIMEOUT,
+    READER_POOL_SIZE, READER_TORCH_THREADS, OCR_BACKENDS, OCR_QUANTIZED
+)
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
 logger = setup_logger(__name__)
 
+# Allowed characters for MRZ
+MRZ_ALLOWLIST = st.ascii_letters + st.digits + "< "
+# Size (width, height) the MRZ region is resized to before recognition
+ROI_SIZE = (1110, 140)
+
+
+def _pick_mrz_lines(texts):
+    """Picks the two MRZ lines out of EasyOCR's text lines; returns (line1, line2) or (None, None)."""
+    potential_lines = []
+    for line in texts:
+        clean = clean_mrz_line(line)
+        # Heuristic: MRZ lines are usually long (30-44 chars) and contain '<<' or start with P<, I<
+        if len(clean) > 30 and ('<<' in clean or clean.startswith(('P<', 'I<', 'A<', 'V<'))):
+            potential_lines.append(clean)
+
+    # Look for the last two valid lines (TD3 format usually has 2 lines at the bottom)
+    if len(potential_lines) < 2:
+        return None, None
+    # Assume the last two are the MRZ
+    line1 = potential_lines[-2]
+    line2 = potential_lines[-1]
+
+    # Basic validation: Line 1 usually starts with P, I, A, V
+    if not line1[0] in 'PIAV':
+        # Maybe we picked wrong lines. Let's look for a line starting with P/I/A/V
+        for i, l in enumerate(potential_lines):
+            if l.startswith(('P<', 'I<', 'A<', 'V<')) and i+1 < len(potential_lines):
+                line1 = l
+                line2 = potential_lines[i+1]
+                break
+    return line1, line2
+
+
 class PassportExtractor:
-    def __init__(self, use_gpu=USE_GPU, languages=None):
+    def __init__(self, use_gpu=USE_GPU, languages=None, cache=None, metrics=None,
+                 record_timings=METRICS_RECORD_TIMINGS, mrz_prefilter=PDF_MRZ_PREFILTER,
+                 pdf_stop_after=PDF_STOP_AFTER_VALID, async_workers=ASYNC_MAX_WORKERS,
+                 reader_pool_size=READER_POOL_SIZE, torch_threads=READER_TORCH_THREADS, ocr_backends=None,
+                 quantized=OCR_QUANTIZED):
+        """
+        `cache` is an optional ResultCache; when given, results are looked up by
+        content hash before running the pipeline and stored afterwards.
+        `metrics` is the MetricsRegistry stage timings and counters go to (default:
+        the process-wide one); with `record_timings`, each record also gets a
+        `_timings` dictionary of seconds spent per stage.
+        With `mrz_prefilter`, PDF pages without an MRZ-like text band on a thumbnail
+        are skipped before any OCR; with `pdf_stop_after` set to N, a PDF is only read
+        until N of its pages gave records with valid MRZ check digits.
+        The async methods (aget_data, aprocess_pdf, aiter_pdf_pages) run on up to
+        `async_workers` threads of their own.
+        OCR runs on a pool of `reader_pool_size` EasyOCR readers (see ReaderPool), so
+        threads sharing one extractor can OCR concurrently; `torch_threads` sets torch's
+        process-wide intra-op thread count (default: the cores split between the readers).
+        `ocr_backends` maps pipeline stages ('roi', 'band', 'page') to the names of the OCR
+        backends that read them, in order, overriding OCR_BACKENDS (see src/ocr_backends.py).
+        With `quantized`, the EasyOCR recognizer runs with int8 weights on the CPU (cached
+        under MODEL_DIR, see src/ocr_models.py); otherwise it runs in float32.
+        The EasyOCR models are loaded on first use (see `reader`), so constructing
+        an extractor is cheap and cache-only runs never load them.
+        """
         self.languages = languages if languages else OCR_LANGUAGES
-        
-        # Set model storage directory to project/data/models to avoid permission issues
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        model_dir = os.path.join(base_dir, 'data', 'models')
-        os.makedirs(model_dir, exist_ok=True)
-        
-        logger.info(f"Initializing EasyOCR Reader (GPU={use_gpu})...")
-        self.reader = easyocr.Reader(self.languages, gpu=use_gpu, model_storage_directory=model_dir)
+        self.use_gpu = use_gpu
+        self.quantized = quantized
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else default_metrics
+        self.record_timings = record_timings
+        self.mrz_prefilter = mrz_prefilter
+        self.pdf_stop_after = pdf_stop_after
+        self._async = AsyncRunner(async_workers)
+        self.readers = ReaderPool(self._new_reader, reader_pool_size, torch_threads)
+        # OCR backends by stage; stages naming the same backend share one instance
+        backends = {}
+        self.ocr = {}
+        for stage, names in dict(OCR_BACKENDS, **(ocr_backends or {})).items():
+            for name in names:
+                if name not in backends:
+                    backends[name] = create_backend(name, self.readers)
+            self.ocr[stage] = [backends[name] for name in names]
+        # Everything above that changes the results goes into every cache key
+        self._options_key = options_fingerprint({
+            'mrz_prefilter': self.mrz_prefilter,
+            # create_reader ignores `quantized` on the GPU
+            'quantized': self.quantized and not self.use_gpu,
+            'ocr': {stage: [[backend.name, backend.options()] for backend in stage_backends]
+                    for stage, stage_backends in self.ocr.items()},
+        })
+
+    def _new_reader(self):
+        logger.info(f"Initializing EasyOCR Reader (GPU={self.use_gpu}, quantized={self.quantized})...")
+        reader = create_reader(self.languages, self.use_gpu, self.quantized)
         logger.info("EasyOCR Reader initialized.")
+        return reader
 
-    def _retry_with_rotation(self, img_path):
-        """Try rotating image 90, 180, 270 degrees to find MRZ."""
-        try:
-            original = Image.open(img_path)
-            
-            for angle in [90, 180, 270]:
-                logger.info(f"Retrying with rotation: {angle} degrees")
-                # expand=True ensures the whole image is kept
-                rotated = original.rotate(angle, expand=True)
-                
-                # Save to a temp file
-                temp_rot_path = img_path + f"_rot_{angle}.png"
-                rotated.save(temp_rot_path)
-                
-                mrz = read_mrz(temp_rot_path, save_roi=True)
-                
-                # Cleanup
-                if os.path.exists(temp_rot_path):
-                    os.remove(temp_rot_path)
-                
-                if mrz:
-                    logger.info(f"MRZ detected after rotation {angle}")
-                    return mrz
-                    
-            return None
-        except Exception as e:
-            logger.error(f"Rotation fallback failed: {e}")
-            return None
+    @property
+    def reader(self):
+        """
+        The first EasyOCR Reader of the pool, created on first access. It is not checked
+        out, so only use it directly from a single thread; the pipeline checks readers
+        out of `readers` for each OCR call.
+        """
+        return self.readers.primary
 
-    def _fallback_direct_easyocr(self, img_path):
+    def _read_mrz(self, img, small=None):
         """
-        Fallback method: Read the entire image with EasyOCR and try to find MRZ lines.
+        Runs PassportEye's MRZ pipeline on an in-memory RGB image.
+        Equivalent to passporteye.read_mrz(path, save_roi=True) without touching the disk,
+        except that the MRZ is searched for on `small`, a copy of img downscaled to
+        MRZ_LOCATE_MAX_SIDE (made here if not given), and only the MRZ band is read
+        from the full-resolution image.
         """
-        try:
-            # Read full image
-            # detail=0 returns just the list of strings
-            result = self.reader.readtext(img_path, detail=0)
-            
-            # Filter and clean lines
-            potential_lines = []
-            for line in result:
-                clean = clean_mrz_line(line)
-                # Heuristic: MRZ lines are usually long (30-44 chars) and contain '<<' or start with P<, I<
-                if len(clean) > 30 and ('<<' in clean or clean.startswith(('P<', 'I<', 'A<', 'V<'))):
-                    potential_lines.append(clean)
-            
-            # Look for the last two valid lines (TD3 format usually has 2 lines at the bottom)
-            if len(potential_lines) >= 2:
-                # Assume the last two are the MRZ
-                line1 = potential_lines[-2]
-                line2 = potential_lines[-1]
-                
-                # Basic validation: Line 1 usually starts with P, I, A, V
-                if not line1[0] in 'PIAV':
-                     # Maybe we picked wrong lines. Let's look for a line starting with P/I/A/V
-                     for i, l in enumerate(potential_lines):
-                         if l.startswith(('P<', 'I<', 'A<', 'V<')) and i+1 < len(potential_lines):
-                             line1 = l
-                             line2 = potential_lines[i+1]
-                             break
-                
-                logger.info(f"Direct EasyOCR found potential MRZ: {line1} / {line2}")
+        # passporteye pulls in skimage and its tesseract wrapper
+        from src.mrz_locate import mrz_pipeline
+
+        with self.metrics.stage('read_mrz'):
+            pipeline = mrz_pipeline(img, MRZ_LOCATE_MAX_SIDE, MRZ_ROI_MAX_WIDTH, small=small)
+            mrz = pipeline.result
+        if mrz is not None:
+            mrz.aux['roi'] = pipeline['roi']
+        return mrz
+
+    def _retry_with_rotation(self, img, angles, small=None):
+        """
+        Try the given rotations in order (most likely first) to find MRZ.
+        `small` is the downscaled copy of img used to locate the MRZ (see _read_mrz).
+        """
+        if small is None:
+            small, _ = downscale(img, MRZ_LOCATE_MAX_SIDE)
+        for angle in angles:
+            logger.info(f"Retrying with rotation: {angle} degrees")
+            with self.metrics.stage('rotation_attempt'):
+                mrz = self._read_mrz(rotate_image(img, angle), rotate_image(small, angle))
+
+            if mrz:
+                logger.info(f"MRZ detected after rotation {angle}")
+                mrz.aux['rotation_angle'] = angle
+                return mrz
+
+        return None
+
+    def _fallback_direct_easyocr(self, img):
+        """
+        Fallback method: find the MRZ lines with OCR alone, without PassportEye.
+        Candidate MRZ bands (dense, long text lines near the bottom of the document, in any
+        90-degree orientation; see find_mrz_bands) are read first with the MRZ allowlist,
+        and a band whose lines pass the check digits is taken right away. The whole page is
+        only read as a last resort, when no band gave two MRZ-like lines.
+        Each read goes through the stage's OCR backends in turn (OCR_BACKENDS 'band' and 'page').
+        Returns (line1, line2, mrz_object); aux['rotation_angle'] is relative to `img`.
+        A failing backend raises, so the document fails instead of being cached as "no MRZ".
+        """
+        with self.metrics.stage('full_image_fallback'):
+            with self.metrics.stage('mrz_bands'):
+                bands = find_mrz_bands(img, limit=MRZ_BAND_CANDIDATES)
+            candidate = None
+            for angle, (x0, y0, x1, y1) in bands:
+                band, _ = downscale(rotate_image(img, angle)[y0:y1, x0:x1], MRZ_ROI_MAX_WIDTH)
+                for backend in self.ocr['band']:
+                    with self.metrics.stage(f'{backend.name}_band'):
+                        result = backend.read_lines(band, allowlist=MRZ_ALLOWLIST)
+                    line1, line2 = _pick_mrz_lines(result)
+                    if line1 is None:
+                        continue
+                    mrz_obj = FallbackMRZ(line1, line2)
+                    mrz_obj.aux.update(rotation_angle=angle, stage=f'{backend.name}_band')
+                    if mrz_obj.valid:
+                        logger.info(f"MRZ band at rotation {angle} read: {line1} / {line2}")
+                        return line1, line2, mrz_obj
+                    candidate = candidate or (line1, line2, mrz_obj)
+            if candidate:
+                logger.info(f"MRZ band found potential MRZ: {candidate[0]} / {candidate[1]}")
+                return candidate
+
+            # Last resort: read the entire page
+            logger.info("No MRZ band found; reading the full image...")
+            for backend in self.ocr['page']:
+                with self.metrics.stage(f'{backend.name}_page'):
+                    result = backend.read_page(img)
+                line1, line2 = _pick_mrz_lines(result)
+                if line1 is None:
+                    continue
+                logger.info(f"Direct {backend.name} read found potential MRZ: {line1} / {line2}")
                 mrz_obj = FallbackMRZ(line1, line2)
-                return line1, line2, mrz_obj
-            
-            return None, None, None
+                mrz_obj.aux.update(rotation_angle=0, stage=f'{backend.name}_full')
+                if mrz_obj.valid:
+                    return line1, line2, mrz_obj
+                candidate = candidate or (line1, line2, mrz_obj)
+        return candidate or (None, None, None)
+
+    def _locate_mrz(self, img, name):
+        """
+        Finds the MRZ with PassportEye, trying the predicted orientation first.
+        Returns (mrz_object, None) when PassportEye found it, otherwise
+        (None, fallback) where fallback is the (line1, line2, mrz_object) of the
+        direct EasyOCR fallback. Exceptions propagate to the caller.
+        """
+        # Everything up to reading the MRZ band works on a downscaled copy
+        small, _ = downscale(img, MRZ_LOCATE_MAX_SIDE)
 
+        # Guess the orientation on a thumbnail so the likeliest rotation is tried first
+        try:
+            angles = estimate_rotation_order(small)
         except Exception as e:
-            logger.error(f"Direct EasyOCR fallback failed: {e}")
-            return None, None, None
+            logger.warning(f"Orientation estimate failed for {name}: {e}")
+            angles = list(ROTATION_ANGLES)
+        predicted = angles[0]
+
+        # Analyze image with PassportEye
+        mrz = self._read_mrz(rotate_image(img, predicted), rotate_image(small, predicted))
+        if mrz:
+            mrz.aux['rotation_angle'] = predicted
+        
+        if not mrz:
+            logger.warning(f"PassportEye failed to detect MRZ in {name} at predicted rotation {predicted}. Trying other rotations...")
+            mrz = self._retry_with_rotation(img, angles[1:], small)
+        
+        if not mrz:
+            logger.warning(f"PassportEye failed to detect MRZ in {name} after rotations.")
+            # Fallback 2: Direct EasyOCR on candidate MRZ bands, then the full image
+            logger.info("Attempting Direct EasyOCR fallback...")
+            line1, line2, mrz = self._fallback_direct_easyocr(rotate_image(img, predicted))
+            if mrz:
+                mrz.aux['rotation_angle'] = (predicted + mrz.aux['rotation_angle']) % 360
+            return None, (line1, line2, mrz)
 
-    def extract_mrz_from_roi(self, img_path):
+        logger.info(f"MRZ found at rotation {mrz.aux['rotation_angle']} (predicted {predicted}) for {name}")
+        return mrz, None
+
+    def _passporteye_lines(self, mrz):
         """
-        Extracts MRZ lines using PassportEye to find ROI, then EasyOCR to read text.
-        Returns (line1, line2, mrz_object).
+        Returns PassportEye's own (line1, line2) if its TD3 parse passes every check digit,
+        otherwise None. Such a read needs no second opinion from EasyOCR.
         """
-        try:
-            # Analyze image with PassportEye
-            mrz = read_mrz(img_path, save_roi=True)
-            
-            if not mrz:
-                logger.warning(f"PassportEye failed to detect MRZ in {img_path}. Trying rotations...")
-                # Try rotating 90, 180, 270
-                mrz = self._retry_with_rotation(img_path)
-            
-            if not mrz:
-                logger.warning(f"PassportEye failed to detect MRZ in {img_path} after rotations.")
-                # Fallback 2: Direct EasyOCR on the full image
-                logger.info("Attempting Direct EasyOCR fallback on full image...")
-                return self._fallback_direct_easyocr(img_path)
+        if mrz.mrz_type != 'TD3' or not mrz.valid_check_digits or not all(mrz.valid_check_digits):
+            return None
+        # aux['text'] is the deprecated name of 'raw_text', kept for older PassportEye versions
+        raw_text = mrz.aux.get('raw_text', mrz.aux.get('text', ''))
+        lines = [line for line in raw_text.split('\n') if line.strip()]
+        if len(lines) < 2:
+            return None
+        mrz.aux['stage'] = 'passporteye'
+        return clean_mrz_line(lines[0]), clean_mrz_line(lines[1])
 
+    def _normalize_roi(self, mrz):
+        """Returns PassportEye's MRZ region as a uint8 image of ROI_SIZE, ready for OCR."""
+        with self.metrics.stage('normalize_roi'):
             # Get ROI (Region of Interest)
             roi = mrz.aux['roi']
             
@@ -147,57 +300,104 @@ class PassportExtractor:
                 else:
                     roi = roi.astype(np.uint8)
 
-            # Preprocess ROI for EasyOCR
-            # Original code: saved to tmp.png (gray), read back, resized to (1110, 140)
-            # We will try to do this in memory using OpenCV
-            
-            # roi is likely a numpy array (H, W) or (H, W, C). PassportEye usually returns grayscale for ROI?
-            # Let's normalize to BGR for OpenCV consistency if needed, or keep grayscale.
-            
             # Resize to improve OCR accuracy as per original code logic
             # Note: (1110, 140) is the target size (Width, Height)
-            img_resized = cv2.resize(roi, (1110, 140))
-            
-            # Define allowed characters for MRZ
-            allow = st.ascii_letters + st.digits + "< "
-            
-            # Run EasyOCR
-            code = self.reader.readtext(img_resized, detail=0, allowlist=allow)
+            return cv2.resize(roi, ROI_SIZE)
 
-            if len(code) < 2:
-                logger.warning(f"EasyOCR found fewer than 2 lines in ROI for {img_path}")
-                return None, None, mrz
+    def _parse_roi_text(self, code, mrz, name):
+        """Turns the OCR'd lines of an MRZ region into (line1, line2, mrz_object)."""
+        if len(code) < 2:
+            logger.warning(f"OCR found fewer than 2 lines in ROI for {name}")
+            return None, None, mrz
 
-            line1 = clean_mrz_line(code[0])
-            line2 = clean_mrz_line(code[1])
+        line1 = clean_mrz_line(code[0])
+        line2 = clean_mrz_line(code[1])
 
-            # Correct sex at index 20 of line 2 if available from mrz object
-            # MRZ object might have parsed it correctly even if EasyOCR missed it
-            if mrz.sex and len(line2) > 20:
-                l2_list = list(line2)
-                l2_list[20] = mrz.sex
-                line2 = "".join(l2_list)
+        # Correct sex at index 20 of line 2 if available from mrz object
+        # MRZ object might have parsed it correctly even if EasyOCR missed it
+        if mrz.sex and len(line2) > 20:
+            l2_list = list(line2)
+            l2_list[20] = mrz.sex
+            line2 = "".join(l2_list)
 
-            return line1, line2, mrz
+        return line1, line2, mrz
 
-        except Exception as e:
-            logger.error(f"Error in extract_mrz_from_roi: {e}")
-            return None, None, None
+    def _read_roi(self, roi, mrz, name, first_read=None):
+        """
+        Reads a normalized MRZ region with the 'roi' OCR backends in turn, until one's lines
+        pass the check digits. `first_read` is the first backend's text if it was already
+        read (in a batch). Returns (line1, line2, mrz_object) of the last backend that read;
+        aux['stage'] names it.
+        """
+        for i, backend in enumerate(self.ocr['roi']):
+            if i == 0 and first_read is not None:
+                code = first_read
+            else:
+                with self.metrics.stage(f'{backend.name}_roi'):
+                    code = backend.read_lines(roi, allowlist=MRZ_ALLOWLIST)
+            lines = self._parse_roi_text(code, mrz, name)
+            mrz.aux['stage'] = f'{backend.name}_roi'
+            if td3_check_digits_valid(lines[1]):
+                break
+        return lines
 
-    def get_data(self, img_path):
+    def _verify_roi_lines(self, img, lines, name):
         """
-        Extracts full passport data from an image file.
-        Returns a dictionary of extracted fields.
+        Check-digit gate after OCR read the MRZ region. Lines that pass are parsed as
+        they were read; otherwise the direct OCR fallback gets a try, and if that
+        does not pass either, the region read is kept (with PassportEye's fields) as before.
+        Returns (line1, line2, mrz_object).
         """
-        if not os.path.exists(img_path):
-            logger.error(f"File not found: {img_path}")
-            return None
+        line1, line2, mrz = lines
+        if td3_check_digits_valid(line2):
+            checked = FallbackMRZ(line1, line2)
+            checked.aux = mrz.aux
+            return line1, line2, checked
 
-        line1, line2, mrz = self.extract_mrz_from_roi(img_path)
+        logger.info(f"MRZ check digits failed for {name}; trying Direct OCR...")
+        angle = mrz.aux.get('rotation_angle') or 0
+        full1, full2, full_mrz = self._fallback_direct_easyocr(rotate_image(img, angle))
+        if full_mrz is not None and full_mrz.valid:
+            full_mrz.aux = dict(mrz.aux, stage=full_mrz.aux['stage'],
+                                rotation_angle=(angle + full_mrz.aux['rotation_angle']) % 360)
+            return full1, full2, full_mrz
+        return line1, line2, mrz
 
+    def _extract_mrz(self, img, name):
+        """
+        Runs the MRZ pipeline on a decoded RGB image. Exceptions propagate to the caller.
+        Each stage only runs when the previous one did not pass the MRZ check digits:
+        PassportEye, then OCR on the MRZ region, then OCR on candidate MRZ bands and finally
+        on the full image, each with its OCR backends (see OCR_BACKENDS).
+        Returns (line1, line2, mrz_object); mrz_object.aux['stage'] names the stage used.
+        """
+        mrz, fallback = self._locate_mrz(img, name)
         if mrz is None:
-            return None
+            return fallback
+
+        lines = self._passporteye_lines(mrz)
+        if lines:
+            return lines[0], lines[1], mrz
+
+        img_resized = self._normalize_roi(mrz)
+        return self._verify_roi_lines(img, self._read_roi(img_resized, mrz, name), name)
+
+    def extract_mrz_from_roi(self, source, source_name=None):
+        """
+        Extracts MRZ lines using PassportEye to find ROI, then EasyOCR to read text
+        when PassportEye's own reading fails the check digits.
+        `source` may be a file path, encoded image bytes, a PIL image or a numpy array.
+        Returns (line1, line2, mrz_object).
+        """
+        name = describe_source(source, source_name) or "in-memory image"
+        try:
+            return self._extract_mrz(load_image(source), name)
+        except Exception as e:
+            logger.error(f"Error in extract_mrz_from_roi: {e}")
+            return None, None, None
 
+    def _build_record(self, line1, line2, mrz):
+        """Builds the output dictionary from the OCR'd MRZ lines and the parsed MRZ object."""
         data = {}
         # Use PassportEye's parsing where possible, fallback/clean as needed
         data['surname'] = mrz.surname.replace("<<", " ").strip().upper() if mrz.surname else ""
@@ -215,61 +415,362 @@ class PassportExtractor:
         # Prefer the OCR'd lines if they exist, otherwise fallback?
         # The original code returned (line1 or "") + (line2 or "")
         data['mrz_full_string'] = (line1 or "") + (line2 or "")
-        data['source_file'] = os.path.basename(img_path)
+        data['rotation_angle'] = mrz.aux.get('rotation_angle')
+        data['mrz_stage'] = mrz.aux.get('stage', '')
+        self.metrics.count_record(data)
+        return data
+
+    def _extract_record(self, source, name):
+        """Runs the full pipeline on one image source; returns a data dictionary or None."""
+        with self.metrics.stage('load_image'):
+            img = load_image(source)
+        line1, line2, mrz = self._extract_mrz(img, name or "in-memory image")
+        if mrz is None:
+            return None
+        return self._build_record(line1, line2, mrz)
+
+    def _cached(self, key, compute):
+        """
+        Returns compute() through the result cache when one is configured.
+        'No MRZ found' (None) is cached too; failures (exceptions) are not.
+        """
+        if self.cache is None:
+            return compute()
+        result = self.cache.get(key)
+        if result is not ResultCache.MISS:
+            self.metrics.inc('cache', result='hit')
+            return result
+        self.metrics.inc('cache', result='miss')
+        result = compute()
+        self.cache.put(key, result)
+        return result
+
+    def _cache_key(self, digest, *parts):
+        return ResultCache.make_key(digest, *parts, "+".join(self.languages), self._options_key)
+
+    def _page_key(self, pdf_digest, page_number):
+        return self._cache_key(pdf_digest, f"page{page_number}")
 
+    def _finish_record(self, data, timings, source_file, outcome):
+        """Counts the outcome, reports the record to the metrics sinks and attaches `_timings` if enabled."""
+        self.metrics.inc('documents', outcome=outcome)
+        if self.metrics.has_sinks:
+            self.metrics.emit(record_event(data, timings, source_file=source_file, outcome=outcome))
+        if data is not None and self.record_timings:
+            data['_timings'] = {stage: round(seconds, 6) for stage, seconds in timings.items()}
+
+    def get_data(self, source, source_name=None):
+        """
+        Extracts full passport data from an image.
+        `source` may be a file path, encoded image bytes, a PIL image or a numpy array;
+        `source_name` overrides the reported 'source_file' for in-memory inputs.
+        Returns a dictionary of extracted fields.
+        """
+        if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+            logger.error(f"File not found: {source}")
+            return None
+
+        name = describe_source(source, source_name)
+        with self.metrics.trace() as timings:
+            try:
+                with self.metrics.stage('document'):
+                    key = self._cache_key(hash_source(source)) if self.cache is not None else None
+                    data = self._cached(key, lambda: self._extract_record(source, name))
+            except Exception as e:
+                logger.error(f"Error in extract_mrz_from_roi: {e}")
+                self._finish_record(None, timings, name, 'error')
+                return None
+
+        if data is None:
+            self._finish_record(None, timings, name, 'no_mrz')
+            return None
+        data['source_file'] = name
+        self._finish_record(data, timings, name, 'ok')
         return data
 
-    def process_pdf(self, pdf_path):
+    def get_data_batch(self, sources, source_names=None):
         """
-        Converts PDF pages to images and extracts data from each.
-        Returns a list of data dictionaries.
+        Extracts passport data from several images at once.
+        The MRZ region of each document is located individually; documents whose
+        PassportEye read passes the check digits are done at that point, and the remaining
+        regions are recognized together in batched OCR calls (OCR_BATCH_SIZE regions
+        per call) instead of one call per document.
+        With EasyOCR on the CPU, only the regions that split into text lines are recognized
+        as one batch (see EasyOCRBackend); regions that need the text detector are still
+        recognized box by box, so for those batching only saves the per-call overhead.
+        Returns a list aligned with `sources`, with None where nothing was extracted.
         """
-        extracted_data = []
-        
-        # Ensure temp dir exists
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        
-        logger.info(f"Processing PDF: {pdf_path}")
-        try:
-            pages = convert_from_path(pdf_path)
-        except Exception as e:
+        source_names = source_names or [None] * len(sources)
+        names = [describe_source(source, name) for source, name in zip(sources, source_names)]
+        keys = [None] * len(sources)
+        results = [None] * len(sources)
+        failed = set()
+        timings = [{} for _ in sources]
+        located = []  # (index, image, mrz) waiting for batched recognition
+
+        def finish(i, lines):
+            line1, line2, mrz = lines
+            record = self._build_record(line1, line2, mrz) if mrz is not None else None
+            if self.cache is not None:
+                self.cache.put(keys[i], record)
+            results[i] = record
+
+        for i, source in enumerate(sources):
+            if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+                logger.error(f"File not found: {source}")
+                failed.add(i)
+                continue
+            with self.metrics.trace(timings[i]):
+                try:
+                    if self.cache is not None:
+                        keys[i] = self._cache_key(hash_source(source))
+                        cached = self.cache.get(keys[i])
+                        if cached is not ResultCache.MISS:
+                            self.metrics.inc('cache', result='hit')
+                            results[i] = cached
+                            continue
+                        self.metrics.inc('cache', result='miss')
+                    with self.metrics.stage('load_image'):
+                        img = load_image(source)
+                    mrz, fallback = self._locate_mrz(img, names[i] or "in-memory image")
+                except Exception as e:
+                    logger.error(f"Error in extract_mrz_from_roi: {e}")
+                    failed.add(i)
+                    continue
+                if mrz is None:
+                    finish(i, fallback)
+                    continue
+                lines = self._passporteye_lines(mrz)
+                if lines:
+                    finish(i, (lines[0], lines[1], mrz))
+                else:
+                    located.append((i, img, mrz))
+
+        for start in range(0, len(located), OCR_BATCH_SIZE):
+            chunk = located[start:start + OCR_BATCH_SIZE]
+            rois = []
+            for i, _, mrz in chunk:
+                with self.metrics.trace(timings[i]):
+                    rois.append(self._normalize_roi(mrz))
+            backend = self.ocr['roi'][0]
             try:
-                import fitz
-                doc = fitz.open(pdf_path)
-                pages = []
-                for i in range(len(doc)):
-                    page = doc.load_page(i)
-                    pix = page.get_pixmap(dpi=200)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    pages.append(img)
-                doc.close()
-            except Exception as e2:
-                logger.error(f"Failed to convert PDF {pdf_path}: {e2}")
-                return []
-
-        for i, page in enumerate(pages):
-            temp_img_path = os.path.join(TEMP_DIR, f"temp_page_{i+1}.png")
-            page.save(temp_img_path, "PNG")
-            
-            logger.info(f"Processing page {i+1}...")
-            result = self.get_data(temp_img_path)
-            
-            # Special MRZ fix for PDF from original code
-            # It seems to re-clean the combined string.
-            if result and result.get("mrz_full_string"):
-                full_mrz = result["mrz_full_string"]
-                if len(full_mrz) >= 88: # 44 * 2
-                    l1 = full_mrz[:44]
-                    l2 = full_mrz[44:]
-                    l1 = clean_mrz_line(l1)
-                    l2 = clean_mrz_line(l2)
-                    result["mrz_full_string"] = l1 + l2
-            
+                with self.metrics.stage(f'{backend.name}_roi_batch') as batch_timer:
+                    codes = backend.read_lines_batch(rois, allowlist=MRZ_ALLOWLIST)
+            except Exception as e:
+                logger.error(f"Batched {backend.name} OCR failed for {len(rois)} documents: {e}")
+                failed.update(i for i, _, _ in chunk)
+                continue
+            for (i, img, mrz), roi, code in zip(chunk, rois, codes):
+                name = names[i] or "in-memory image"
+                # Each document is charged an equal share of the batched call
+                timings[i][f'{backend.name}_roi'] = batch_timer.elapsed / len(chunk)
+                with self.metrics.trace(timings[i]):
+                    try:
+                        finish(i, self._verify_roi_lines(img, self._read_roi(roi, mrz, name, first_read=code), name))
+                    except Exception as e:
+                        logger.error(f"Error in extract_mrz_from_roi: {e}")
+                        failed.add(i)
+
+        for i, (record, name) in enumerate(zip(results, names)):
+            if record is not None:
+                record['source_file'] = name
+            outcome = 'ok' if record is not None else ('error' if i in failed else 'no_mrz')
+            self._finish_record(record, timings[i], name, outcome)
+        return results
+
+    def _process_page_image(self, page, pdf_name, page_number):
+        """
+        Runs the pipeline on a rendered PDF page and applies the PDF-specific MRZ clean-up.
+        Returns a data dictionary or None.
+        """
+        logger.info(f"Processing page {page_number}...")
+        img = np.asarray(page.convert("RGB"))
+        if self.mrz_prefilter:
+            with self.metrics.stage('mrz_prefilter'):
+                present = has_mrz_band(img)
+            if not present:
+                logger.warning(f"No MRZ-like text on page {page_number} of {pdf_name}; skipped by the pre-filter.")
+                self.metrics.inc('pages_skipped', reason='no_mrz_band')
+                return None
+        result = self._extract_record(img, f"{pdf_name} (page {page_number})")
+
+        # Special MRZ fix for PDF from original code
+        # It seems to re-clean the combined string.
+        if result and result.get("mrz_full_string"):
+            full_mrz = result["mrz_full_string"]
+            if len(full_mrz) >= 88: # 44 * 2
+                l1 = full_mrz[:44]
+                l2 = full_mrz[44:]
+                l1 = clean_mrz_line(l1)
+                l2 = clean_mrz_line(l2)
+                result["mrz_full_string"] = l1 + l2
+
+        if result:
+            result['page_number'] = page_number
+        return result
+
+    def _page_result(self, pdf_digest, page_number, get_page, pdf_name):
+        """
+        Returns the record for one PDF page, served from the cache when possible.
+        `get_page` is only called (to render the page) on a cache miss. A page that fails
+        to render or process is counted and logged, and the exception is re-raised.
+        """
+        key = self._page_key(pdf_digest, page_number) if pdf_digest else None
+        with self.metrics.trace() as timings:
+            try:
+                with self.metrics.stage('pdf_page'):
+                    result = self._cached(key, lambda: self._process_page_image(get_page(), pdf_name, page_number))
+            except Exception as e:
+                logger.error(f"Failed to process page {page_number} of {pdf_name}: {e}")
+                self._finish_record(None, timings, pdf_name, 'error')
+                raise
+        if result:
+            result['source_file'] = pdf_name
+        self._finish_record(result, timings, pdf_name, 'ok' if result else 'no_mrz')
+        return result
+
+    def process_pdf_page(self, pdf_source, page_number, source_name=None, raise_errors=False, pdf_digest=None):
+        """
+        Renders a single PDF page (1-based) and extracts data from it.
+        `pdf_source` may be a file path or the PDF's raw bytes; `pdf_digest` is its
+        hash_source digest when already known, so the PDF is not hashed again for each page.
+        Returns a list with zero or one data dictionaries, like process_pdf. A page that
+        fails to render or process gives an empty list or, with `raise_errors`, raises.
+        """
+        pdf_name = describe_source(pdf_source, source_name)
+        if self.cache is None:
+            pdf_digest = None
+        elif pdf_digest is None:
+            pdf_digest = hash_source(pdf_source)
+
+        try:
+            result = self._page_result(pdf_digest, page_number, lambda: render_page(pdf_source, page_number), pdf_name)
+        except Exception:
+            if raise_errors:
+                raise
+            return []
+        return [result] if result else []
+
+    def iter_pdf_pages(self, pdf_source, source_name=None, page_numbers=None, already_valid=0, with_errors=False):
+        """
+        Extracts data from a PDF page by page, yielding (page_number, data dictionary or None)
+        for every requested page (default: all) as soon as it is done. Pages are rendered
+        one at a time (the next one in the background while the current one is OCR'd),
+        and pages already in the cache are not rendered.
+        `pdf_source` may be a file path or the PDF's raw bytes.
+        `already_valid` pages with valid MRZs (e.g. read by an interrupted earlier run) count
+        towards pdf_stop_after. With `with_errors`, yields (page_number, data, error) instead,
+        where error describes a page that failed to render or process.
+        """
+        pdf_name = describe_source(pdf_source, source_name)
+        logger.info(f"Processing PDF: {pdf_name}")
+
+        if page_numbers is None:
+            page_count = count_pages(pdf_source)
+            if not page_count:
+                logger.error(f"Failed to convert PDF {pdf_name}")
+                return
+            page_numbers = range(1, page_count + 1)
+        page_numbers = list(page_numbers)
+
+        pdf_digest = None
+        cached = {}
+        if self.cache is not None:
+            pdf_digest = hash_source(pdf_source)
+            for page_number in page_numbers:
+                result = self.cache.get(self._page_key(pdf_digest, page_number))
+                if result is not ResultCache.MISS:
+                    cached[page_number] = result
+            if cached:
+                logger.info(f"{len(cached)} of {len(page_numbers)} pages of {pdf_name} served from cache.")
+
+        to_render = [n for n in page_numbers if n not in cached]
+        rendered = iter_pages(pdf_source, to_render)
+        valid_count = already_valid
+        for page_number in page_numbers:
+            result, error = None, None
+            if self.pdf_stop_after and valid_count >= self.pdf_stop_after:
+                if rendered is not None:
+                    logger.info(f"{valid_count} valid MRZ found in {pdf_name}; skipping its remaining pages.")
+                    # Stops the background rendering of pages that will not be read
+                    rendered.close()
+                    rendered = None
+                self.metrics.inc('pages_skipped', reason='stop_after')
+                yield (page_number, None, None) if with_errors else (page_number, None)
+                continue
+            if page_number in cached:
+                result = cached[page_number]
+                if result:
+                    result['source_file'] = pdf_name
+                self.metrics.inc('cache', result='hit')
+                self._finish_record(result, {}, pdf_name, 'ok' if result else 'no_mrz')
+            else:
+                rendered_number, page = next(rendered, (page_number, None))
+                if page is None:
+                    error = f"Failed to render page {rendered_number} of {pdf_name}"
+                    logger.error(error)
+                else:
+                    try:
+                        result = self._page_result(pdf_digest, page_number, lambda: page, pdf_name)
+                    except Exception as e:
+                        error = str(e)
+                    # Drop the page before the next one is pulled in, keeping memory bounded
+                    del page
+            # The second MRZ line (the last 44 characters) carries the check digits
+            if result and td3_check_digits_valid(result.get('mrz_full_string', '')[-44:]):
+                valid_count += 1
+            yield (page_number, result, error) if with_errors else (page_number, result)
+
+    def iter_pdf(self, pdf_source, source_name=None):
+        """
+        Extracts data from a PDF page by page, yielding each data dictionary as soon as
+        its page is done (see iter_pdf_pages).
+        `pdf_source` may be a file path or the PDF's raw bytes.
+        """
+        for _, result in self.iter_pdf_pages(pdf_source, source_name):
             if result:
-                extracted_data.append(result)
-            
-            # Cleanup temp file
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
+                yield result
+
+    def process_pdf(self, pdf_source, source_name=None):
+        """
+        Converts PDF pages to images and extracts data from each.
+        `pdf_source` may be a file path or the PDF's raw bytes.
+        Returns a list of data dictionaries.
+        """
+        return list(self.iter_pdf(pdf_source, source_name))
+
+    async def aget_data(self, source, source_name=None, timeout=ASYNC_TIMEOUT):
+        """
+        Async get_data: runs on the extractor's worker threads instead of the event loop.
+        Concurrent calls for the same content share one extraction. Raises
+        asyncio.TimeoutError after `timeout` seconds; cancelling the call (or the timeout)
+        drops work that has not started yet.
+        """
+        key = await self._async.source_key(source, 'image', source_name)
+        return await self._async.run_shared(key, lambda: self._async.run(self.get_data, source, source_name), timeout)
+
+    async def aiter_pdf_pages(self, pdf_source, source_name=None, page_numbers=None, timeout=ASYNC_TIMEOUT):
+        """
+        Async iter_pdf_pages: yields (page_number, data dictionary or None) as pages are done,
+        each page running on the extractor's worker threads. `timeout` bounds each page;
+        leaving the loop early (or cancelling it) stops at the next page.
+        """
+        async for item in self._async.iterate(lambda: self.iter_pdf_pages(pdf_source, source_name, page_numbers),
+                                              timeout):
+            yield item
+
+    async def aprocess_pdf(self, pdf_source, source_name=None, timeout=ASYNC_TIMEOUT):
+        """
+        Async process_pdf: returns the list of data dictionaries of a PDF. Concurrent calls
+        for the same content share one extraction; `timeout` bounds the whole PDF, and
+        cancelling stops at the next page.
+        """
+        async def collect():
+            return [result async for _, result in self.aiter_pdf_pages(pdf_source, source_name) if result]
+
+        key = await self._async.source_key(pdf_source, 'pdf', source_name)
+        return await self._async.run_shared(key, collect, timeout)
 
-        return extracted_data
+    def close(self):
+        """Stops the worker threads of the async methods, if they were used."""
+        self._async.shutdown()
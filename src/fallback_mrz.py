@@ -1,3 +1,6 @@
+from src.utils import td3_check_digits_valid
+
+
 class FallbackMRZ:
     """
     A simple wrapper to mimic PassportEye's MRZ object when we manually extract lines.
@@ -6,7 +9,10 @@ class FallbackMRZ:
     def __init__(self, line1, line2):
         self.line1 = line1
         self.line2 = line2
-        self.valid = True
+        # True only when all TD3 check digits of line 2 match
+        self.valid = td3_check_digits_valid(line2)
+        # Extra pipeline information, like PassportEye's MRZ.aux
+        self.aux = {}
         
         # Initialize fields as empty/None
         self.type = ""
@@ -0,0 +1,21 @@
+import os
+
+from PIL import ImageFont
+
+# Monospace fonts tried in order; OCR-B is what real MRZs are printed in
+_FONT_CANDIDATES = ["OCR-B.ttf", "OCRB.ttf", "DejaVuSansMono.ttf", "LiberationMono-Regular.ttf", "cour.ttf"]
+
+
+def find_monospace_font(size):
+    """Returns the first available monospace TrueType font at `size`, or PIL's default font."""
+    for name in _FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        import matplotlib
+        path = os.path.join(os.path.dirname(matplotlib.__file__), "mpl-data", "fonts", "ttf", "DejaVuSansMono.ttf")
+        return ImageFont.truetype(path, size)
+    except (ImportError, OSError):
+        return ImageFont.load_default(size)
@@ -1,6 +1,10 @@
-import pandas as pd
 import os
+import csv
+import json
+import time
 import logging
+from src.metrics import registry as metrics
+from config.settings import EXPORT_FLUSH_EVERY, EXPORT_FLUSH_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +16,14 @@ def export_to_spreadsheet(data_list, output_file, format='excel'):
         logger.warning("No data to export.")
         return False
 
+    with metrics.stage('export'):
+        return _export(data_list, output_file, format)
+
+def _export(data_list, output_file, format):
     try:
+        # pandas is slow to import, so only load it when exporting
+        import pandas as pd
+
         df = pd.DataFrame(data_list)
         
         # Ensure output directory exists
@@ -39,3 +50,138 @@ def export_to_spreadsheet(data_list, output_file, format='excel'):
     except Exception as e:
         logger.error(f"Failed to export data: {e}")
         return False
+
+# Column order of streamed output; fixed up front so every row has the same shape
+RECORD_COLUMNS = [
+    'surname', 'name', 'sex', 'date_of_birth', 'nationality', 'passport_type',
+    'passport_number', 'issuing_country', 'expiration_date', 'personal_number',
+    'mrz_full_string', 'rotation_angle', 'mrz_stage', 'source_file', 'page_number',
+    'validation_errors',
+]
+
+_INTEGER_COLUMNS = {'rotation_angle', 'page_number'}
+
+_EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'excel': '.xlsx'}
+
+
+def output_filename(output_file, format):
+    """Returns output_file with the extension for format (replacing a known output extension)."""
+    base, extension = os.path.splitext(output_file)
+    if extension.lower() in _EXTENSIONS.values():
+        output_file = base
+    return output_file + _EXTENSIONS[format.lower()]
+
+
+class RecordWriter:
+    """
+    Appends records to a CSV or JSONL file as they are produced, so memory use does not
+    grow with the number of records and a crash only loses the records since the last flush.
+    Only `columns` are written (missing ones are left empty); dict values such as `_timings`
+    are stored as JSON. The file is flushed every `flush_every` records or `flush_seconds`.
+    With `append`, records are added after those already in the file (no new CSV header).
+    """
+
+    def __init__(self, path, format='csv', columns=None, flush_every=EXPORT_FLUSH_EVERY,
+                 flush_seconds=EXPORT_FLUSH_SECONDS, append=False):
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported streaming format: {format}")
+        self.path = path
+        self.format = format
+        self.columns = list(columns or RECORD_COLUMNS)
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.count = 0
+        self._last_flush = time.monotonic()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        resuming = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if resuming else 'w', newline='', encoding='utf-8')
+        if format == 'csv':
+            self._csv = csv.writer(self._file)
+            if not resuming:
+                self._csv.writerow(self.columns)
+
+    def _row(self, record):
+        row = {}
+        for column in self.columns:
+            value = record.get(column)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            row[column] = value
+        return row
+
+    def write(self, record):
+        """Appends one record."""
+        row = self._row(record)
+        if self.format == 'csv':
+            self._csv.writerow(['' if row[c] is None else row[c] for c in self.columns])
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0 or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        with metrics.stage('export'):
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    @property
+    def offset(self):
+        """Size in bytes of what has been written so far (call flush() first for it to be on disk)."""
+        return self._file.tell()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def truncate_output(path, offset):
+    """Cuts a streamed output file back to `offset` bytes, dropping records of unfinished work."""
+    if os.path.exists(path) and os.path.getsize(path) > offset:
+        with open(path, 'r+b') as f:
+            f.truncate(offset)
+
+
+def iter_written_records(path, format='csv'):
+    """Reads back the rows of a file written by RecordWriter, one dict at a time."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def convert_to_excel(source_path, excel_path, format='csv', columns=None):
+    """
+    Converts a file written by RecordWriter to .xlsx, streaming rows through
+    openpyxl's write-only mode so the records are never all held in memory.
+    """
+    from openpyxl import Workbook
+
+    columns = list(columns or RECORD_COLUMNS)
+    with metrics.stage('export'):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(columns)
+        for row in iter_written_records(source_path, format):
+            values = []
+            for column in columns:
+                value = row.get(column)
+                # CSV stores everything as text; keep the numeric columns numeric
+                if column in _INTEGER_COLUMNS and isinstance(value, str) and value.lstrip('-').isdigit():
+                    value = int(value)
+                values.append(None if value == '' else value)
+            sheet.append(values)
+        workbook.save(excel_path)
+    logger.info(f"Data exported to {excel_path}")
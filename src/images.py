@@ -0,0 +1,73 @@
+import io
+import os
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+
+def describe_source(source, source_name=None):
+    """Returns the name reported in 'source_file' for an image source."""
+    if source_name:
+        return source_name
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    return ""
+
+
+def load_image(source):
+    """
+    Loads an image into an RGB uint8 numpy array.
+    Accepts a file path, raw encoded bytes, a binary file object, a PIL image or a numpy array.
+    Arrays are passed through as-is (grayscale arrays are expanded to RGB);
+    decoded images are turned upright according to their EXIF orientation tag.
+    """
+    if isinstance(source, np.ndarray):
+        img = source
+        if img.dtype != np.uint8:
+            img = (img * 255).astype(np.uint8) if img.max() <= 1.0 else img.astype(np.uint8)
+        if img.ndim == 2:
+            img = np.stack([img] * 3, axis=-1)
+        elif img.shape[2] == 4:
+            img = img[:, :, :3]
+        return img
+
+    if isinstance(source, Image.Image):
+        pil_img = source
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        pil_img = Image.open(io.BytesIO(bytes(source)))
+    elif isinstance(source, (str, os.PathLike)) or hasattr(source, 'read'):
+        pil_img = Image.open(source)
+    else:
+        raise TypeError(f"Unsupported image source type: {type(source).__name__}")
+
+    # Camera/phone scans often store rotation only as an EXIF tag
+    pil_img = ImageOps.exif_transpose(pil_img)
+
+    # Flatten transparency onto white, as PassportEye's loader does for RGBA scans
+    if pil_img.mode in ('RGBA', 'LA') or (pil_img.mode == 'P' and 'transparency' in pil_img.info):
+        rgba = pil_img.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[3])
+        pil_img = background
+
+    return np.asarray(pil_img.convert('RGB'))
+
+
+def to_gray_float(img):
+    """Converts an RGB uint8 array to the float [0, 1] grayscale image PassportEye works on."""
+    from skimage.color import rgb2gray
+    return rgb2gray(img)
+
+
+def downscale(img, max_side):
+    """
+    Shrinks an image (area interpolation) so that its longest side is at most `max_side`.
+    Images that are already small enough, or a falsy `max_side`, are returned unchanged.
+    Returns (image, factor) where factor is the new size relative to the original.
+    """
+    h, w = img.shape[:2]
+    factor = max_side / float(max(h, w)) if max_side else 1.0
+    if factor >= 1:
+        return img, 1.0
+    size = (max(1, int(round(w * factor))), max(1, int(round(h * factor))))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA), factor
@@ -0,0 +1,153 @@
+import os
+import time
+import sqlite3
+import threading
+
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def manifest_path_for(output_file):
+    """The manifest kept next to an output file: data/output/passport_data.xlsx -> passport_data.manifest.sqlite."""
+    return os.path.splitext(output_file)[0] + '.manifest.sqlite'
+
+
+class JobManifest:
+    """
+    Checkpoint ledger of a batch job, stored in SQLite next to the output.
+    Records each input's path, size and mtime, its status ('pending', 'done', 'failed'),
+    the PDF pages already finished (and whether they gave a valid MRZ), and the byte offset of the streamed output file
+    up to which results are committed. Inputs are only marked done after their
+    records have been flushed to the output, so after an interruption the output is
+    truncated to the committed offset and only unfinished work is redone.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS inputs ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, status TEXT, "
+                "page_count INTEGER, output_offset INTEGER, updated REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "path TEXT, page_number INTEGER, output_offset INTEGER, valid INTEGER DEFAULT 0, "
+                "PRIMARY KEY (path, page_number))"
+            )
+            # Manifests written before pages recorded their validity
+            if 'valid' not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+                self._conn.execute("ALTER TABLE pages ADD COLUMN valid INTEGER DEFAULT 0")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def reset(self):
+        """Forgets all progress, for a run that starts from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM inputs")
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM meta")
+
+    def committed_offset(self):
+        """Byte offset of the output file up to which records belong to finished work."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'output_offset'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_offset(self, offset):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('output_offset', ?)", (str(offset),))
+
+    def plan(self, tasks):
+        """
+        Registers the inputs of a task list (see batch.build_tasks) and returns the tasks
+        still to do: finished inputs are dropped, as are finished pages of PDFs. An input
+        whose size or mtime changed since it was recorded is started over.
+        """
+        page_counts = {}
+        for path, page_number in tasks:
+            page_counts[path] = page_counts.get(path, 0) + (1 if page_number is not None else 0)
+
+        remaining = []
+        done_pages = {}
+        with self._lock, self._conn:
+            for path, page_count in page_counts.items():
+                stat = os.stat(path)
+                row = self._conn.execute("SELECT size, mtime, status FROM inputs WHERE path = ?", (path,)).fetchone()
+                if row and (row[0], row[1]) == (stat.st_size, stat.st_mtime):
+                    if row[2] == 'done':
+                        continue
+                    done_pages[path] = {n for (n,) in self._conn.execute(
+                        "SELECT page_number FROM pages WHERE path = ?", (path,))}
+                else:
+                    self._conn.execute("DELETE FROM pages WHERE path = ?", (path,))
+                    done_pages[path] = set()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO inputs (path, size, mtime, status, page_count, output_offset, updated) "
+                    "VALUES (?, ?, ?, 'pending', ?, NULL, ?)",
+                    (path, stat.st_size, stat.st_mtime, page_count or None, time.time()),
+                )
+
+        for path, page_number in tasks:
+            if path in done_pages and page_number not in done_pages[path]:
+                remaining.append((path, page_number))
+        skipped = len(tasks) - len(remaining)
+        if skipped:
+            logger.info(f"Resuming: {skipped} of {len(tasks)} tasks already done.")
+        return remaining
+
+    def complete(self, path, page_number, output_offset, error=None, valid=False):
+        """
+        Checkpoints a finished task once its records are flushed up to output_offset.
+        A PDF is marked done when all its pages are; a task without a page finishes its input.
+        `valid` records whether a PDF page gave a record with valid MRZ check digits.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            if page_number is None:
+                self._conn.execute(
+                    "UPDATE inputs SET status = ?, output_offset = ?, updated = ? WHERE path = ?",
+                    ('failed' if error else 'done', output_offset, now, path),
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (path, page_number, output_offset, valid) VALUES (?, ?, ?, ?)",
+                    (path, page_number, output_offset, int(valid)),
+                )
+                self._conn.execute(
+                    "UPDATE inputs SET status = CASE WHEN "
+                    "(SELECT COUNT(*) FROM pages WHERE path = ?) >= page_count THEN 'done' ELSE status END, "
+                    "output_offset = ?, updated = ? WHERE path = ?",
+                    (path, output_offset, now, path),
+                )
+            self._set_offset(output_offset)
+
+    def record_input(self, path, size, mtime, error=None):
+        """Marks a whole input done (or failed) as of the given size and mtime, e.g. for the folder watcher."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inputs (path, size, mtime, status, page_count, output_offset, updated) "
+                "VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+                (path, size, mtime, 'failed' if error else 'done', time.time()),
+            )
+
+    def done_inputs(self):
+        """Returns {path: (size, mtime)} of the inputs marked done."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime FROM inputs WHERE status = 'done'").fetchall()
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    def valid_pages(self, path):
+        """Number of finished pages of a PDF that gave a record with valid MRZ check digits."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages WHERE path = ? AND valid", (path,)).fetchone()[0]
+
+    def status_counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM inputs GROUP BY status").fetchall())
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Histogram bucket bounds (seconds) for stage durations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_PREFIX = "passport_ocr"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class StageTimer:
+    """Handed out by MetricsRegistry.stage(); `elapsed` is set once the stage ends."""
+    elapsed = None
+
+
+def _labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class MetricsRegistry:
+    """
+    Collects stage durations (histograms) and counters for the extraction pipeline.
+    Stage timings are also added to the per-record trace that is active on the
+    current thread (see `trace`), which is how records get their `_timings`.
+    Per-record events are forwarded to the registered sinks.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = defaultdict(float)
+        self._sinks = []
+        self._local = threading.local()
+
+    def _traces(self):
+        if not hasattr(self._local, 'traces'):
+            self._local.traces = []
+        return self._local.traces
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as stage `name`."""
+        timer = StageTimer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            timer.elapsed = time.perf_counter() - start
+            self.observe(name, timer.elapsed)
+
+    def observe(self, name, seconds):
+        """Records one duration for stage `name`."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+        traces = self._traces()
+        if traces:
+            timings = traces[-1]
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def inc(self, name, amount=1, **labels):
+        """Increments counter `name` with the given labels."""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    @contextmanager
+    def trace(self, timings=None):
+        """
+        Collects the stage timings of one record on this thread into a dict (yielded).
+        Pass an existing dict to continue a trace that was started earlier.
+        """
+        timings = {} if timings is None else timings
+        traces = self._traces()
+        traces.append(timings)
+        try:
+            yield timings
+        finally:
+            traces.pop()
+
+    def add_sink(self, sink):
+        with self._lock:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        with self._lock:
+            self._sinks.remove(sink)
+
+    @property
+    def has_sinks(self):
+        return bool(self._sinks)
+
+    def emit(self, event):
+        """Passes a per-record event to every sink."""
+        for sink in list(self._sinks):
+            try:
+                sink.record(event)
+            except Exception as e:
+                logger.error(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+    def absorb(self, record, outcome=None, source_file=None):
+        """
+        Accounts for a document that was processed elsewhere (e.g. in a worker process)
+        from its record's `_timings`, as if its stages had run here.
+        `record` is None when no MRZ was found or, with outcome='error', processing failed.
+        """
+        outcome = outcome or ('ok' if record else 'no_mrz')
+        timings = (record or {}).get('_timings') or {}
+        for name, seconds in timings.items():
+            self.observe(name, seconds)
+        self.inc('documents', outcome=outcome)
+        if record:
+            self.count_record(record)
+        self.emit(record_event(record, timings, source_file=source_file, outcome=outcome))
+
+    def count_record(self, record):
+        """Counts the cascade path a freshly extracted record took."""
+        self.inc('records', mrz_stage=record.get('mrz_stage') or 'unknown')
+        self.inc('rotation', angle=record.get('rotation_angle'))
+
+    def flush(self):
+        for sink in list(self._sinks):
+            try:
+                sink.flush(self)
+            except Exception as e:
+                logger.error(f"Metrics sink {type(sink).__name__} failed to flush: {e}")
+
+    def snapshot(self):
+        """Returns the current metrics as a plain dictionary."""
+        with self._lock:
+            stages = {name: {'count': h.count, 'sum': round(h.sum, 6)} for name, h in self._histograms.items()}
+            counters = defaultdict(dict)
+            for (name, labels), value in self._counters.items():
+                counters[name][_labels(labels) or 'total'] = value
+        return {'stages': stages, 'counters': dict(counters)}
+
+    def render_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metric = f"{_PREFIX}_stage_seconds"
+            lines.append(f"# HELP {metric} Time spent in each extraction stage.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name in sorted(self._histograms):
+                h = self._histograms[name]
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+
+            declared = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{_PREFIX}_{name}_total"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} counter")
+                    declared.add(metric)
+                label_text = f"{{{_labels(labels)}}}" if labels else ""
+                lines.append(f"{metric}{label_text} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def record_event(record, timings, source_file=None, outcome=None):
+    """Builds the per-record event passed to sinks."""
+    record = record or {}
+    return {
+        'ts': round(time.time(), 3),
+        'source_file': record.get('source_file', source_file),
+        'page_number': record.get('page_number'),
+        'outcome': outcome or ('ok' if record else 'no_mrz'),
+        'mrz_stage': record.get('mrz_stage'),
+        'rotation_angle': record.get('rotation_angle'),
+        'timings': {name: round(seconds, 6) for name, seconds in timings.items()},
+    }
+
+
+class PrometheusFileSink:
+    """
+    Writes the registry in Prometheus text format to `path` on every flush,
+    for node_exporter's textfile collector. The file is replaced atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, event):
+        pass
+
+    def flush(self, registry):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(registry.render_prometheus())
+        os.replace(tmp_path, self.path)
+
+
+class JsonlTraceSink:
+    """Appends one JSON line per record (source, cascade stage, stage timings) to `path`."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def flush(self, registry):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# Process-wide registry used by the extractor, PDF rendering and export by default
+registry = MetricsRegistry()
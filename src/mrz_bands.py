@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+from src.images import downscale
+from src.orientation import rotate_image, ROTATION_ANGLES
+from src.text_lines import line_boxes
+from config.settings import MRZ_BAND_MAX_SIDE, MRZ_PRESENCE_MAX_SIDE
+
+# Smallest blackhat response counted as ink, so blank pages do not turn their noise into text
+_MIN_INK_LEVEL = 16
+# Widest blank gap (in line heights) inside an MRZ line: MRZ characters follow each other
+# without spaces (gaps of about 0.3), while word gaps in ordinary text are 0.5 and more
+_MAX_MRZ_GAP = 0.4
+# Smallest width/height of an MRZ line (30 to 44 characters); blobs of several
+# lines of ordinary text merged together are stubbier
+_MIN_MRZ_ASPECT = 12
+# Tilts (degrees) the presence test also tries, for scans placed slightly askew
+_PRESENCE_TILTS = (5, -5)
+
+
+def _ink(gray):
+    """Binary mask (255 = ink) of the dark strokes of a grayscale image, picked out with a blackhat filter."""
+    h, w = gray.shape
+    char = max(3, w // 120)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3 * char, char))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)
+    level, _ = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    _, mask = cv2.threshold(blackhat, max(level, _MIN_INK_LEVEL), 255, cv2.THRESH_BINARY)
+    return mask
+
+
+def _text_lines(mask):
+    """Boxes (x, y, w, h) of long, horizontal text lines in an ink mask."""
+    return line_boxes(mask, min_aspect=8, min_width=mask.shape[1] // 5)
+
+
+def _group_lines(lines):
+    """Groups vertically adjacent lines that share most of their horizontal extent into bands."""
+    groups = []
+    for x, y, w, h in sorted(lines, key=lambda line: line[1]):
+        if groups:
+            last = groups[-1][-1]
+            overlap = min(x + w, last[0] + last[2]) - max(x, last[0])
+            if overlap >= 0.5 * min(w, last[2]) and y - (last[1] + last[3]) <= 1.5 * max(h, last[3]):
+                groups[-1].append((x, y, w, h))
+                continue
+        groups.append([(x, y, w, h)])
+    return groups
+
+
+def _band_score(group, height):
+    """
+    Scores a group of lines by how much it looks like an MRZ: two or three lines of
+    equal length, near the bottom of the document.
+    """
+    widths = [w for _, _, w, _ in group]
+    center = np.mean([y + h / 2.0 for _, y, _, h in group])
+    score = center / height
+    if 2 <= len(group) <= 3:
+        score += 1.0
+        if min(widths) >= 0.8 * max(widths):
+            score += 0.5
+    return score
+
+
+def find_mrz_bands(img, max_side=MRZ_BAND_MAX_SIDE, limit=None):
+    """
+    Finds candidate MRZ bands in an RGB image with a cheap morphology analysis on a
+    copy downscaled to `max_side`, in all four 90-degree orientations.
+    Returns (angle, (x0, y0, x1, y1)) pairs, most MRZ-like first, where the box is in
+    full-resolution pixels of rotate_image(img, angle).
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    small, factor = downscale(gray, max_side)
+
+    candidates = []
+    for angle in ROTATION_ANGLES:
+        rotated = rotate_image(small, angle)
+        height, width = rotated.shape
+        for group in _group_lines(_text_lines(_ink(rotated))):
+            x0 = min(x for x, _, _, _ in group)
+            y0 = min(y for _, y, _, _ in group)
+            x1 = max(x + w for x, _, w, _ in group)
+            y1 = max(y + h for _, y, _, h in group)
+            # Room for ascenders, descenders and the first/last character
+            pad = int(np.median([h for _, _, _, h in group]))
+            box = (max(0, x0 - pad), max(0, y0 - pad), min(width, x1 + pad), min(height, y1 + pad))
+            candidates.append((_band_score(group, height), angle, tuple(int(round(v / factor)) for v in box)))
+
+    candidates.sort(key=lambda candidate: -candidate[0])
+    return [(angle, box) for _, angle, box in candidates[:limit]]
+
+
+def _widest_gap(mask, line):
+    """Longest run of ink-free columns inside a line box, in line heights."""
+    x, y, w, h = line
+    columns = mask[y:y + h, x:x + w].any(axis=0)
+    inked = np.flatnonzero(np.r_[True, columns, True])
+    return (np.diff(inked).max() - 1) / float(h)
+
+
+def _looks_like_mrz(group, mask):
+    """
+    True for two or three lines of the same length, aligned on the left and without word
+    gaps, as in the MRZ of passports (TD3), visas (TD2) and ID cards (TD1).
+    """
+    widths = [w for _, _, w, _ in group]
+    lefts = [x for x, _, _, _ in group]
+    height = np.median([h for _, _, _, h in group])
+    if min(widths) < 0.9 * max(widths) or max(lefts) - min(lefts) > height:
+        return False
+    if any(w < _MIN_MRZ_ASPECT * h for _, _, w, h in group):
+        return False
+    return all(_widest_gap(mask, line) <= _MAX_MRZ_GAP for line in group)
+
+
+def _tilt(gray, degrees):
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), degrees, 1.0)
+    return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def has_mrz_band(img, max_side=MRZ_PRESENCE_MAX_SIDE):
+    """
+    Cheap MRZ-presence test on a thumbnail (longest side `max_side`) of an RGB image:
+    True if some band of text, horizontal or vertical, looks like an MRZ. Meant to skip
+    pages without an MRZ before any OCR runs; a page that is upside down reads the same,
+    and pages placed a few degrees askew are tried straightened.
+    """
+    small, _ = downscale(img, max_side)
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.ndim == 3 else small
+    for angle in (0, 90):
+        rotated = np.ascontiguousarray(rotate_image(gray, angle))
+        for tilt in (0,) + _PRESENCE_TILTS:
+            mask = _ink(_tilt(rotated, tilt) if tilt else rotated)
+            for group in _group_lines(_text_lines(mask)):
+                # The MRZ may be grouped with a neighbouring line, such as the edge of the document
+                for size in (2, 3):
+                    if any(_looks_like_mrz(group[i:i + size], mask) for i in range(len(group) - size + 1)):
+                        return True
+    return False
@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+from passporteye.mrz.image import MRZPipeline, BoxToMRZ, FindFirstValidMRZ
+from passporteye.util.geometry import RotatedBox
+
+from src.images import downscale, to_gray_float
+
+# Margin (in pipeline pixels) RotatedBox.extract_from_image adds around a box, plus a little
+# slack so the rotation never samples outside the crop
+_CROP_PADDING = 5 + 2
+
+
+def crop_box(img, box, scale, max_width=None):
+    """
+    Cuts the region of a PassportEye RotatedBox out of a full-resolution RGB image.
+    `scale` is the number of full-resolution pixels per box unit.
+    Returns (gray, box, scale) such that box.extract_from_image(gray, scale) yields the
+    same ROI as extracting the original box from the whole (gray) image, while only the
+    crop is converted and rotated. If the box would be wider than `max_width` pixels, the
+    crop is downscaled so it is not.
+    """
+    h, w = img.shape[:2]
+    corners = box.as_poly(_CROP_PADDING, _CROP_PADDING) * scale  # (row, col) pairs
+    r0 = int(max(0, np.floor(corners[:, 0].min())))
+    r1 = int(min(h, np.ceil(corners[:, 0].max()) + 1))
+    c0 = int(max(0, np.floor(corners[:, 1].min())))
+    c1 = int(min(w, np.ceil(corners[:, 1].max()) + 1))
+    crop = img[r0:r1, c0:c1]
+
+    factor = 1.0
+    if max_width and box.width * scale > max_width:
+        factor = max_width / (box.width * scale)
+        size = (max(1, int(round((c1 - c0) * factor))), max(1, int(round((r1 - r0) * factor))))
+        crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+
+    shifted = RotatedBox(box.center - np.array([r0, c0]) / scale, box.width, box.height, box.angle)
+    return to_gray_float(crop), shifted, scale * factor
+
+
+class CroppedBoxToMRZ(BoxToMRZ):
+    """
+    PassportEye's BoxToMRZ, reading each box from the full-resolution image instead of the
+    image the pipeline searched. `locate_scale` is full-resolution pixels per pixel of the
+    pipeline's `img`; ROIs are at most `roi_max_width` pixels wide.
+    """
+
+    def __init__(self, full_img, locate_scale, roi_max_width=None, extra_cmdline_params=''):
+        super().__init__(use_original_image=True, extra_cmdline_params=extra_cmdline_params)
+        self.full_img = full_img
+        self.locate_scale = locate_scale
+        self.roi_max_width = roi_max_width
+
+    def __call__(self, box, img, img_small, scale_factor):
+        gray, shifted, scale = crop_box(self.full_img, box, self.locate_scale / scale_factor, self.roi_max_width)
+        return super().__call__(shifted, gray, img_small, 1.0 / scale)
+
+
+def mrz_pipeline(img, locate_max_side, roi_max_width, small=None):
+    """
+    Builds a PassportEye MRZPipeline for an in-memory RGB image, coarse to fine:
+    the MRZ band is searched for on a copy downscaled to `locate_max_side` (pass `small`
+    if one was already made), and only the band is cut out of the full-resolution image
+    for recognition. Cost thus depends on the MRZ size rather than the page size.
+    """
+    if small is None:
+        small, _ = downscale(img, locate_max_side)
+    gray = to_gray_float(small)
+    locate_scale = img.shape[1] / float(small.shape[1])
+
+    pipeline = MRZPipeline(None)
+    # Feed the decoded image straight into the pipeline instead of its file loader
+    pipeline.replace_component('loader', lambda: gray, ['img'], [])
+    finder = FindFirstValidMRZ()
+    finder.box_to_mrz = CroppedBoxToMRZ(img, locate_scale, roi_max_width)
+    pipeline.replace_component('mrz', finder)
+    return pipeline
@@ -0,0 +1,248 @@
+import hashlib
+import os
+import string
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from src.fonts import find_monospace_font
+from src.text_lines import split_lines
+from src.utils import setup_logger
+from config.settings import MODEL_DIR, MRZ_TEMPLATE_FONT
+
+logger = setup_logger(__name__)
+
+# The 37 symbols an MRZ is written with
+MRZ_ALPHABET = string.ascii_uppercase + string.digits + "<"
+TD3_LINE_LENGTH = 44
+
+TEMPLATE_SIZE = (16, 24)  # (width, height) glyphs and cells are compared at
+_TEMPLATE_VERSION = 1     # Bump when the rendering code changes, to rebuild cached templates
+_RENDER_SIZE = 64         # Font size glyphs are rendered at before being scaled to TEMPLATE_SIZE
+# Each cell is also tried shifted by these many template pixels, for segmentation slack
+_SHIFTS = (-2, -1, 0, 1, 2)
+_BLUR_SIGMA = 0.8  # Gaussian blur (template pixels) applied to cells and templates alike
+# Tilts (degrees) tried when straightening a region's text lines
+_DESKEW_ANGLES = np.arange(-2.0, 2.01, 0.25)
+_DESKEW_STRIPS = 24  # Vertical strips whose row profiles are shifted to try each tilt
+# Rows (columns) holding less than this share of a line's densest row (column) are background
+_ROW_INK = 0.05
+_COL_INK = 0.05
+_DESCENT = 0.15  # Rows kept below the baseline, as a share of the cap height
+_LINE_MARGIN = 0.15  # Margin around a line's ink in mrz_line_boxes, as a share of its height
+
+
+def _ink_mask(gray):
+    """Dark-on-light text as a boolean ink mask (Otsu threshold)."""
+    _, mask = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return mask.astype(bool)
+
+
+def _deskew(gray):
+    """
+    Straightens slightly tilted text: the tilt whose horizontal projection profile is
+    sharpest, i.e. whose rows are most clearly either text or gap.
+    """
+    height, width = gray.shape
+    if width < _DESKEW_STRIPS:
+        return gray
+    # Row profiles of narrow vertical strips; a small rotation shifts each strip's profile
+    # by (strip center - region center) * tan(angle) rows
+    mask = _ink_mask(gray)
+    strips = mask[:, :width // _DESKEW_STRIPS * _DESKEW_STRIPS].reshape(height, _DESKEW_STRIPS, -1).sum(axis=2).T
+    centers = (np.arange(_DESKEW_STRIPS) + 0.5) * (width // _DESKEW_STRIPS) - width / 2
+    shifts = np.rint(np.tan(np.radians(_DESKEW_ANGLES))[:, None] * centers[None, :]).astype(int)
+    pad = int(np.abs(shifts).max())
+    padded = np.pad(strips, ((0, 0), (pad, pad)))
+    index = pad + np.arange(height)[None, None, :] - shifts[:, :, None]
+    profiles = np.take_along_axis(padded[None], index, axis=2).sum(axis=1)
+    angle = _DESKEW_ANGLES[int(np.argmax(np.square(profiles.astype(np.float64)).sum(axis=1)))]
+    if abs(angle) < 1e-6:
+        return gray
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+    return cv2.warpAffine(gray, rotation, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def _text_lines(mask):
+    """
+    The lines of a text region, (top, bottom, ink) top to bottom: the rows from cap top to
+    baseline, extended by _DESCENT of the cap height (see split_lines).
+    """
+    return split_lines(mask, row_ink=_ROW_INK, descent=_DESCENT)
+
+
+def _find_pitch(cols, count):
+    """
+    Finds the fixed-pitch grid of `count` cells over a line's column profile: the pitch and
+    offset whose cell boundaries cross the least ink. Returns (offset, pitch) or None.
+    """
+    ink = np.flatnonzero(cols >= _COL_INK * cols.max())
+    if len(ink) == 0:
+        return None
+    x0, x1 = ink[0], ink[-1] + 1
+    width = x1 - x0
+    # The line spans count - 1 pitches plus one glyph, narrower than a pitch
+    pitches = np.arange(width / count * 0.97, width / (count - 1) + 0.25, 0.1)
+    smooth = np.convolve(cols, np.ones(3) / 3, mode='same')
+    best = None
+    for pitch in pitches:
+        offsets = np.arange(x1 - count * pitch, x0 + 0.5, 0.5)
+        if len(offsets) == 0:
+            continue
+        bounds = offsets[:, None] + pitch * np.arange(count + 1)[None, :]
+        cost = np.interp(bounds, np.arange(len(smooth)), smooth, left=0, right=0).sum(axis=1)
+        i = int(np.argmin(cost))
+        if best is None or cost[i] < best[0]:
+            best = (cost[i], offsets[i], pitch)
+    return None if best is None else (best[1], best[2])
+
+
+def _cells(ink, offset, pitch, count, shifts=(0,)):
+    """
+    Cuts `count` cells of `pitch` starting at `offset` out of a line's ink image, each also
+    shifted by the given numbers of template pixels. The line is scaled once so that a cell
+    is TEMPLATE_SIZE and slightly blurred, which evens out stroke width and print quality.
+    Returns an array of shape (count, len(shifts), height * width).
+    """
+    cell_width, cell_height = TEMPLATE_SIZE
+    scale = cell_width / pitch
+    line = cv2.resize(ink, (max(int(round(ink.shape[1] * scale)), 1), cell_height), interpolation=cv2.INTER_AREA)
+    line = cv2.GaussianBlur(line, (0, 0), _BLUR_SIGMA)
+    pad = cell_width + max(abs(shift) for shift in shifts)
+    line = np.pad(line, ((0, 0), (pad, pad + cell_width)))
+    windows = np.lib.stride_tricks.sliding_window_view(line, cell_width, axis=1)  # (height, x, width)
+    starts = pad + np.rint(offset * scale + cell_width * np.arange(count)).astype(int)
+    starts = starts[:, None] + np.asarray(shifts)[None, :]
+    return windows[:, starts].transpose(1, 2, 0, 3).reshape(count, len(shifts), -1)
+
+
+def _standardize(vectors):
+    """Zero-mean, unit-norm vectors along the last axis, so dot products are correlations."""
+    vectors = vectors - vectors.mean(axis=-1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def _template_font():
+    if MRZ_TEMPLATE_FONT:
+        return ImageFont.truetype(MRZ_TEMPLATE_FONT, _RENDER_SIZE)
+    return find_monospace_font(_RENDER_SIZE)
+
+
+def render_templates(font=None):
+    """
+    Renders MRZ_ALPHABET with `font` (by default MRZ_TEMPLATE_FONT) and cuts the glyphs the
+    same way text lines are cut at recognition time. Returns an array of shape
+    (len(MRZ_ALPHABET), height * width), standardized.
+    """
+    font = font or _template_font()
+    pitch = font.getlength("<")
+    margin = int(pitch)
+    canvas = Image.new("L", (int(pitch * (len(MRZ_ALPHABET) + 2)), _RENDER_SIZE * 2), 255)
+    ImageDraw.Draw(canvas).text((margin, _RENDER_SIZE // 2), MRZ_ALPHABET, font=font, fill=0)
+    gray = np.asarray(canvas)
+
+    top, bottom, _ = _text_lines(_ink_mask(gray))[0]
+    ink = 255 - gray[top:bottom].astype(np.float32)
+    return _standardize(_cells(ink, margin, pitch, len(MRZ_ALPHABET))[:, 0])
+
+
+_templates = None
+_templates_lock = threading.Lock()
+
+
+def load_templates():
+    """
+    Returns the glyph templates of MRZ_TEMPLATE_FONT (or the first monospace font found),
+    rendered on first use and cached as a .npy under MODEL_DIR so later processes skip
+    the rendering. The cache file is keyed by the font and the rendering settings.
+    """
+    global _templates
+    with _templates_lock:
+        if _templates is not None:
+            return _templates
+        font = _template_font()
+        font_path = getattr(font, 'path', None) or 'default'
+        settings = repr((_TEMPLATE_VERSION, MRZ_ALPHABET, TEMPLATE_SIZE, _RENDER_SIZE, _BLUR_SIGMA,
+                         _DESCENT, _ROW_INK, os.path.abspath(font_path) if font_path != 'default' else font_path))
+        digest = hashlib.sha1(settings.encode()).hexdigest()[:12]
+        font_name = os.path.splitext(os.path.basename(font_path))[0]
+        path = os.path.join(MODEL_DIR, f"mrz_templates_{font_name}_{digest}.npy")
+        try:
+            _templates = np.load(path)
+        except (OSError, ValueError):
+            _templates = render_templates(font)
+            try:
+                os.makedirs(MODEL_DIR, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    np.save(f, _templates)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning(f"Could not cache MRZ templates at {path}: {e}")
+        return _templates
+
+
+def _mrz_lines(lines):
+    """The lines carrying most of a region's ink (within half of the heaviest), top to bottom."""
+    heaviest = max((line[2] for line in lines), default=0)
+    return [line for line in lines if line[2] >= 0.5 * heaviest]
+
+
+def mrz_line_boxes(img):
+    """
+    Finds the text lines of an MRZ region (or band) by projection profile, for recognizers
+    that read one line at a time. Returns (gray, boxes): the region straightened and in
+    grayscale, and one (x0, x1, y0, y1) box per line, top to bottom, with a margin around
+    the ink. boxes is empty unless there are two (TD3) or three (TD1) lines.
+    """
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    gray = _deskew(gray)
+    lines = _mrz_lines(_text_lines(_ink_mask(gray)))
+    if len(lines) not in (2, 3):
+        return gray, []
+
+    height, width = gray.shape
+    boxes = []
+    for top, bottom, _ in lines:
+        margin = int(round(_LINE_MARGIN * (bottom - top)))
+        y0, y1 = max(top - margin, 0), min(bottom + margin, height)
+        cols = _ink_mask(gray[top:bottom]).sum(axis=0)
+        ink = np.flatnonzero(cols >= _COL_INK * cols.max())
+        x0, x1 = max(ink[0] - margin, 0), min(ink[-1] + 1 + margin, width)
+        boxes.append((int(x0), int(x1), int(y0), int(y1)))
+    return gray, boxes
+
+
+def read_mrz(img, line_length=TD3_LINE_LENGTH, templates=None):
+    """
+    Reads the two MRZ lines of a normalized MRZ region (dark text on light background)
+    by template matching: lines are split by projection profile, cut into `line_length`
+    fixed-pitch cells and each cell is matched against every glyph template at once.
+    Returns ([line1, line2], [confidences1, confidences2]), the confidences being each
+    character's correlation with its template (1.0 is a perfect match), or ([], []) when
+    the region does not look like two lines of text.
+    """
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    templates = load_templates() if templates is None else templates
+    gray = _deskew(gray)
+
+    lines = _mrz_lines(_text_lines(_ink_mask(gray)))
+    if len(lines) != 2:
+        return [], []
+
+    texts, confidences = [], []
+    for top, bottom, _ in lines:
+        ink = 255 - gray[top:bottom].astype(np.float32)
+        grid = _find_pitch(_ink_mask(gray[top:bottom]).sum(axis=0).astype(np.float32), line_length)
+        if grid is None:
+            return [], []
+        cells = _standardize(_cells(ink, grid[0], grid[1], line_length, _SHIFTS))
+        # (cells, shifts, symbols): the best shift of each cell for each symbol
+        scores = (cells @ templates.T).max(axis=1)
+        best = scores.argmax(axis=1)
+        texts.append("".join(MRZ_ALPHABET[i] for i in best))
+        confidences.append(scores[np.arange(line_length), best])
+    return texts, confidences
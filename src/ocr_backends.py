@@ -0,0 +1,221 @@
+import cv2
+import numpy as np
+
+from src.images import downscale
+from src.mrz_templates import read_mrz, mrz_line_boxes
+from src.utils import setup_logger
+from config.settings import (
+    FALLBACK_DETECT_MAX_SIDE, TESSERACT_MRZ_LANG, MRZ_TEMPLATE_MIN_CONFIDENCE, OCR_SPLIT_LINES,
+)
+
+logger = setup_logger(__name__)
+
+# Input height of EasyOCR's recognizer (easyocr.config.imgH)
+RECOGNIZER_HEIGHT = 64
+
+
+class OCRBackend:
+    """
+    Reads text for the stages of the MRZ pipeline. `name` prefixes the stage names the
+    backend's reads are reported under (e.g. "tesseract_roi").
+    Subclasses implement read_lines and read_page; read_lines_batch defaults to a loop.
+    """
+
+    name = None
+
+    def options(self):
+        """The backend's settings that change what it reads, e.g. for result cache keys."""
+        return {}
+
+    def read_lines(self, img, allowlist=None):
+        """Returns the text lines of an image holding a few lines of text (an MRZ region or band), top to bottom."""
+        raise NotImplementedError
+
+    def read_lines_batch(self, imgs, allowlist=None):
+        """read_lines for several images of the same size; returns one list of lines per image."""
+        return [self.read_lines(img, allowlist) for img in imgs]
+
+    def read_page(self, img):
+        """Returns the text lines found anywhere on a whole RGB page."""
+        raise NotImplementedError
+
+
+class EasyOCRBackend(OCRBackend):
+    """
+    EasyOCR (CRAFT detector and CRNN recognizer), with readers checked out of a ReaderPool.
+    With `split_lines`, MRZ regions and bands that split into two or three text lines by
+    projection profile skip the detector: each line is scaled to the recognizer's input
+    height and read by the recognizer alone.
+    """
+
+    name = 'easyocr'
+
+    def __init__(self, readers, split_lines=OCR_SPLIT_LINES):
+        self.readers = readers
+        self.split_lines = split_lines
+
+    def options(self):
+        return {'split_lines': self.split_lines}
+
+    def _line_strips(self, img):
+        """The text lines of an MRZ region scaled to RECOGNIZER_HEIGHT, or None if it does not split into lines."""
+        if not self.split_lines:
+            return None
+        gray, boxes = mrz_line_boxes(img)
+        if not boxes:
+            return None
+        strips = []
+        for x0, x1, y0, y1 in boxes:
+            strip = gray[y0:y1, x0:x1]
+            width = max(1, int(round(strip.shape[1] * RECOGNIZER_HEIGHT / strip.shape[0])))
+            strips.append(cv2.resize(strip, (width, RECOGNIZER_HEIGHT), interpolation=cv2.INTER_CUBIC))
+        return strips
+
+    @staticmethod
+    def _recognize(reader, strips, allowlist):
+        """
+        Reads line strips with the recognizer alone, all in one batch. This calls EasyOCR's
+        get_text directly: Reader.recognize reads its boxes one at a time on the CPU.
+        Returns one string per strip.
+        """
+        from easyocr.recognition import get_text
+
+        # The characters the recognizer must not output, as Reader.recognize works them out
+        allowed = allowlist or reader.lang_char
+        ignore_char = ''.join(set(reader.character) - set(allowed))
+        # Strips are padded to the widest one, rounded up to whole multiples of the height
+        width = int(np.ceil(max(s.shape[1] for s in strips) / RECOGNIZER_HEIGHT)) * RECOGNIZER_HEIGHT
+        result = get_text(reader.character, RECOGNIZER_HEIGHT, width, reader.recognizer, reader.converter,
+                          list(enumerate(strips)), ignore_char, batch_size=len(strips), workers=0,
+                          device=reader.device)
+        return [text for _, text, _ in result]
+
+    def read_lines(self, img, allowlist=None):
+        strips = self._line_strips(img)
+        with self.readers.reader() as reader:
+            if strips is None:
+                return reader.readtext(img, detail=0, allowlist=allowlist)
+            return self._recognize(reader, strips, allowlist)
+
+    def read_lines_batch(self, imgs, allowlist=None):
+        strips = [self._line_strips(img) for img in imgs]
+        split = [i for i, s in enumerate(strips) if s is not None]
+        detect = [i for i, s in enumerate(strips) if s is None]
+        results = [None] * len(imgs)
+        with self.readers.reader() as reader:
+            if split:
+                texts = self._recognize(reader, [line for i in split for line in strips[i]], allowlist)
+                for i in split:
+                    results[i], texts = texts[:len(strips[i])], texts[len(strips[i]):]
+            if detect:
+                height, width = imgs[detect[0]].shape[:2]
+                read = reader.readtext_batched([imgs[i] for i in detect], n_width=width, n_height=height,
+                                               batch_size=len(detect), detail=0, allowlist=allowlist)
+                for i, lines in zip(detect, read):
+                    results[i] = lines
+        return results
+
+    def read_page(self, img):
+        # Text lines are detected on a copy downscaled to FALLBACK_DETECT_MAX_SIDE and
+        # recognized from the full-resolution image, like readtext does on the whole page
+        small, factor = downscale(img, FALLBACK_DETECT_MAX_SIDE)
+        with self.readers.reader() as reader:
+            horizontal_list, free_list = reader.detect(small)
+        horizontal_list = [[int(round(v / factor)) for v in box] for box in horizontal_list[0]]
+        free_list = [[[int(round(x / factor)), int(round(y / factor))] for x, y in box] for box in free_list[0]]
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        with self.readers.reader() as reader:
+            # detail=0 returns just the list of strings
+            return reader.recognize(gray, horizontal_list, free_list, detail=0, reformat=False)
+
+
+class TesseractBackend(OCRBackend):
+    """
+    Tesseract through pytesseract, tuned for MRZ text: the `lang` model (an OCR-B model
+    such as "ocrb" if installed, otherwise "eng"), MRZ characters only and no dictionaries.
+    Much lighter on the CPU than EasyOCR for clean MRZ lines.
+    """
+
+    name = 'tesseract'
+    _MRZ_CONFIG = "-c load_system_dawg=F -c load_freq_dawg=F"
+
+    def __init__(self, lang=TESSERACT_MRZ_LANG):
+        self.lang = lang
+        self._resolved_lang = None
+
+    def options(self):
+        return {'lang': self.lang}
+
+    def _language(self):
+        if self._resolved_lang is None:
+            import pytesseract
+
+            installed = pytesseract.get_languages(config='')
+            if self.lang in installed:
+                self._resolved_lang = self.lang
+            else:
+                logger.warning(f"Tesseract model '{self.lang}' is not installed; using 'eng' for MRZ text.")
+                self._resolved_lang = 'eng'
+        return self._resolved_lang
+
+    def _read(self, img, psm, allowlist):
+        import pytesseract
+
+        config = f"--psm {psm} {self._MRZ_CONFIG}"
+        if allowlist:
+            # Tesseract has no case folding: keep only the characters an MRZ really uses
+            chars = "".join(sorted({c.upper() for c in allowlist if not c.isspace()}))
+            config += f" -c tessedit_char_whitelist={chars}"
+        text = pytesseract.image_to_string(img, lang=self._language(), config=config)
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+    def read_lines(self, img, allowlist=None):
+        # psm 6: a single uniform block of text
+        return self._read(img, 6, allowlist)
+
+    def read_page(self, img):
+        # psm 11: sparse text anywhere on the page
+        return self._read(img, 11, None)
+
+
+class TemplateBackend(OCRBackend):
+    """
+    Template matching of the MRZ's fixed-pitch glyphs (src/mrz_templates.py): a few
+    milliseconds of NumPy per MRZ region instead of a neural network. Only reads MRZ
+    regions; a read with any character below `min_confidence` returns no lines, so the
+    next backend reads the region instead.
+    """
+
+    name = 'template'
+
+    def __init__(self, min_confidence=MRZ_TEMPLATE_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+
+    def options(self):
+        return {'min_confidence': self.min_confidence}
+
+    def read_lines(self, img, allowlist=None):
+        lines, confidences = read_mrz(img)
+        if not lines or min(c.min() for c in confidences) < self.min_confidence:
+            return []
+        return lines
+
+    def read_page(self, img):
+        return []
+
+
+# Backend factories by name, each taking the extractor's ReaderPool
+BACKENDS = {
+    'easyocr': EasyOCRBackend,
+    'tesseract': lambda readers: TesseractBackend(),
+    'template': lambda readers: TemplateBackend(),
+}
+
+
+def create_backend(name, readers):
+    """Returns a new OCR backend by its name in BACKENDS."""
+    try:
+        factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown OCR backend {name!r} (available: {', '.join(sorted(BACKENDS))})")
+    return factory(readers)
@@ -0,0 +1,71 @@
+import os
+
+from src.utils import setup_logger
+from config.settings import MODEL_DIR
+
+logger = setup_logger(__name__)
+
+
+def quantized_recognizer_path(languages, model_dir=MODEL_DIR):
+    """Where the int8 recognizer for `languages` is cached, keyed by the EasyOCR and torch versions."""
+    import easyocr
+    import torch
+
+    name = f"recognizer_{'-'.join(sorted(languages))}_easyocr{easyocr.__version__}_torch{torch.__version__}_int8.pt"
+    return os.path.join(model_dir, name.replace('+', '_'))
+
+
+def _quantize(reader, path):
+    """Applies dynamic int8 quantization to the reader's recognizer and caches the result at `path`."""
+    import torch
+
+    logger.info("Quantizing the EasyOCR recognizer to int8...")
+    try:
+        reader.recognizer = torch.ao.quantization.quantize_dynamic(
+            reader.recognizer, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        # e.g. no quantized engine for this CPU
+        logger.warning(f"int8 quantization failed ({e}); the recognizer runs in float32.")
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        torch.save((reader.recognizer, reader.converter), tmp)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not cache the quantized recognizer at {path}: {e}")
+
+
+def create_reader(languages, use_gpu=False, quantized=False, model_dir=MODEL_DIR):
+    """
+    Returns an easyocr.Reader with its models stored in `model_dir`.
+
+    With `quantized` (CPU only), the recognizer's LSTM and linear layers run with dynamic
+    int8 quantization. The quantized recognizer is saved under `model_dir` the first time,
+    and later readers load it as is, skipping the float32 weights and the quantization.
+    The CRAFT detector is only convolutions, which dynamic quantization does not cover,
+    so it stays in float32.
+    """
+    # easyocr pulls in torch, which takes seconds to import
+    import easyocr
+    import torch
+
+    os.makedirs(model_dir, exist_ok=True)
+    if quantized and use_gpu:
+        logger.warning("int8 quantization only applies to CPU inference; using float32 models.")
+        quantized = False
+    if not quantized:
+        return easyocr.Reader(languages, gpu=use_gpu, model_storage_directory=model_dir, quantize=False)
+
+    path = quantized_recognizer_path(languages, model_dir)
+    if os.path.exists(path):
+        try:
+            reader = easyocr.Reader(languages, gpu=False, model_storage_directory=model_dir, recognizer=False)
+            # Whole quantized modules are pickled, so this needs weights_only=False: only our own cache is read
+            reader.recognizer, reader.converter = torch.load(path, weights_only=False)
+            return reader
+        except Exception as e:
+            logger.warning(f"Could not load the quantized recognizer from {path} ({e}); quantizing again.")
+
+    reader = easyocr.Reader(languages, gpu=False, model_storage_directory=model_dir, quantize=False)
+    _quantize(reader, path)
+    return reader
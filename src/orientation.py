@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+from src.text_lines import line_boxes
+from config.settings import ORIENTATION_MAX_SIDE
+
+ROTATION_ANGLES = [0, 90, 180, 270]
+
+
+def rotate_image(img, angle):
+    """Rotates an image counter-clockwise by a multiple of 90 degrees (like PIL's rotate with expand=True)."""
+    return np.rot90(img, k=(angle // 90) % 4) if angle else img
+
+
+def _ink_mask(img, max_side):
+    """Downscales the image and returns a binary mask (1 = dark ink) via Otsu thresholding."""
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    h, w = gray.shape[:2]
+    scale = max_side / float(max(h, w))
+    if scale < 1:
+        gray = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    _, mask = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return mask
+
+
+def _text_lines(mask):
+    """Boxes (x, y, w, h) of the horizontal text lines in an ink mask."""
+    return line_boxes(mask, min_aspect=5, min_width=mask.shape[1] // 20)
+
+
+def _line_score(mask):
+    """Share of ink that belongs to horizontal text lines; high when the text runs left to right."""
+    ink = mask.sum()
+    if ink == 0:
+        return 0.0
+    return sum(bw * bh for _, _, bw, bh in _text_lines(mask)) / float(ink)
+
+
+def _bottom_band_position(mask):
+    """
+    Returns the relative vertical position (0 = top, 1 = bottom) of the widest text lines.
+    For an upright passport these are the MRZ lines near the bottom of the page.
+    """
+    lines = _text_lines(mask)
+    ys = np.nonzero(mask.any(axis=1))[0]
+    if not lines or len(ys) < 2:
+        return 0.5
+    widest = max(bw for _, _, bw, _ in lines)
+    centers = [y + bh / 2.0 for _, y, bw, bh in lines if bw >= 0.8 * widest]
+    return float((np.mean(centers) - ys.min()) / (ys.max() - ys.min()))
+
+
+def estimate_rotation_order(img, max_side=ORIENTATION_MAX_SIDE):
+    """
+    Ranks the four 90-degree rotations by how likely they are to make the document upright.
+    Works on a downscaled copy: text-line blobs tell horizontal from vertical writing,
+    and the MRZ (the widest lines) tells top from bottom.
+    Returns the angles to pass to rotate_image, most likely first.
+    """
+    mask = _ink_mask(img, max_side)
+    horizontal = _line_score(mask) >= _line_score(rotate_image(mask, 90))
+
+    pairs = [(0, 180), (90, 270)] if horizontal else [(90, 270), (0, 180)]
+    order = []
+    for angle, flipped in pairs:
+        position = _bottom_band_position(rotate_image(mask, angle))
+        order.extend([angle, flipped] if position >= 0.5 else [flipped, angle])
+    return order
@@ -0,0 +1,211 @@
+import io
+import re
+import queue
+import threading
+from pdf2image import convert_from_path, convert_from_bytes, pdfinfo_from_path, pdfinfo_from_bytes
+from pdf2image.exceptions import PDFInfoNotInstalledError
+from PIL import Image
+
+from src.utils import setup_logger
+from src.metrics import registry as metrics
+from config.settings import PDF_PREFETCH_PAGES, PDF_RENDER_DPI
+
+logger = setup_logger(__name__)
+
+# Share of the page an embedded image must cover to be taken as the whole page
+_MIN_PAGE_COVERAGE = 0.9
+# Decoded image modes that convert to RGB without colour-management surprises (not CMYK)
+_EXTRACTABLE_MODES = ('1', 'L', 'P', 'RGB')
+# Page content that does nothing but draw one upright image: "q a 0 0 d e f cm /Im0 Do Q"
+_NUMBER = rb"([-+]?(?:\d+\.?\d*|\.\d+))"
+_SINGLE_IMAGE_CONTENT = re.compile(
+    rb"^\s*(?:q\s+)*" + rb"\s+".join([_NUMBER] * 6) + rb"\s+cm\s+/([^\s/]+)\s+Do(?:\s+Q)*\s*$"
+)
+# Invisible text (render mode 3), as in searchable scans; it does not change what the page shows
+_INVISIBLE_TEXT = re.compile(rb"BT\b(?:(?!ET\b).)*?\b3\s+Tr\b.*?\bET\b", re.S)
+_EMPTY_GROUP = re.compile(rb"\bq\s+Q\b")
+
+
+def _is_pdf_bytes(pdf_source):
+    return isinstance(pdf_source, (bytes, bytearray))
+
+
+def open_pdf(pdf_source):
+    """Opens a PDF given as a file path or raw bytes with PyMuPDF."""
+    import fitz
+    if _is_pdf_bytes(pdf_source):
+        return fitz.open(stream=bytes(pdf_source), filetype="pdf")
+    return fitz.open(pdf_source)
+
+
+def count_pages(pdf_source):
+    """
+    Returns the number of pages in a PDF (path or bytes), or None if it cannot be determined.
+    Uses poppler's pdfinfo first and PyMuPDF as a fallback.
+    """
+    try:
+        if _is_pdf_bytes(pdf_source):
+            return int(pdfinfo_from_bytes(bytes(pdf_source))["Pages"])
+        return int(pdfinfo_from_path(pdf_source)["Pages"])
+    except Exception:
+        try:
+            with open_pdf(pdf_source) as doc:
+                return len(doc)
+        except Exception as e:
+            logger.error(f"Failed to read page count of PDF: {e}")
+            return None
+
+
+def render_page(pdf_source, page_number, dpi=PDF_RENDER_DPI):
+    """
+    Returns a single PDF page (1-based) of a PDF path or bytes as a PIL image.
+    Scanned pages are taken from their embedded image; other pages are rendered with
+    poppler first and PyMuPDF as a fallback, like PassportExtractor.process_pdf.
+    """
+    _, image = next(_render_pages(pdf_source, [page_number], dpi))
+    if image is None:
+        raise RuntimeError(f"could not render page {page_number}")
+    return image
+
+
+def embedded_page_image(doc, page_number):
+    """
+    Returns the page's content as a PIL RGB image when the page is a single embedded image
+    covering it, as scanners produce, decoded from the image stream at native resolution.
+    Returns None for any other page (several images, masks, rotated or mirrored
+    placement, other drawing operations, CMYK, ...), which then has to be rendered.
+    """
+    page = doc.load_page(page_number - 1)
+    images = page.get_images(full=True)
+    if len(images) != 1 or images[0][1]:
+        return None
+    xref, name = images[0][0], images[0][7]
+
+    # The placement is read from the content stream itself: PyMuPDF's image bbox
+    # functions run the page through a device, which decodes the image
+    content = b" ".join(doc.xref_stream(x) or b"" for x in page.get_contents())
+    match = _SINGLE_IMAGE_CONTENT.match(_EMPTY_GROUP.sub(b" ", _INVISIBLE_TEXT.sub(b" ", content)))
+    if not match or match.group(7).decode('latin-1') != name:
+        return None
+    a, b, c, d, e, f = (float(v) for v in match.groups()[:6])
+    if b or c or a <= 0 or d <= 0:
+        return None
+    box = page.mediabox
+    covered = max(0.0, min(e + a, box.x1) - max(e, box.x0)) * max(0.0, min(f + d, box.y1) - max(f, box.y0))
+    if covered < _MIN_PAGE_COVERAGE * box.width * box.height:
+        return None
+
+    try:
+        image = Image.open(io.BytesIO(doc.extract_image(xref)['image']))
+        if image.mode not in _EXTRACTABLE_MODES:
+            return None
+        image = image.convert("RGB")
+    except Exception as e:
+        logger.warning(f"Could not decode the image of page {page_number}, rendering it instead: {e}")
+        return None
+    if page.rotation:
+        # /Rotate turns the page clockwise for display
+        image = image.rotate(-page.rotation, expand=True)
+    return image
+
+
+def _render_pages(pdf_source, page_numbers, dpi=PDF_RENDER_DPI):
+    """
+    Produces the given pages one at a time, yielding (page_number, image).
+    Pages that are a single embedded image are extracted directly (see
+    embedded_page_image); other pages are rendered at `dpi` with poppler, or with
+    PyMuPDF when poppler fails on the page (for every later page too once poppler turns
+    out not to be installed). A page that fails yields (page_number, None).
+    """
+    try:
+        doc = open_pdf(pdf_source)
+    except Exception as e:
+        logger.warning(f"PyMuPDF could not open the PDF, rendering every page with poppler: {e}")
+        doc = None
+    use_poppler = True
+    try:
+        for page_number in page_numbers:
+            image = None
+            if doc is not None:
+                with metrics.stage('pdf_extract'):
+                    try:
+                        image = embedded_page_image(doc, page_number)
+                    except Exception as e:
+                        logger.warning(f"Could not inspect page {page_number} for an embedded image: {e}")
+            if image is None:
+                with metrics.stage('pdf_render'):
+                    if use_poppler:
+                        try:
+                            if _is_pdf_bytes(pdf_source):
+                                pages = convert_from_bytes(bytes(pdf_source), dpi=dpi,
+                                                           first_page=page_number, last_page=page_number)
+                            else:
+                                pages = convert_from_path(pdf_source, dpi=dpi,
+                                                          first_page=page_number, last_page=page_number)
+                            image = pages[0] if pages else None
+                        except (PDFInfoNotInstalledError, FileNotFoundError) as e:
+                            logger.warning(f"poppler is not installed, rendering pages with PyMuPDF: {e}")
+                            use_poppler = False
+                        except Exception as e:
+                            logger.warning(f"poppler could not render page {page_number}, trying PyMuPDF: {e}")
+                    if image is None and doc is not None:
+                        try:
+                            pix = doc.load_page(page_number - 1).get_pixmap(dpi=dpi)
+                            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                        except Exception as e:
+                            logger.error(f"Failed to render page {page_number}: {e}")
+            yield page_number, image
+    finally:
+        if doc is not None:
+            doc.close()
+
+
+def iter_pages(pdf_source, page_numbers=None, prefetch=PDF_PREFETCH_PAGES):
+    """
+    Yields (page_number, PIL image or None) for the requested pages (default: all), in order.
+    Only a bounded window of pages is held in memory: a background thread renders
+    up to `prefetch` pages ahead while the caller works on the current one.
+    """
+    if page_numbers is None:
+        page_count = count_pages(pdf_source)
+        if not page_count:
+            return
+        page_numbers = range(1, page_count + 1)
+
+    if prefetch < 1:
+        yield from _render_pages(pdf_source, page_numbers)
+        return
+
+    ready = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def offer(item):
+        # Wait for room, but give up promptly if the consumer went away
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in _render_pages(pdf_source, page_numbers):
+                if not offer(item):
+                    return
+        except Exception as e:
+            logger.error(f"Failed to render PDF: {e}")
+        offer(done)
+
+    producer = threading.Thread(target=produce, name="pdf-page-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from src.utils import setup_logger
+from config.settings import READER_POOL_SIZE, READER_TORCH_THREADS, READER_CHECKOUT_TIMEOUT
+
+logger = setup_logger(__name__)
+
+
+class ReaderPool:
+    """
+    A bounded pool of up to `size` OCR readers (made by `factory` on demand) shared by
+    the threads of one process. Each reader is used by one caller at a time: callers
+    check one out, and when all are busy they wait their turn, first come first served.
+
+    torch only has a process-wide intra-op thread count, so `torch_threads` is applied to
+    the whole process when the first reader is created; by default, with more than one
+    reader, the cores are split between them so concurrent readers do not oversubscribe
+    the machine. A pool of one reader leaves torch's setting alone.
+    """
+
+    def __init__(self, factory, size=READER_POOL_SIZE, torch_threads=READER_TORCH_THREADS):
+        if size < 1:
+            raise ValueError("reader pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.torch_threads = torch_threads
+        if self.torch_threads is None and size > 1:
+            self.torch_threads = max(1, (os.cpu_count() or 1) // size)
+        self._readers = []
+        self._idle = []
+        self._creating = 0
+        self._queue = deque()  # waiting callers, in arrival order
+        self._cond = threading.Condition()
+
+    def _create(self):
+        if self.torch_threads:
+            import torch
+
+            torch.set_num_threads(self.torch_threads)
+        logger.info(f"Creating OCR reader {len(self._readers) + self._creating} of {self.size}...")
+        return self.factory()
+
+    def _add(self, reader):
+        with self._cond:
+            self._creating -= 1
+            if reader is not None:
+                self._readers.append(reader)
+            else:
+                # Creation failed: its slot is free again for a waiting caller
+                self._cond.notify_all()
+
+    def checkout(self, timeout=READER_CHECKOUT_TIMEOUT):
+        """
+        Returns a reader for the caller's exclusive use, creating one if the pool has room.
+        Raises TimeoutError if none is free within `timeout` seconds (None: wait forever).
+        Every reader checked out must be given back with checkin (see `reader`).
+        """
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                ready = self._cond.wait_for(
+                    lambda: self._queue[0] is ticket
+                    and (self._idle or len(self._readers) + self._creating < self.size),
+                    timeout)
+                if not ready:
+                    raise TimeoutError(f"no OCR reader free within {timeout} seconds")
+                if self._idle:
+                    return self._idle.pop()
+                self._creating += 1
+            finally:
+                self._queue.remove(ticket)
+                # The next caller in line may be able to go too
+                self._cond.notify_all()
+
+        # Models load for seconds; other callers can get idle readers meanwhile
+        reader = None
+        try:
+            reader = self._create()
+        finally:
+            self._add(reader)
+        return reader
+
+    def checkin(self, reader):
+        """Returns a reader to the pool and wakes the next waiting caller."""
+        with self._cond:
+            self._idle.append(reader)
+            self._cond.notify_all()
+
+    @contextmanager
+    def reader(self, timeout=READER_CHECKOUT_TIMEOUT):
+        """Context manager checking a reader out for the duration of the block."""
+        reader = self.checkout(timeout)
+        try:
+            yield reader
+        finally:
+            self.checkin(reader)
+
+    @property
+    def primary(self):
+        """
+        The first reader, created if needed, without checking it out: for callers that
+        only want the models loaded or use the reader from a single thread.
+        """
+        if not self._readers:
+            self.checkin(self.checkout())
+        return self._readers[0]
+
+    def warm(self):
+        """Creates every reader of the pool now rather than on first use."""
+        readers = [self.checkout() for _ in range(self.size)]
+        for reader in readers:
+            self.checkin(reader)
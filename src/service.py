@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import queue
+import stat
+import errno
+import socket
+import threading
+import socketserver
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.validators import validate_passport_data
+from src.metrics import registry as metrics
+from src.utils import setup_logger
+from config.settings import (
+    SERVICE_MAX_QUEUE,
+    SERVICE_MAX_BATCH,
+    SERVICE_BATCH_WAIT_MS,
+    SERVICE_REQUEST_TIMEOUT,
+    SERVICE_MAX_BODY_MB,
+)
+
+logger = setup_logger(__name__)
+
+
+class ServiceOverloaded(Exception):
+    """Raised when the request queue is full."""
+
+
+def _is_pdf(data):
+    return data[:5] == b'%PDF-'
+
+
+class ExtractionService:
+    """
+    Keeps one warm PassportExtractor behind a bounded request queue.
+    A single worker thread drains the queue in micro-batches: requests that arrive
+    within SERVICE_BATCH_WAIT_MS of each other (up to SERVICE_MAX_BATCH) are processed
+    together, so their images share batched recognition calls (get_data_batch).
+    """
+
+    def __init__(self, extractor, max_queue=SERVICE_MAX_QUEUE, max_batch=SERVICE_MAX_BATCH,
+                 batch_wait_ms=SERVICE_BATCH_WAIT_MS):
+        self.extractor = extractor
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._processed = 0
+        self._rejected = 0
+        self._started = time.time()
+        self._worker = threading.Thread(target=self._run, name="extraction-service", daemon=True)
+
+    def start(self, warm=True):
+        """Starts the worker thread; with warm=True the OCR models are loaded first."""
+        if warm:
+            # Touching the reader loads the models now instead of on the first request
+            self.extractor.reader
+        self._worker.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._worker.join(timeout=5)
+
+    def submit(self, data, filename=None):
+        """
+        Queues an image or PDF (raw bytes) for extraction and returns a Future
+        resolving to a list of data dictionaries. Raises ServiceOverloaded when the queue is full.
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((data, filename, future))
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise ServiceOverloaded("request queue is full")
+        return future
+
+    def health(self):
+        """Returns a status dictionary with queue depth and counters."""
+        with self._stats_lock:
+            return {
+                'status': 'ok' if self._worker.is_alive() else 'stopped',
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'in_flight': self._in_flight,
+                'processed': self._processed,
+                'rejected': self._rejected,
+                'uptime_seconds': round(time.time() - self._started, 1),
+            }
+
+    def _next_batch(self):
+        """Blocks for one request, then gathers more that arrive within the batching window."""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already waiting
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            with self._stats_lock:
+                self._in_flight = len(batch)
+            try:
+                self._process(batch)
+            finally:
+                with self._stats_lock:
+                    self._in_flight = 0
+                    self._processed += len(batch)
+
+    def _process(self, batch):
+        images = [item for item in batch if not _is_pdf(item[0])]
+        pdfs = [item for item in batch if _is_pdf(item[0])]
+
+        if images:
+            try:
+                results = self.extractor.get_data_batch([data for data, _, _ in images],
+                                                        [name for _, name, _ in images])
+                for (_, _, future), result in zip(images, results):
+                    future.set_result([result] if result else [])
+            except Exception as e:
+                logger.error(f"Batch of {len(images)} images failed: {e}")
+                for _, _, future in images:
+                    future.set_exception(e)
+
+        for data, name, future in pdfs:
+            try:
+                future.set_result(self.extractor.process_pdf(data, source_name=name))
+            except Exception as e:
+                logger.error(f"PDF {name or ''} failed: {e}")
+                future.set_exception(e)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end: POST /extract with the file as the body, GET /health, GET /metrics (Prometheus)."""
+
+    server_version = "PassportOCR"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        metrics.inc('http_responses', status=status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, self.server.service.health())
+        elif path == '/metrics':
+            self._send(200, metrics.render_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/extract':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {'error': 'empty request body'})
+            return
+        if length > SERVICE_MAX_BODY_MB * 1024 * 1024:
+            self._send_json(413, {'error': f'file larger than {SERVICE_MAX_BODY_MB} MB'})
+            return
+        data = self.rfile.read(length)
+        filename = parse_qs(url.query).get('filename', [None])[0]
+
+        try:
+            future = self.server.service.submit(data, filename)
+        except ServiceOverloaded:
+            self._send_json(503, {'error': 'server overloaded, retry later'}, {'Retry-After': '1'})
+            return
+
+        try:
+            with metrics.stage('service_request'):
+                results = future.result(timeout=SERVICE_REQUEST_TIMEOUT)
+        except FutureTimeout:
+            self._send_json(504, {'error': 'extraction timed out'})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        for res in results:
+            errors = validate_passport_data(res)
+            if errors:
+                res['validation_errors'] = "; ".join(errors)
+        self._send_json(200, {'results': results})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects an (host, port) style client address
+        return request, ('unix', 0)
+
+
+def _remove_stale_socket(path):
+    """
+    Removes the socket file a previous server left at `path`. Raises if `path` is
+    something other than a socket, or a socket a running server still accepts on.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket, refusing to replace it", path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            # Nobody listening: left over from a server that did not shut down cleanly
+            os.remove(path)
+            return
+    raise OSError(errno.EADDRINUSE, "A server is already listening on this socket", path)
+
+
+def make_server(service, host='127.0.0.1', port=0, socket_path=None):
+    """
+    Creates an HTTP server in front of an ExtractionService, listening on
+    host:port or, when socket_path is given, on a Unix domain socket.
+    """
+    if socket_path:
+        _remove_stale_socket(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.service = service
+    return server
+
+
+def serve(extractor, host='127.0.0.1', port=0, socket_path=None):
+    """Runs the extraction service until interrupted."""
+    service = ExtractionService(extractor)
+    logger.info("Loading OCR models...")
+    service.start(warm=True)
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or "http://%s:%d" % server.server_address[:2]
+    logger.info(f"Serving on {where} (POST /extract, GET /health, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down.")
+    finally:
+        server.server_close()
+        service.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+
+def line_boxes(mask, min_aspect, min_width, min_height=1):
+    """
+    Finds horizontal text lines in an ink mask: characters are smeared horizontally into
+    blobs, and the blobs at least `min_aspect` times wider than tall, `min_width` pixels
+    wide and `min_height` pixels tall are returned as boxes (x, y, w, h).
+    """
+    h, w = mask.shape
+    smeared = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((1, max(3, w // 50)), np.uint8))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(smeared)
+    return [(x, y, bw, bh) for x, y, bw, bh, _ in stats[1:]
+            if bw >= min_aspect * bh and bw >= min_width and bh >= min_height]
+
+
+def split_lines(mask, min_height=4, row_ink=0.0, descent=0.0):
+    """
+    Splits a text region into lines by its horizontal projection profile.
+    Returns (top, bottom, ink) per line at least `min_height` rows tall, top to bottom.
+    Rows holding less than `row_ink` of a line's densest row are trimmed off its top and
+    bottom (e.g. the tail of a Q), then the bottom is extended by `descent` of the line's
+    height, so that tails are kept at the same scale on every line.
+    """
+    rows = mask.sum(axis=1)
+    if not rows.any():
+        return []
+    on = np.concatenate([[False], rows > 0, [False]])
+    edges = np.flatnonzero(on[1:] != on[:-1])
+    lines = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        band = rows[start:end]
+        dense = np.flatnonzero(band >= row_ink * band.max())
+        top, bottom = start + dense[0], start + dense[-1] + 1
+        if bottom - top >= min_height:
+            bottom = min(bottom + int(round(descent * (bottom - top))), len(rows))
+            lines.append((top, bottom, int(band.sum())))
+    return lines
@@ -54,6 +54,41 @@ def clean_mrz_line(line: str) -> str:
         line += "<" * (44 - len(line))
     return line[:44]
 
+def mrz_check_digit(field):
+    """Computes the ICAO 9303 check digit (weights 7, 3, 1) of an MRZ field."""
+    total = 0
+    for i, c in enumerate(field):
+        if c.isdigit():
+            value = int(c)
+        elif c.isalpha():
+            value = ord(c.upper()) - ord('A') + 10
+        else:
+            value = 0  # '<' filler
+        total += value * (7, 3, 1)[i % 3]
+    return str(total % 10)
+
+def td3_check_digits_valid(line2):
+    """
+    Returns True if every check digit in the second line of a TD3 (passport) MRZ is correct:
+    document number, date of birth, expiration date, personal number and the composite.
+    """
+    if not line2 or len(line2) < 44:
+        return False
+    checks = [
+        (line2[0:9], line2[9]),
+        (line2[13:19], line2[19]),
+        (line2[21:27], line2[27]),
+        (line2[28:42], line2[42]),
+        (line2[0:10] + line2[13:20] + line2[21:43], line2[43]),
+    ]
+    for field, digit in checks:
+        # An empty optional field may carry '<' instead of a check digit
+        if digit == '<' and not field.strip('<'):
+            continue
+        if mrz_check_digit(field) != digit:
+            return False
+    return True
+
 def get_country_name(country_code):
     """Resolves 3-letter country code to full name."""
     country_code = str(country_code).upper()
@@ -0,0 +1,197 @@
+import os
+import time
+import queue
+import threading
+
+from src.validators import validate_passport_data
+from src.metrics import registry as metrics
+from src.utils import setup_logger
+from config.settings import ALLOWED_EXTENSIONS, WATCH_SETTLE_SECONDS, WATCH_POLL_SECONDS
+
+logger = setup_logger(__name__)
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+class FolderWatcher:
+    """
+    Watches a folder for new or modified passport scans and extracts them with one warm
+    PassportExtractor, writing each record to `writer` (a formats.RecordWriter) right away.
+
+    A file is only picked up once its size and mtime have stopped changing for
+    `settle_seconds`, so scans that are still being copied in are not read half-written.
+    A file is processed again only if its size or mtime changed since it was last processed.
+    With a `manifest` (a manifest.JobManifest), processed files are recorded in it, so a
+    restarted watcher skips the files an earlier run already wrote out; failed files are
+    retried.
+    """
+
+    def __init__(self, extractor, input_dir, writer, recursive=True,
+                 settle_seconds=WATCH_SETTLE_SECONDS, poll_seconds=WATCH_POLL_SECONDS, manifest=None):
+        self.extractor = extractor
+        self.input_dir = os.path.abspath(input_dir)
+        self.writer = writer
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.manifest = manifest
+        self.processed_count = 0
+
+        self._lock = threading.Lock()
+        self._pending = {}    # path -> [last stat, time it last changed, time first seen]
+        # path -> stat when processed
+        self._processed = manifest.done_inputs() if manifest is not None else {}
+        self._ready = queue.Queue()
+        self._stop = threading.Event()
+        self._observer = None
+        self._threads = []
+
+    def _is_candidate(self, path):
+        name = os.path.basename(path)
+        return not name.startswith('.') and os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS
+
+    def notify(self, path):
+        """Registers a created/modified file; it is queued once it has settled."""
+        if not self._is_candidate(path):
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                self._pending[path] = [_stat(path), now, now]
+            else:
+                entry[1] = now
+
+    def scan_existing(self):
+        """Queues files already in the folder (they still go through the settle check)."""
+        for root, dirs, files in os.walk(self.input_dir):
+            for name in files:
+                self.notify(os.path.join(root, name))
+            if not self.recursive:
+                break
+
+    def _check_pending(self):
+        """Moves files whose size and mtime have been stable for settle_seconds to the ready queue."""
+        now = time.monotonic()
+        with self._lock:
+            for path, entry in list(self._pending.items()):
+                stat = _stat(path)
+                if stat is None:
+                    # Deleted or renamed away before it settled
+                    del self._pending[path]
+                    continue
+                if stat != entry[0]:
+                    entry[0], entry[1] = stat, now
+                    continue
+                if now - entry[1] < self.settle_seconds:
+                    continue
+                del self._pending[path]
+                if self._processed.get(path) == stat:
+                    continue
+                self._ready.put((path, stat, entry[2]))
+
+    def _debounce_loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            self._check_pending()
+
+    def _process(self, path, stat, first_seen):
+        name = os.path.relpath(path, self.input_dir)
+        logger.info(f"Processing {name}")
+        try:
+            if os.path.splitext(path)[1].lower() == '.pdf':
+                results = list(self.extractor.iter_pdf(path, source_name=name))
+            else:
+                result = self.extractor.get_data(path, source_name=name)
+                results = [result] if result else []
+        except Exception as e:
+            logger.error(f"Failed to process {name}: {e}")
+            results, error = [], str(e)
+        else:
+            error = None
+
+        for res in results:
+            errors = validate_passport_data(res)
+            if errors:
+                res['validation_errors'] = "; ".join(errors)
+            self.writer.write(res)
+        self.writer.flush()
+
+        if self.manifest is not None:
+            self.manifest.record_input(path, *stat, error=error)
+        with self._lock:
+            self._processed[path] = stat
+        self.processed_count += 1
+        # From the first file event to the records being on disk
+        metrics.observe('watch_latency', time.monotonic() - first_seen)
+        logger.info(f"{name}: {len(results)} record(s) written.")
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            try:
+                path, stat, first_seen = self._ready.get(timeout=self.poll_seconds)
+            except queue.Empty:
+                continue
+            self._process(path, stat, first_seen)
+
+    def start(self, process_existing=False, warm=True):
+        """Starts watching. With warm=True the OCR models are loaded before the first file arrives."""
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    watcher.notify(event.src_path)
+
+            def on_moved(self, event):
+                # Scanners often write to a temporary name and rename when done
+                if not event.is_directory:
+                    watcher.notify(event.dest_path)
+
+        if warm:
+            self.extractor.reader
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), self.input_dir, recursive=self.recursive)
+        self._observer.start()
+        if process_existing:
+            self.scan_existing()
+
+        self._threads = [
+            threading.Thread(target=self._debounce_loop, name="watch-debounce", daemon=True),
+            threading.Thread(target=self._work_loop, name="watch-worker", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Watching {self.input_dir} for new scans...")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        for thread in self._threads:
+            thread.join(timeout=30)
+
+    def run_forever(self):
+        """Blocks until interrupted (Ctrl+C)."""
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Stopping watcher.")
+        finally:
+            self.stop()
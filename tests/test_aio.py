@@ -0,0 +1,70 @@
+import unittest
+import asyncio
+import threading
+import time
+from benchmarks.synthetic import generate_pdf
+from src.extractor import PassportExtractor
+
+class TestAsyncAPI(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.extractor = PassportExtractor(use_gpu=False, mrz_prefilter=False)
+        self.addCleanup(self.extractor.close)
+        self.calls = []
+        self.release = threading.Event()
+
+        def get_data(source, source_name=None):
+            self.calls.append(source)
+            self.release.wait(5)
+            return {'surname': 'DOE', 'source_file': source_name}
+
+        self.extractor.get_data = get_data
+
+    async def test_identical_inputs_share_one_extraction(self):
+        first = asyncio.ensure_future(self.extractor.aget_data(b"same", "a.png"))
+        second = asyncio.ensure_future(self.extractor.aget_data(b"same", "a.png"))
+        other = asyncio.ensure_future(self.extractor.aget_data(b"other", "b.png"))
+        await asyncio.sleep(0.1)
+        self.release.set()
+        results = await asyncio.gather(first, second, other)
+
+        self.assertEqual(sorted(self.calls), [b"other", b"same"])
+        self.assertEqual(results[0], results[1])
+        # Every awaiter gets its own copy
+        self.assertIsNot(results[0], results[1])
+
+    async def test_timeout_drops_queued_work(self):
+        """With one worker busy, a timed-out call never runs; the event loop stays responsive."""
+        busy = asyncio.ensure_future(self.extractor.aget_data(b"busy"))
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.extractor.aget_data(b"queued", timeout=0.1)
+        self.assertLess(time.monotonic() - start, 1)
+
+        await asyncio.sleep(0.05)
+        self.release.set()
+        await busy
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.calls, [b"busy"])
+
+    async def test_pdf_pages_stream_and_stop_early(self):
+        pdf_bytes, _ = generate_pdf(3)
+        read = []
+
+        def page_result(pdf_digest, page_number, load_page, name):
+            read.append(page_number)
+            return {'page_number': page_number, 'mrz_full_string': ''}
+
+        self.extractor._page_result = page_result
+        pages = [n async for n, _ in self.extractor.aiter_pdf_pages(pdf_bytes)]
+        self.assertEqual(pages, [1, 2, 3])
+        self.assertEqual(len(await self.extractor.aprocess_pdf(pdf_bytes)), 3)
+
+        read.clear()
+        async for page_number, _ in self.extractor.aiter_pdf_pages(pdf_bytes):
+            break
+        await asyncio.sleep(0.1)
+        self.assertEqual(read, [1])
+
+if __name__ == '__main__':
+    unittest.main()
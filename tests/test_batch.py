@@ -0,0 +1,50 @@
+import unittest
+import os
+import tempfile
+from PIL import Image
+from unittest import mock
+from src.batch import build_tasks, _run_pool, _with_digests
+
+def square_or_crash(task):
+    """Runs in a worker: kills it outright for 'crash', like an out-of-memory kill."""
+    if task == 'crash':
+        os._exit(1)
+    return [task * task], None
+
+class TestBuildTasks(unittest.TestCase):
+    def test_pdf_pages_are_scheduled_individually(self):
+        """Each PDF page becomes its own task; images stay whole."""
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, "bundle.pdf")
+            pages = [Image.new("RGB", (100, 150), "white") for _ in range(3)]
+            pages[0].save(pdf_path, save_all=True, append_images=pages[1:])
+
+            tasks = build_tasks([pdf_path, "scan.png"])
+
+            self.assertEqual(tasks, [(pdf_path, 1), (pdf_path, 2), (pdf_path, 3), ("scan.png", None)])
+            self.assertEqual(build_tasks([pdf_path], split_pdfs=False), [(pdf_path, None)])
+
+    def test_each_pdf_is_hashed_once(self):
+        tasks = [("a.pdf", 1), ("a.pdf", 2), ("scan.png", None), ("b.pdf", 1)]
+        with mock.patch('src.batch.hash_source', side_effect=lambda path: f"#{path}") as hash_source:
+            work = list(_with_digests(tasks))
+        self.assertEqual(work, [("a.pdf", 1, "#a.pdf"), ("a.pdf", 2, "#a.pdf"), ("scan.png", None, None),
+                                ("b.pdf", 1, "#b.pdf")])
+        self.assertEqual(hash_source.call_count, 2)
+
+class TestRunPool(unittest.TestCase):
+    def test_dead_worker_fails_only_its_task(self):
+        """A task that kills its worker is reported; the batch goes on and the other tasks succeed."""
+        tasks = [1, 2, 'crash', 3, 4, 5, 6]
+        outcomes = list(_run_pool(tasks, 2, square_or_crash))
+
+        self.assertEqual([task for task, _, _ in outcomes], tasks)
+        failed = [(task, error) for task, _, error in outcomes if error]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0][0], 'crash')
+        self.assertTrue(failed[0][1].startswith("worker failure"))
+        self.assertEqual([results for task, results, _ in outcomes if task != 'crash'],
+                         [[1], [4], [9], [16], [25], [36]])
+
+if __name__ == '__main__':
+    unittest.main()
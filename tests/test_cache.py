@@ -0,0 +1,76 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from unittest import mock
+from src import ocr_backends
+from src.cache import ResultCache, hash_source, options_fingerprint
+from src.extractor import PassportExtractor
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmp.name, "results.sqlite"), max_entries=2, max_age_days=30)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_round_trip_and_miss(self):
+        """Stored dictionaries come back unchanged; cached None is distinct from a miss."""
+        key = ResultCache.make_key("abc", "page1")
+        self.assertIs(self.cache.get(key), ResultCache.MISS)
+        self.cache.put(key, {"surname": "ERIKSSON", "rotation_angle": 90})
+        self.assertEqual(self.cache.get(key), {"surname": "ERIKSSON", "rotation_angle": 90})
+
+        self.cache.put("empty", None)
+        self.assertIsNone(self.cache.get("empty"))
+
+    def test_evicts_least_recently_used(self):
+        for key in ("a", "b", "c"):
+            self.cache.put(key, {})
+        self.cache.get("a")
+        self.cache.evict()
+        self.assertEqual(len(self.cache), 2)
+
+    def test_hash_matches_for_same_content(self):
+        arr = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.assertEqual(hash_source(arr), hash_source(arr.copy()))
+        self.assertEqual(hash_source(b"pdf-bytes"), hash_source(bytearray(b"pdf-bytes")))
+        self.assertNotEqual(hash_source(arr), hash_source(arr[:2]))
+
+    def test_keys_depend_on_extractor_options(self):
+        """Extractors whose options change the results never share cache entries."""
+        self.assertEqual(options_fingerprint({"a": 1, "b": [2]}), options_fingerprint({"b": [2], "a": 1}))
+        key = lambda **options: PassportExtractor(use_gpu=False, **options)._cache_key("abc")
+        self.assertEqual(key(), key())
+        self.assertNotEqual(key(mrz_prefilter=True), key(mrz_prefilter=False))
+        self.assertNotEqual(key(quantized=True), key(quantized=False))
+        self.assertNotEqual(key(ocr_backends={'roi': ['easyocr']}), key(ocr_backends={'roi': ['template', 'easyocr']}))
+        self.assertNotEqual(key(ocr_backends={'roi': ['easyocr'], 'band': ['easyocr']}),
+                            key(ocr_backends={'roi': ['easyocr'], 'band': ['tesseract']}))
+
+    def test_ocr_failures_are_not_cached(self):
+        """A backend that raises fails the document; the next call runs the pipeline again."""
+        class BrokenBackend(ocr_backends.OCRBackend):
+            name = 'broken'
+            calls = 0
+
+            def read_lines(self, img, allowlist=None):
+                raise RuntimeError("reader pool timed out")
+
+            def read_page(self, img):
+                BrokenBackend.calls += 1
+                raise RuntimeError("reader pool timed out")
+
+        blank = np.full((400, 300, 3), 255, np.uint8)
+        with mock.patch.dict(ocr_backends.BACKENDS, broken=lambda readers: BrokenBackend()):
+            extractor = PassportExtractor(use_gpu=False, cache=self.cache,
+                                          ocr_backends={'band': ['broken'], 'page': ['broken']})
+            self.assertIsNone(extractor.get_data(blank))
+            self.assertIsNone(extractor.get_data(blank))
+        self.assertEqual(BrokenBackend.calls, 2)
+        self.assertEqual(len(self.cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
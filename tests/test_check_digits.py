@@ -0,0 +1,32 @@
+import unittest
+from src.utils import mrz_check_digit, td3_check_digits_valid
+from src.fallback_mrz import FallbackMRZ
+
+# ICAO 9303 specimen passport
+LINE1 = "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+LINE2 = "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+
+class TestCheckDigits(unittest.TestCase):
+    def test_check_digit(self):
+        self.assertEqual(mrz_check_digit("L898902C3"), "6")
+        self.assertEqual(mrz_check_digit("740812"), "2")
+        self.assertEqual(mrz_check_digit("<<<<<<<<<<<<<<"), "0")
+
+    def test_td3_line(self):
+        self.assertTrue(td3_check_digits_valid(LINE2))
+        # A single misread digit breaks the date of birth and composite checks
+        self.assertFalse(td3_check_digits_valid(LINE2.replace("7408122", "7408322")))
+        self.assertFalse(td3_check_digits_valid(LINE2[:40]))
+        self.assertFalse(td3_check_digits_valid(None))
+
+    def test_empty_personal_number_filler(self):
+        line2 = LINE2[:28] + "<" * 15 + LINE2[43]
+        line2 = line2[:43] + mrz_check_digit(line2[0:10] + line2[13:20] + line2[21:43])
+        self.assertTrue(td3_check_digits_valid(line2))
+
+    def test_fallback_mrz_validity(self):
+        self.assertTrue(FallbackMRZ(LINE1, LINE2).valid)
+        self.assertFalse(FallbackMRZ(LINE1, LINE2.replace("L898", "L893")).valid)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
 import os
+import random
+from types import SimpleNamespace
+from benchmarks.synthetic import generate_pdf, random_identity, td3_lines
 from src.extractor import PassportExtractor
 
 class TestPassportExtractor(unittest.TestCase):
@@ -16,5 +19,49 @@ class TestPassportExtractor(unittest.TestCase):
         from src.utils import clean_string
         self.assertEqual(clean_string("Hello 123!"), "HELLO123")
 
+    def test_pdf_stop_after_valid_mrz(self):
+        """Once N pages gave valid MRZs, the remaining pages are reported without being read."""
+        pdf_bytes, _ = generate_pdf(4)
+        extractor = PassportExtractor(use_gpu=False, pdf_stop_after=2)
+        line1, line2 = td3_lines(random_identity(random.Random(0)))
+        read = []
+
+        def page_result(pdf_digest, page_number, load_page, name):
+            read.append(page_number)
+            # Page 2 yields a record whose check digits fail, which does not count
+            return {'mrz_full_string': line1 + (line2 if page_number != 2 else line2[:-1] + "<")}
+
+        extractor._page_result = page_result
+        pages = list(extractor.iter_pdf_pages(pdf_bytes))
+        self.assertEqual(read, [1, 2, 3])
+        self.assertEqual([n for n, _ in pages], [1, 2, 3, 4])
+        self.assertIsNone(pages[3][1])
+
+    def test_pdf_page_failures_are_reported(self):
+        """A page that fails to render or process comes with an error; earlier valid pages count for stop_after."""
+        pdf_bytes, _ = generate_pdf(3)
+        extractor = PassportExtractor(use_gpu=False, pdf_stop_after=2)
+        line1, line2 = td3_lines(random_identity(random.Random(0)))
+
+        def page_result(pdf_digest, page_number, load_page, name):
+            if page_number == 1:
+                raise RuntimeError("page is corrupt")
+            return {'mrz_full_string': line1 + line2}
+
+        extractor._page_result = page_result
+        pages = list(extractor.iter_pdf_pages(pdf_bytes, already_valid=1, with_errors=True))
+        self.assertEqual([(n, error) for n, _, error in pages], [(1, "page is corrupt"), (2, None), (3, None)])
+        self.assertIsNotNone(pages[1][1])
+        # The earlier valid page and page 2 reach stop_after, so page 3 is not read
+        self.assertIsNone(pages[2][1])
+
+    def test_passporteye_raw_text_is_read(self):
+        """PassportEye's lines come from aux['raw_text'], or the deprecated aux['text'] of older versions."""
+        extractor = PassportExtractor(use_gpu=False)
+        line1, line2 = td3_lines(random_identity(random.Random(0)))
+        for field in ('raw_text', 'text'):
+            mrz = SimpleNamespace(mrz_type='TD3', valid_check_digits=[True] * 5, aux={field: f"{line1}\n{line2}\n"})
+            self.assertEqual(extractor._passporteye_lines(mrz), (line1, line2))
+
 if __name__ == '__main__':
     unittest.main()
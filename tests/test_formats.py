@@ -0,0 +1,61 @@
+import unittest
+import os
+import tempfile
+from src.formats import RecordWriter, iter_written_records, convert_to_excel, output_filename, truncate_output
+
+RECORD = {'surname': 'ERIKSSON', 'name': 'ANNA MARIA', 'passport_number': 'L898902C3',
+          'rotation_angle': 90, 'source_file': 'scan.pdf', 'page_number': 2, 'unexpected': 'dropped'}
+
+class TestRecordWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_csv_rows_follow_fixed_columns(self):
+        path = os.path.join(self.tmp.name, 'out.csv')
+        with RecordWriter(path, 'csv', columns=['surname', 'page_number', 'validation_errors']) as writer:
+            writer.write(RECORD)
+            writer.write({'surname': 'DOE'})
+        rows = list(iter_written_records(path, 'csv'))
+        self.assertEqual(rows, [{'surname': 'ERIKSSON', 'page_number': '2', 'validation_errors': ''},
+                                {'surname': 'DOE', 'page_number': '', 'validation_errors': ''}])
+
+    def test_records_are_on_disk_before_close(self):
+        path = os.path.join(self.tmp.name, 'out.jsonl')
+        writer = RecordWriter(path, 'jsonl', flush_every=1)
+        writer.write(dict(RECORD, _timings={'read_mrz': 0.5}))
+        rows = list(iter_written_records(path, 'jsonl'))
+        writer.close()
+        self.assertEqual(rows[0]['surname'], 'ERIKSSON')
+        self.assertNotIn('unexpected', rows[0])
+
+    def test_resume_truncates_and_appends(self):
+        path = os.path.join(self.tmp.name, 'out.csv')
+        with RecordWriter(path, 'csv', columns=['surname']) as writer:
+            writer.write({'surname': 'A'})
+            writer.flush()
+            committed = writer.offset
+            writer.write({'surname': 'B'})
+        truncate_output(path, committed)
+        with RecordWriter(path, 'csv', columns=['surname'], append=True) as writer:
+            writer.write({'surname': 'C'})
+        self.assertEqual([row['surname'] for row in iter_written_records(path)], ['A', 'C'])
+
+    def test_excel_conversion(self):
+        from openpyxl import load_workbook
+        csv_path = os.path.join(self.tmp.name, 'out.csv')
+        xlsx_path = os.path.join(self.tmp.name, 'out.xlsx')
+        columns = ['surname', 'rotation_angle']
+        with RecordWriter(csv_path, 'csv', columns=columns) as writer:
+            writer.write(RECORD)
+        convert_to_excel(csv_path, xlsx_path, columns=columns)
+        rows = list(load_workbook(xlsx_path).active.values)
+        self.assertEqual(rows, [('surname', 'rotation_angle'), ('ERIKSSON', 90)])
+
+    def test_output_filename(self):
+        self.assertEqual(output_filename('data/out/result', 'csv'), 'data/out/result.csv')
+        self.assertEqual(output_filename('data/out/result.csv', 'excel'), 'data/out/result.xlsx')
+        self.assertEqual(output_filename('data/out/result.jsonl', 'jsonl'), 'data/out/result.jsonl')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import io
+import numpy as np
+from PIL import Image
+from src.images import load_image, describe_source
+
+class TestLoadImage(unittest.TestCase):
+    def setUp(self):
+        self.pil_img = Image.new("RGB", (40, 20), (10, 20, 30))
+
+    def test_all_sources_decode_to_same_array(self):
+        """Paths, bytes, PIL images and arrays all load to the same RGB array."""
+        buf = io.BytesIO()
+        self.pil_img.save(buf, "PNG")
+        expected = np.asarray(self.pil_img)
+
+        for source in (buf.getvalue(), self.pil_img, expected):
+            img = load_image(source)
+            self.assertEqual(img.shape, (20, 40, 3))
+            self.assertTrue(np.array_equal(img, expected))
+
+    def test_grayscale_array_is_expanded(self):
+        img = load_image(np.zeros((5, 6), dtype=np.uint8))
+        self.assertEqual(img.shape, (5, 6, 3))
+
+    def test_describe_source(self):
+        self.assertEqual(describe_source("/tmp/scan.png"), "scan.png")
+        self.assertEqual(describe_source(b"...", "upload.jpg"), "upload.jpg")
+        self.assertEqual(describe_source(b"..."), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import os
+import sys
+import json
+import subprocess
+
+# Wall-clock budget for importing the CLI entry point and the extractor module
+IMPORT_TIME_BUDGET = 1.0
+# Modules that take seconds to import and must only load on first use
+HEAVY_MODULES = ['torch', 'easyocr', 'passporteye', 'pandas']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main, src.extractor
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+class TestImportTime(unittest.TestCase):
+    def test_startup_stays_light(self):
+        """Importing main and the extractor must not pull in the OCR/ML stack."""
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=repo_root,
+                             capture_output=True, text=True, check=True).stdout
+        report = json.loads(out.strip().splitlines()[-1])
+
+        self.assertEqual(report["loaded"], [])
+        self.assertLess(report["elapsed"], IMPORT_TIME_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
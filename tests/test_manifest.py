@@ -0,0 +1,62 @@
+import unittest
+import os
+import tempfile
+from src.manifest import JobManifest, manifest_path_for
+
+class TestJobManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.image = self._touch('a.png', b'image')
+        self.pdf = self._touch('b.pdf', b'%PDF-')
+        self.tasks = [(self.image, None), (self.pdf, 1), (self.pdf, 2), (self.pdf, 3)]
+        self.manifest = JobManifest(os.path.join(self.tmp.name, 'out.manifest.sqlite'))
+        self.addCleanup(self.manifest.close)
+
+    def _touch(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_resume_skips_finished_files_and_pages(self):
+        self.assertEqual(self.manifest.plan(self.tasks), self.tasks)
+        self.manifest.complete(self.image, None, 100)
+        self.manifest.complete(self.pdf, 1, 150)
+
+        self.assertEqual(self.manifest.committed_offset(), 150)
+        self.assertEqual(self.manifest.plan(self.tasks), [(self.pdf, 2), (self.pdf, 3)])
+
+        self.manifest.complete(self.pdf, 2, 200)
+        self.manifest.complete(self.pdf, 3, 250)
+        self.assertEqual(self.manifest.plan(self.tasks), [])
+        self.assertEqual(self.manifest.status_counts(), {'done': 2})
+
+    def test_valid_pages_are_counted(self):
+        self.manifest.plan(self.tasks)
+        self.manifest.complete(self.pdf, 1, 150, valid=True)
+        self.manifest.complete(self.pdf, 2, 200)
+        self.assertEqual(self.manifest.valid_pages(self.pdf), 1)
+        self.assertEqual(self.manifest.valid_pages(self.image), 0)
+
+    def test_failed_and_changed_inputs_are_redone(self):
+        self.manifest.plan(self.tasks)
+        self.manifest.complete(self.image, None, 100, error="unreadable")
+        self.manifest.complete(self.pdf, 1, 150)
+
+        # The PDF was replaced since the checkpoint
+        self._touch('b.pdf', b'%PDF-1.7 changed')
+        self.assertEqual(self.manifest.plan(self.tasks), self.tasks)
+
+    def test_reset(self):
+        self.manifest.plan(self.tasks)
+        self.manifest.complete(self.image, None, 100)
+        self.manifest.reset()
+        self.assertEqual(self.manifest.committed_offset(), 0)
+        self.assertEqual(self.manifest.plan(self.tasks), self.tasks)
+
+    def test_manifest_path(self):
+        self.assertEqual(manifest_path_for('/out/passport_data.xlsx'), '/out/passport_data.manifest.sqlite')
+
+if __name__ == '__main__':
+    unittest.main()
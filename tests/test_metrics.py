@@ -0,0 +1,66 @@
+import unittest
+import os
+import json
+import tempfile
+from src.metrics import MetricsRegistry, PrometheusFileSink, JsonlTraceSink
+
+class TestMetrics(unittest.TestCase):
+    def test_stage_timings_go_to_active_trace(self):
+        metrics = MetricsRegistry()
+        with metrics.trace() as timings:
+            with metrics.stage('read_mrz'):
+                pass
+            with metrics.stage('read_mrz'):
+                pass
+        with metrics.stage('export'):
+            pass
+        self.assertEqual(list(timings), ['read_mrz'])
+        self.assertEqual(metrics.snapshot()['stages']['read_mrz']['count'], 2)
+        self.assertEqual(metrics.snapshot()['stages']['export']['count'], 1)
+
+    def test_prometheus_text(self):
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        metrics.observe('read_mrz', 0.5)
+        metrics.inc('records', mrz_stage='passporteye')
+        text = metrics.render_prometheus()
+        self.assertIn('passport_ocr_stage_seconds_bucket{stage="read_mrz",le="0.1"} 0', text)
+        self.assertIn('passport_ocr_stage_seconds_bucket{stage="read_mrz",le="1.0"} 1', text)
+        self.assertIn('passport_ocr_stage_seconds_count{stage="read_mrz"} 1', text)
+        self.assertIn('passport_ocr_records_total{mrz_stage="passporteye"} 1', text)
+
+    def test_sinks(self):
+        metrics = MetricsRegistry()
+        with tempfile.TemporaryDirectory() as tmp:
+            prom_path = os.path.join(tmp, 'metrics.prom')
+            trace_path = os.path.join(tmp, 'trace.jsonl')
+            trace = JsonlTraceSink(trace_path)
+            metrics.add_sink(PrometheusFileSink(prom_path))
+            metrics.add_sink(trace)
+
+            # A record produced in a worker process, carrying its timings
+            metrics.absorb({'source_file': 'a.png', 'mrz_stage': 'easyocr_roi', 'rotation_angle': 90,
+                            '_timings': {'read_mrz': 0.2, 'easyocr_roi': 0.4}})
+            metrics.flush()
+            trace.close()
+
+            with open(trace_path) as f:
+                event = json.loads(f.readline())
+            self.assertEqual(event['source_file'], 'a.png')
+            self.assertEqual(event['timings']['easyocr_roi'], 0.4)
+            with open(prom_path) as f:
+                text = f.read()
+            self.assertIn('passport_ocr_rotation_total{angle="90"} 1', text)
+            self.assertIn('passport_ocr_stage_seconds_count{stage="easyocr_roi"} 1', text)
+
+    def test_absorb_counts_real_outcomes(self):
+        """Failed and empty worker tasks are counted as such, not as extracted records."""
+        metrics = MetricsRegistry()
+        metrics.absorb({'source_file': 'a.png', 'mrz_stage': 'easyocr_roi', 'rotation_angle': 0})
+        metrics.absorb(None, source_file='b.png')
+        metrics.absorb(None, outcome='error', source_file='c.pdf')
+        counters = metrics.snapshot()['counters']
+        self.assertEqual(counters['documents'], {'outcome="ok"': 1, 'outcome="no_mrz"': 1, 'outcome="error"': 1})
+        self.assertEqual(sum(counters['records'].values()), 1)
+
+if __name__ == '__main__':
+    unittest.main()
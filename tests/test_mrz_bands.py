@@ -0,0 +1,54 @@
+import unittest
+import random
+import numpy as np
+from PIL import Image, ImageDraw
+from benchmarks.synthetic import render_page, random_identity, find_monospace_font, PAGE_SIZE
+from src.mrz_bands import find_mrz_bands, has_mrz_band
+
+class TestMRZBands(unittest.TestCase):
+    def test_band_found_in_every_orientation(self):
+        """The best band is the MRZ at the bottom of the page, with the rotation that makes it upright."""
+        width, height = PAGE_SIZE
+        for rotation in (0, 90, 180, 270):
+            page = np.asarray(render_page(random_identity(random.Random(rotation)), rotation=rotation, noise=5))
+            angle, (x0, y0, x1, y1) = find_mrz_bands(page, limit=3)[0]
+            self.assertEqual(angle, (360 - rotation) % 360)
+            # The MRZ is drawn 170 to 60 px above the bottom edge and spans most of the width
+            self.assertLessEqual(y0, height - 170)
+            self.assertGreaterEqual(y1, height - 60)
+            self.assertGreater(x1 - x0, width * 0.8)
+
+    def test_blank_page_has_no_bands(self):
+        self.assertEqual(find_mrz_bands(np.full((800, 1100, 3), 240, np.uint8)), [])
+
+class TestMRZPresence(unittest.TestCase):
+    def passport_on_a4(self, rotation=0, edge=False):
+        page = Image.new("RGB", (1654, 2339), (250, 250, 250))
+        passport = render_page(random_identity(random.Random(rotation)))
+        page.paste(passport, (200, 300))
+        if edge:
+            # A dark card edge right below the MRZ, close enough to be grouped with it
+            ImageDraw.Draw(page).rectangle([180, 1150, 220 + passport.width, 1158], fill=(30, 30, 30))
+        return np.asarray(page.rotate(rotation, expand=True))
+
+    def test_passport_pages_pass(self):
+        for rotation in (0, 90, 180, 270, 4):
+            self.assertTrue(has_mrz_band(self.passport_on_a4(rotation)), rotation)
+        self.assertTrue(has_mrz_band(self.passport_on_a4(edge=True)))
+
+    def test_text_pages_are_skipped(self):
+        """Paragraphs and tables, even in a monospace font, have word gaps an MRZ does not."""
+        rng = random.Random(0)
+        words = "the of account balance statement payment date amount reference applicant".split()
+        page = Image.new("RGB", (1654, 2339), (250, 250, 250))
+        draw = ImageDraw.Draw(page)
+        font = find_monospace_font(28)
+        for row in range(40):
+            text = " ".join(rng.choice(words) for _ in range(10)) if row % 2 else \
+                f"{rng.randint(1, 31):02d}/{rng.randint(1, 12):02d}  {rng.choice(words):<12} {rng.random() * 9999:>9.2f}"
+            draw.text((150, 150 + row * 50), text, font=font, fill=(20, 20, 20))
+        self.assertFalse(has_mrz_band(np.asarray(page)))
+        self.assertFalse(has_mrz_band(np.full((2339, 1654, 3), 250, np.uint8)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from passporteye.util.geometry import RotatedBox
+from src.images import downscale, to_gray_float
+from src.mrz_locate import crop_box
+
+class TestCoarseToFine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.img = rng.integers(0, 256, (1200, 1600, 3), dtype=np.uint8)
+
+    def test_downscale_limits_longest_side(self):
+        small, factor = downscale(self.img, 400)
+        self.assertEqual(small.shape, (300, 400, 3))
+        self.assertAlmostEqual(factor, 0.25)
+        same, factor = downscale(self.img, 4000)
+        self.assertIs(same, self.img)
+        self.assertEqual(factor, 1.0)
+
+    def test_crop_matches_full_image_extraction(self):
+        """Reading a box from its crop gives the ROI extract_from_image gives on the whole image."""
+        gray = to_gray_float(self.img)
+        for angle in (np.pi / 2, np.pi / 2 - 0.05, -np.pi / 2 + 0.05):
+            box = RotatedBox([100, 130], 120, 16, angle)
+            expected = box.extract_from_image(gray, 4.0)
+            crop, shifted, scale = crop_box(self.img, box, 4.0)
+            self.assertLess(crop.size, gray.size / 4)
+            roi = shifted.extract_from_image(crop, scale)
+            self.assertEqual(roi.shape, expected.shape)
+            if angle == np.pi / 2:
+                self.assertTrue(np.allclose(roi, expected))
+
+    def test_crop_respects_max_width(self):
+        box = RotatedBox([100, 130], 120, 16, np.pi / 2)
+        crop, shifted, scale = crop_box(self.img, box, 4.0, max_width=240)
+        self.assertAlmostEqual(scale, 2.0)
+        self.assertEqual(shifted.extract_from_image(crop, scale).shape[1], (120 + 10) * 2)
+
+if __name__ == '__main__':
+    unittest.main()
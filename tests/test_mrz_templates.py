@@ -0,0 +1,65 @@
+import unittest
+import os
+import random
+import tempfile
+from unittest import mock
+import cv2
+import numpy as np
+from benchmarks.synthetic import render_page, random_identity, td3_lines, PAGE_SIZE
+from src import mrz_templates
+from src.mrz_templates import read_mrz, load_templates, MRZ_ALPHABET
+from src.ocr_backends import TemplateBackend
+from src.extractor import PassportExtractor, ROI_SIZE
+from src.fallback_mrz import FallbackMRZ
+
+def mrz_region(seed, skew=0.0):
+    """The MRZ of a synthetic page, cut and resized like PassportEye's normalized region."""
+    identity = random_identity(random.Random(seed))
+    page = np.asarray(render_page(identity, noise=8, blur=1, skew=skew, rng=random.Random(seed)).convert("L"))
+    height = page.shape[0]
+    roi = page[height - 185:height - 45, 10:PAGE_SIZE[0] - 10]
+    return cv2.resize(roi, ROI_SIZE), list(td3_lines(identity))
+
+class TestTemplateReader(unittest.TestCase):
+    def test_reads_synthetic_regions(self):
+        for seed, skew in ((0, 0.0), (1, 0.0), (2, 0.6)):
+            roi, truth = mrz_region(seed, skew)
+            lines, confidences = read_mrz(roi)
+            self.assertEqual(lines, truth, seed)
+            self.assertEqual([len(c) for c in confidences], [44, 44])
+
+    def test_damaged_character_has_lowest_confidence(self):
+        roi, truth = mrz_region(0)
+        _, clean = read_mrz(roi)
+        # Blot out the 10th character of line 2
+        ink = np.flatnonzero((roi[80:] < 128).any(axis=0))
+        pitch = (ink[-1] - ink[0]) / 43.5
+        x = int(ink[0] + 9.5 * pitch)
+        roi[85:120, x - 6:x + 6] = 0
+        _, damaged = read_mrz(roi)
+        self.assertEqual(int(np.argmin(damaged[1])), 9)
+        self.assertLess(damaged[1][9], clean[1][9])
+        self.assertEqual(TemplateBackend(min_confidence=damaged[1][9] + 0.01).read_lines(roi), [])
+
+    def test_blank_region_reads_nothing(self):
+        self.assertEqual(read_mrz(np.full((140, 1110), 230, np.uint8)), ([], []))
+
+    def test_templates_are_cached_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(mrz_templates, 'MODEL_DIR', tmp):
+            with mock.patch.object(mrz_templates, '_templates', None):
+                templates = load_templates()
+            self.assertEqual(templates.shape[0], len(MRZ_ALPHABET))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            with mock.patch.object(mrz_templates, '_templates', None), \
+                    mock.patch.object(mrz_templates, 'render_templates', side_effect=AssertionError):
+                np.testing.assert_array_equal(load_templates(), templates)
+
+    def test_template_backend_reads_before_easyocr(self):
+        roi, truth = mrz_region(1)
+        extractor = PassportExtractor(use_gpu=False, ocr_backends={'roi': ['template', 'easyocr']})
+        line1, line2, mrz = extractor._read_roi(roi, FallbackMRZ("", ""), "doc")
+        self.assertEqual([line1, line2], truth)
+        self.assertEqual(mrz.aux['stage'], 'template_roi')
+
+if __name__ == '__main__':
+    unittest.main()
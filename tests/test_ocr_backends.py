@@ -0,0 +1,94 @@
+import unittest
+import random
+from unittest import mock
+import numpy as np
+from PIL import Image, ImageDraw
+from benchmarks.synthetic import random_identity, td3_lines
+from src.fonts import find_monospace_font
+from src.ocr_backends import BACKENDS, OCRBackend, TesseractBackend, EasyOCRBackend, RECOGNIZER_HEIGHT
+from src.reader_pool import ReaderPool
+from src.extractor import PassportExtractor, MRZ_ALLOWLIST
+from src.fallback_mrz import FallbackMRZ
+
+class FixedBackend(OCRBackend):
+    """Answers every read with the same lines and counts the reads."""
+    def __init__(self, name, lines):
+        self.name = name
+        self.lines = lines
+        self.reads = 0
+
+    def read_lines(self, img, allowlist=None):
+        self.reads += 1
+        return self.lines
+
+class RecordingReader:
+    """EasyOCR stand-in recording which stages were called."""
+    character = lang_char = MRZ_ALLOWLIST
+    recognizer = converter = None
+    device = 'cpu'
+
+    def __init__(self):
+        self.calls = []
+
+    def readtext(self, img, **kwargs):
+        self.calls.append(('readtext', img, None))
+        return ["detected"]
+
+class TestOCRBackends(unittest.TestCase):
+    def setUp(self):
+        self.line1, self.line2 = td3_lines(random_identity(random.Random(0)))
+        self.cheap = FixedBackend('cheap', [self.line1, self.line2[:-1] + "<"])
+        self.good = FixedBackend('good', [self.line1, self.line2])
+        for backend in (self.cheap, self.good):
+            BACKENDS[backend.name] = lambda readers, backend=backend: backend
+            self.addCleanup(BACKENDS.pop, backend.name)
+
+    def test_later_backends_only_read_failed_regions(self):
+        extractor = PassportExtractor(use_gpu=False, ocr_backends={'roi': ['good', 'cheap']})
+        line1, line2, mrz = extractor._read_roi(np.zeros((140, 1110), np.uint8), FallbackMRZ("", ""), "doc")
+        self.assertEqual((line2, mrz.aux['stage'], self.cheap.reads), (self.line2, 'good_roi', 0))
+
+        extractor = PassportExtractor(use_gpu=False, ocr_backends={'roi': ['cheap', 'good']})
+        line1, line2, mrz = extractor._read_roi(np.zeros((140, 1110), np.uint8), FallbackMRZ("", ""), "doc")
+        self.assertEqual((line2, mrz.aux['stage'], self.cheap.reads), (self.line2, 'good_roi', 1))
+
+    def test_easyocr_reads_mrz_lines_without_the_detector(self):
+        roi = Image.new("L", (1110, 140), 235)
+        draw = ImageDraw.Draw(roi)
+        font = find_monospace_font(40)
+        draw.text((30, 20), self.line1, font=font, fill=20)
+        draw.text((30, 80), self.line2, font=font, fill=20)
+        reader = RecordingReader()
+        backend = EasyOCRBackend(ReaderPool(lambda: reader))
+
+        def get_text(character, height, width, recognizer, converter, image_list, ignore_char, **kwargs):
+            return [(i, f"line{i}", 1.0) for i, _ in image_list]
+
+        with mock.patch('easyocr.recognition.get_text', side_effect=get_text) as recognize:
+            self.assertEqual(backend.read_lines(np.asarray(roi)), ["line0", "line1"])
+        self.assertEqual(reader.calls, [])
+        # One strip per line at the recognizer's input height, read in a single batch
+        strips = [strip for _, strip in recognize.call_args.args[5]]
+        self.assertEqual([strip.shape[0] for strip in strips], [RECOGNIZER_HEIGHT] * 2)
+        self.assertEqual(recognize.call_args.kwargs['batch_size'], 2)
+
+        # Without two or three lines to split, the detector finds the text
+        self.assertEqual(backend.read_lines(np.full((140, 1110), 235, np.uint8)), ["detected"])
+        self.assertEqual(reader.calls[-1][0], 'readtext')
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PassportExtractor(use_gpu=False, ocr_backends={'roi': ['nope']})
+
+    def test_tesseract_is_restricted_to_mrz_characters(self):
+        with mock.patch('pytesseract.get_languages', return_value=['eng', 'osd']), \
+                mock.patch('pytesseract.image_to_string', return_value="P<UTOERIKSSON\n\nL898902C36UTO\n") as ocr:
+            backend = TesseractBackend(lang='ocrb')
+            lines = backend.read_lines(np.zeros((140, 1110), np.uint8), allowlist=MRZ_ALLOWLIST)
+        self.assertEqual(lines, ["P<UTOERIKSSON", "L898902C36UTO"])
+        # The OCR-B model is not installed, so the English one reads the MRZ
+        self.assertEqual(ocr.call_args.kwargs['lang'], 'eng')
+        self.assertIn("tessedit_char_whitelist=0123456789<ABCDEFGHIJKLMNOPQRSTUVWXYZ", ocr.call_args.kwargs['config'])
+
+if __name__ == '__main__':
+    unittest.main()
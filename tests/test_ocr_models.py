@@ -0,0 +1,53 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import torch
+from src.ocr_models import create_reader, quantized_recognizer_path
+
+class TinyRecognizer(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.rnn = torch.nn.LSTM(8, 8, batch_first=True)
+        self.fc = torch.nn.Linear(8, 4)
+
+    def forward(self, x):
+        return self.fc(self.rnn(x)[0])
+
+class FakeReader:
+    """easyocr.Reader stand-in: a float32 recognizer unless built with recognizer=False."""
+    def __init__(self, languages, recognizer=True, **kwargs):
+        self.kwargs = dict(kwargs, recognizer=recognizer)
+        if recognizer:
+            self.recognizer, self.converter = TinyRecognizer(), {'characters': 'ABC'}
+
+class TestOCRModels(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_dir = tmp.name
+        patcher = mock.patch('easyocr.Reader', FakeReader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_quantized_recognizer_is_cached(self):
+        x = torch.randn(1, 5, 8)
+        first = create_reader(['en'], quantized=True, model_dir=self.model_dir)
+        self.assertIn('quantized', type(first.recognizer.fc).__module__)
+        self.assertTrue(os.path.exists(quantized_recognizer_path(['en'], self.model_dir)))
+
+        # Later readers skip the float32 recognizer and load the int8 one
+        second = create_reader(['en'], quantized=True, model_dir=self.model_dir)
+        self.assertFalse(second.kwargs['recognizer'])
+        self.assertEqual(second.converter, {'characters': 'ABC'})
+        torch.testing.assert_close(second.recognizer(x), first.recognizer(x))
+
+    def test_float32_and_gpu_readers_are_not_quantized(self):
+        for kwargs in ({'quantized': False}, {'quantized': True, 'use_gpu': True}):
+            reader = create_reader(['en'], model_dir=self.model_dir, **kwargs)
+            self.assertIs(type(reader.recognizer.fc), torch.nn.Linear)
+            self.assertFalse(reader.kwargs['quantize'])
+        self.assertEqual(os.listdir(self.model_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
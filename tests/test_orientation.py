@@ -0,0 +1,18 @@
+import unittest
+import os
+import numpy as np
+from PIL import Image
+from src.orientation import estimate_rotation_order, rotate_image
+from config.settings import INPUT_DIR
+
+class TestOrientation(unittest.TestCase):
+    def test_sample_passport_rotations(self):
+        """The predicted angle undoes each 90-degree rotation of the sample passport."""
+        img = np.asarray(Image.open(os.path.join(INPUT_DIR, "passport_1.png")).convert("RGB"))
+        for angle in (0, 90, 180, 270):
+            order = estimate_rotation_order(rotate_image(img, angle))
+            self.assertEqual(sorted(order), [0, 90, 180, 270])
+            self.assertEqual(order[0], (360 - angle) % 360)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from PIL import Image
+from src.pdf_pages import count_pages, iter_pages, open_pdf, embedded_page_image, render_page
+
+class TestPdfPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "bundle.pdf")
+        pages = [Image.new("RGB", (100 + 10 * i, 150), "white") for i in range(4)]
+        pages[0].save(self.pdf_path, save_all=True, append_images=pages[1:])
+        Image.new("RGB", (50, 100), "white").save(os.path.join(self.tmp.name, "scan.png"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pages_stream_in_order(self):
+        """Pages come out one by one in order, with or without prefetching."""
+        self.assertEqual(count_pages(self.pdf_path), 4)
+        for prefetch in (0, 2):
+            numbers = [n for n, page in iter_pages(self.pdf_path, prefetch=prefetch) if page is not None]
+            self.assertEqual(numbers, [1, 2, 3, 4])
+
+    def test_selected_pages_from_bytes(self):
+        with open(self.pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        numbers = [n for n, page in iter_pages(pdf_bytes, [2, 4]) if page is not None]
+        self.assertEqual(numbers, [2, 4])
+
+    def test_scanned_pages_are_extracted_at_native_resolution(self):
+        """Single-image pages come straight from the image stream, honouring /Rotate."""
+        with open_pdf(self.pdf_path) as doc:
+            self.assertEqual(embedded_page_image(doc, 2).size, (110, 150))
+            doc[1].set_rotation(90)
+            self.assertEqual(embedded_page_image(doc, 2).size, (150, 110))
+
+    def test_searchable_scan_is_extracted(self):
+        """An invisible OCR text layer over the scan does not prevent extraction."""
+        import fitz
+        with fitz.open() as doc:
+            page = doc.new_page(width=72, height=144)
+            page.insert_image(page.rect, filename=self.pdf_path.replace("bundle.pdf", "scan.png"))
+            page.insert_text((10, 20), "P<UTO", render_mode=3)
+            pdf_bytes = doc.tobytes()
+        with open_pdf(pdf_bytes) as doc:
+            self.assertEqual(embedded_page_image(doc, 1).size, (50, 100))
+
+    def test_vector_pages_are_rendered(self):
+        import fitz
+        with fitz.open() as doc:
+            doc.new_page(width=72, height=144).insert_text((10, 20), "P<UTO")
+            pdf_bytes = doc.tobytes()
+        with open_pdf(pdf_bytes) as doc:
+            self.assertIsNone(embedded_page_image(doc, 1))
+        self.assertEqual(render_page(pdf_bytes, 1, dpi=100).size, (100, 200))
+
+    def test_poppler_failure_only_affects_its_page(self):
+        """A page poppler fails on is rendered with PyMuPDF; later pages still go to poppler."""
+        import fitz
+        with fitz.open() as doc:
+            for _ in range(3):
+                doc.new_page(width=72, height=144).insert_text((10, 20), "P<UTO")
+            pdf_bytes = doc.tobytes()
+
+        def convert(pdf, dpi, first_page, last_page):
+            if first_page == 1:
+                raise RuntimeError("pdftoppm timed out")
+            return [Image.new("RGB", (10, 20))]
+
+        with mock.patch('src.pdf_pages.convert_from_bytes', side_effect=convert) as poppler:
+            sizes = [page.size for _, page in iter_pages(pdf_bytes, prefetch=0)]
+        self.assertEqual(sizes, [(200, 400), (10, 20), (10, 20)])
+        self.assertEqual(poppler.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
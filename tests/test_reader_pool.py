@@ -0,0 +1,53 @@
+import unittest
+import threading
+import time
+from src.reader_pool import ReaderPool
+
+class TestReaderPool(unittest.TestCase):
+    def test_readers_are_created_on_demand_up_to_size(self):
+        made = []
+        pool = ReaderPool(lambda: made.append(object()) or made[-1], size=2, torch_threads=0)
+        first, second = pool.checkout(), pool.checkout()
+        self.assertIsNot(first, second)
+        with self.assertRaises(TimeoutError):
+            pool.checkout(timeout=0.05)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(), first)
+        self.assertEqual(len(made), 2)
+
+    def test_waiting_callers_are_served_in_arrival_order(self):
+        pool = ReaderPool(object, size=1, torch_threads=0)
+        reader = pool.checkout()
+        order = []
+
+        def use(i):
+            with pool.reader():
+                order.append(i)
+
+        threads = []
+        for i in range(4):
+            threads.append(threading.Thread(target=use, args=(i,)))
+            threads[-1].start()
+            # Let each caller queue up before the next one arrives
+            time.sleep(0.05)
+        pool.checkin(reader)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, [0, 1, 2, 3])
+
+    def test_failed_creation_frees_its_slot(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("model download failed")
+            return object()
+
+        pool = ReaderPool(factory, size=1, torch_threads=0)
+        with self.assertRaises(RuntimeError):
+            pool.checkout()
+        self.assertIsNotNone(pool.checkout(timeout=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.request
+import urllib.error
+from src.service import ExtractionService, ServiceOverloaded, make_server
+
+class FakeExtractor:
+    """Stands in for PassportExtractor; records how requests were batched."""
+    def __init__(self):
+        self.reader = object()
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_data_batch(self, sources, source_names=None):
+        self.release.wait()
+        self.batches.append(len(sources))
+        return [{'surname': 'DOE', 'source_file': name} for name in source_names]
+
+    def process_pdf(self, pdf_source, source_name=None):
+        return [{'surname': 'DOE', 'source_file': source_name, 'page_number': 1}]
+
+class TestExtractionService(unittest.TestCase):
+    def test_concurrent_requests_share_a_batch(self):
+        extractor = FakeExtractor()
+        service = ExtractionService(extractor, batch_wait_ms=200).start()
+        try:
+            futures = [service.submit(b'img', f'{i}.png') for i in range(3)]
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            service.stop()
+        self.assertEqual([r[0]['source_file'] for r in results], ['0.png', '1.png', '2.png'])
+        self.assertEqual(extractor.batches, [3])
+
+    def test_full_queue_is_rejected(self):
+        extractor = FakeExtractor()
+        extractor.release.clear()
+        service = ExtractionService(extractor, max_queue=1, max_batch=1, batch_wait_ms=0).start()
+        try:
+            first = service.submit(b'img', 'a.png')
+            # Wait until the worker has picked up the first request and is blocked on it
+            deadline = time.monotonic() + 5
+            while service.health()['in_flight'] == 0:
+                if time.monotonic() > deadline:
+                    self.fail("The worker never picked up the first request")
+                time.sleep(0.01)
+            service.submit(b'img', 'b.png')
+            with self.assertRaises(ServiceOverloaded):
+                service.submit(b'img', 'c.png')
+            self.assertEqual(service.health()['rejected'], 1)
+        finally:
+            extractor.release.set()
+            first.result(timeout=5)
+            service.stop()
+
+    def test_http_endpoints(self):
+        service = ExtractionService(FakeExtractor(), batch_wait_ms=0).start()
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = "http://%s:%d" % server.server_address[:2]
+        try:
+            with urllib.request.urlopen(base + "/health") as resp:
+                self.assertEqual(json.load(resp)['status'], 'ok')
+            with urllib.request.urlopen(base + "/metrics") as resp:
+                self.assertIn(b'passport_ocr_', resp.read())
+
+            req = urllib.request.Request(base + "/extract?filename=scan.pdf", data=b'%PDF-1.4 ...', method='POST')
+            with urllib.request.urlopen(req) as resp:
+                results = json.load(resp)['results']
+            self.assertEqual(results[0]['source_file'], 'scan.pdf')
+            self.assertIn('validation_errors', results[0])
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.stop()
+
+    def test_unix_socket_path_is_only_replaced_when_stale(self):
+        service = ExtractionService(FakeExtractor())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ocr.sock")
+            with open(path, "w") as f:
+                f.write("not a socket")
+            with self.assertRaises(FileExistsError):
+                make_server(service, socket_path=path)
+            self.assertTrue(os.path.isfile(path))
+            os.remove(path)
+
+            # A socket file left behind by a server that is gone
+            with socket.socket(socket.AF_UNIX) as stale:
+                stale.bind(path)
+            server = make_server(service, socket_path=path)
+            try:
+                # ...while this one is still listening
+                with self.assertRaises(OSError):
+                    make_server(service, socket_path=path)
+            finally:
+                server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
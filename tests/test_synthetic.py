@@ -0,0 +1,26 @@
+import unittest
+import random
+from benchmarks.synthetic import random_identity, td3_lines, generate_samples, generate_pdf
+from src.pdf_pages import count_pages
+from src.utils import td3_check_digits_valid
+
+class TestSyntheticPassports(unittest.TestCase):
+    def test_mrz_lines_are_valid(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            line1, line2 = td3_lines(random_identity(rng))
+            self.assertEqual((len(line1), len(line2)), (44, 44))
+            self.assertTrue(td3_check_digits_valid(line2))
+
+    def test_generation_is_reproducible(self):
+        first = list(generate_samples(2, seed=7, noise=5))
+        second = list(generate_samples(2, seed=7, noise=5))
+        self.assertEqual(first, second)
+
+    def test_multi_page_pdf(self):
+        pdf, truths = generate_pdf(3, seed=2, rotations=(0, 180))
+        self.assertEqual(len(truths), 3)
+        self.assertEqual(count_pages(pdf), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+import numpy as np
+from src.text_lines import line_boxes, split_lines
+
+class TestTextLines(unittest.TestCase):
+    def setUp(self):
+        # Two long lines of "text" and a speck too thin to be a line
+        self.mask = np.zeros((60, 200), np.uint8)
+        self.mask[10:20, 10:190] = 1
+        self.mask[35:45, 10:190] = 1
+        self.mask[52:54, 100:102] = 1
+
+    def test_split_lines_by_projection_profile(self):
+        self.assertEqual([(top, bottom) for top, bottom, _ in split_lines(self.mask)], [(10, 20), (35, 45)])
+        self.assertEqual([(top, bottom) for top, bottom, _ in split_lines(self.mask, min_height=1)],
+                         [(10, 20), (35, 45), (52, 54)])
+        self.assertEqual(split_lines(self.mask, descent=0.2)[0][:2], (10, 22))
+
+    def test_line_boxes_keep_long_lines(self):
+        boxes = line_boxes(self.mask, min_aspect=8, min_width=40)
+        self.assertEqual([(y, h) for _, y, _, h in boxes], [(10, 10), (35, 10)])
+        self.assertEqual(line_boxes(self.mask, min_aspect=8, min_width=40, min_height=12), [])
+
+if __name__ == '__main__':
+    unittest.main()
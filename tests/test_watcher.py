@@ -0,0 +1,92 @@
+import unittest
+import os
+import time
+import tempfile
+from src.watcher import FolderWatcher
+from src.manifest import JobManifest
+
+class FakeExtractor:
+    reader = object()
+
+    def get_data(self, path, source_name=None):
+        return {'surname': 'DOE', 'source_file': source_name}
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.writer = ListWriter()
+        self.watcher = FolderWatcher(FakeExtractor(), self.tmp.name, self.writer, settle_seconds=0.2)
+
+    def _ready(self):
+        items = []
+        while not self.watcher._ready.empty():
+            items.append(self.watcher._ready.get())
+        return items
+
+    def test_file_is_queued_only_after_it_settles(self):
+        path = os.path.join(self.tmp.name, 'scan.png')
+        with open(path, 'wb') as f:
+            f.write(b'part')
+        self.watcher.notify(path)
+        self.watcher._check_pending()
+        self.assertEqual(self._ready(), [])
+
+        # Still being written: the settle timer restarts
+        time.sleep(0.1)
+        with open(path, 'ab') as f:
+            f.write(b'more')
+        self.watcher._check_pending()
+        time.sleep(0.15)
+        self.watcher._check_pending()
+        self.assertEqual(self._ready(), [])
+
+        time.sleep(0.25)
+        self.watcher._check_pending()
+        ready = self._ready()
+        self.assertEqual([item[0] for item in ready], [path])
+
+        self.watcher._process(*ready[0])
+        self.assertEqual(self.writer.records[0]['source_file'], 'scan.png')
+
+        # An event for an unchanged, already processed file does nothing
+        self.watcher.notify(path)
+        time.sleep(0.25)
+        self.watcher._check_pending()
+        self.watcher._check_pending()
+        self.assertEqual(self._ready(), [])
+
+    def test_restart_skips_files_already_written(self):
+        path = os.path.join(self.tmp.name, 'scan.png')
+        with open(path, 'wb') as f:
+            f.write(b'scan')
+        manifest = JobManifest(os.path.join(self.tmp.name, 'out.manifest.sqlite'))
+        self.addCleanup(manifest.close)
+
+        for run in range(2):
+            watcher = FolderWatcher(FakeExtractor(), self.tmp.name, self.writer, settle_seconds=0, manifest=manifest)
+            watcher.scan_existing()
+            watcher._check_pending()
+            while not watcher._ready.empty():
+                watcher._process(*watcher._ready.get())
+        self.assertEqual(len(self.writer.records), 1)
+
+    def test_ignores_other_files(self):
+        path = os.path.join(self.tmp.name, 'notes.txt')
+        open(path, 'w').close()
+        self.watcher.notify(path)
+        self.watcher.notify(os.path.join(self.tmp.name, '.scan.png.part'))
+        self.assertEqual(self.watcher._pending, {})
+
+if __name__ == '__main__':
+    unittest.main()